@@ -0,0 +1,103 @@
+from collections import defaultdict
+from datetime import timedelta
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from apps.core.utils import a_fecha
+
+from .eventos import encoder
+
+
+# ============================
+#   CACHÉ DE EVENTOS POR DÍA
+# ============================
+# Cada (fuente, fecha) guarda el JSON ya serializado de sus eventos, como un
+# fragmento listo para unir dentro del arreglo. Una ventana del calendario se
+# arma con un get_many de sus días; solo los días que faltan van a la BD.
+# Los cambios invalidan únicamente los días afectados (ver signals.py); un
+# cambio que toca todos los días (p. ej. renombrar una cancha) cambia la
+# generación de la fuente y deja huérfanas todas sus claves.
+#
+# Cada día tiene además una versión, y el fragmento se guarda junto a la
+# versión que se leyó ANTES de consultar. Si un cambio se confirma entre la
+# consulta y el set_many, invalidar_dias ya movió la versión: el fragmento
+# viejo que se escribe después no calza y se descarta al leerlo.
+
+# Ventanas más largas que esto no se cachean (vista mensual = 42 días)
+MAX_DIAS_CACHE = 62
+# Cota a la obsolescencia por cambios que no emiten señales
+TIMEOUT_DIA = 6 * 60 * 60
+
+
+def _generacion(fuente):
+    clave = f"calendario:generacion:{fuente}"
+    generacion = cache.get(clave)
+    if generacion is None:
+        cache.add(clave, uuid4().hex, timeout=None)
+        generacion = cache.get(clave)
+    return generacion
+
+
+def _clave_dia(fuente, generacion, dia):
+    return f"calendario:dia:{fuente}:{generacion}:{dia.isoformat()}"
+
+
+def _clave_version(fuente, generacion, dia):
+    return f"calendario:version_dia:{fuente}:{generacion}:{dia.isoformat()}"
+
+
+def fragmentos_por_dia(fuente, inicio, fin, consulta, serializar):
+    """
+    Fragmentos JSON de `fuente` para los días [inicio, fin), en orden.
+    `consulta(inicio, fin)` y `serializar(fila)` son los de la fuente; se usan
+    solo para los días que no están en caché, con una consulta por rango.
+    """
+    generacion = _generacion(fuente)
+    dias = [inicio + timedelta(days=n) for n in range((fin - inicio).days)]
+    claves = {dia: _clave_dia(fuente, generacion, dia) for dia in dias}
+    versiones = {dia: _clave_version(fuente, generacion, dia) for dia in dias}
+
+    # Fragmentos y versiones en un solo get_many
+    en_cache = cache.get_many([*claves.values(), *versiones.values()])
+
+    def vigente(dia):
+        guardado = en_cache.get(claves[dia])
+        return isinstance(guardado, tuple) and guardado[0] == en_cache.get(versiones[dia])
+
+    fragmentos = {dia: en_cache[claves[dia]][1] for dia in dias if vigente(dia)}
+    faltan = [dia for dia in dias if dia not in fragmentos]
+
+    if faltan:
+        # La versión con que se sella el fragmento se fija antes de consultar
+        for dia in faltan:
+            if en_cache.get(versiones[dia]) is None:
+                cache.add(versiones[dia], uuid4().hex, timeout=None)
+                en_cache[versiones[dia]] = cache.get(versiones[dia])
+
+        por_dia = defaultdict(list)
+        for fila in consulta(faltan[0], faltan[-1] + timedelta(days=1)):
+            evento = serializar(fila)
+            por_dia[evento['start'][:10]].append(evento)
+
+        nuevos = {}
+        for dia in faltan:
+            eventos = sorted(por_dia.get(dia.isoformat(), []), key=lambda e: e['start'])
+            fragmentos[dia] = encoder.encode(eventos)[1:-1]
+            nuevos[claves[dia]] = (en_cache[versiones[dia]], fragmentos[dia])
+        cache.set_many(nuevos, timeout=TIMEOUT_DIA)
+
+    return [fragmentos[dia] for dia in dias]
+
+
+def invalidar_dias(fuente, fechas):
+    """Mueve la versión de los días afectados por un cambio (acepta date o 'YYYY-MM-DD')."""
+    generacion = _generacion(fuente)
+    dias = {a_fecha(f) for f in fechas if f}
+    cache.set_many({_clave_version(fuente, generacion, dia): uuid4().hex for dia in dias}, timeout=None)
+    cache.delete_many([_clave_dia(fuente, generacion, dia) for dia in dias])
+
+
+def invalidar_todo(fuente):
+    """Nueva generación: todos los días de la fuente quedan sin caché."""
+    cache.set(f"calendario:generacion:{fuente}", uuid4().hex, timeout=None)
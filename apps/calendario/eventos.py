@@ -0,0 +1,83 @@
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+# Filas que se leen de la BD por vuelta al iterar el queryset en modo streaming
+CHUNK_SIZE = 2000
+
+encoder = DjangoJSONEncoder()
+
+
+# ============================
+#   SERIALIZADORES (FullCalendar)
+# ============================
+
+def evento_reserva(r):
+    """Evento de FullCalendar a partir de una fila .values() de Reserva."""
+    return {
+        "id": r['id'],
+        "title": f"{r['cancha__nombre']} - {r['socio__nombre']}",
+        "start": f"{r['fecha']}T{r['hora_inicio']}",
+        "end": f"{r['fecha']}T{r['hora_fin']}",
+        "color": "#ffc107",
+        "extendedProps": {
+            "id": r['id'],
+            "socio_id": r['socio_id'],
+            "cancha_id": r['cancha_id'],
+            "hora_inicio": str(r['hora_inicio']),
+            "hora_fin": str(r['hora_fin']),
+        },
+    }
+
+
+def fila_reserva(reserva):
+    """Convierte una instancia de Reserva en la fila .values() que espera evento_reserva."""
+    return {
+        'id': reserva.pk,
+        'fecha': reserva.fecha,
+        'hora_inicio': reserva.hora_inicio,
+        'hora_fin': reserva.hora_fin,
+        'socio_id': reserva.socio_id,
+        'cancha_id': reserva.cancha_id,
+        'socio__nombre': reserva.socio.nombre,
+        'cancha__nombre': reserva.cancha.nombre,
+    }
+
+
+def evento_taller(taller):
+    """Evento de FullCalendar a partir de una instancia de Taller."""
+    return {
+        "id": taller.id_taller,
+        "title": taller.nombre,
+        "start": f"{taller.fecha}T{taller.hora_inicio}",
+        "end": f"{taller.fecha}T{taller.hora_fin}",
+        "color": "#007bff",
+        "extendedProps": {
+            "profesor": f"{taller.profesor.nombre} {getattr(taller.profesor, 'apellido', '')}".strip(),
+            "cupos": taller.cupos,
+            "inscritos": taller.inscritos_count(),
+        },
+    }
+
+
+# ============================
+#   STREAMING JSON
+# ============================
+
+def streaming_json_array(eventos, chunk_size=CHUNK_SIZE):
+    """
+    Escribe un arreglo JSON de forma incremental: emite un fragmento por cada
+    `chunk_size` eventos, así la memoria no depende del total de eventos.
+    """
+    eventos = iter(eventos)
+    yield '['
+    separador = ''
+    while True:
+        lote = list(islice(eventos, chunk_size))
+        if not lote:
+            break
+        # Un solo encode por lote (encoder en C) y se quitan los corchetes
+        yield separador + encoder.encode(lote)[1:-1]
+        separador = ', '
+    yield ']'
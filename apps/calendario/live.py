@@ -0,0 +1,104 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from uuid import uuid4
+
+
+# ============================
+#   PUB/SUB EN PROCESO (SSE)
+# ============================
+# Los cambios se publican desde código síncrono (señales, hilos de las vistas)
+# y se entregan a cada suscriptor en una queue.Queue, que el generador de la
+# respuesta (otro hilo del servidor WSGI) lee con timeout. Solo reparte entre
+# las conexiones de este proceso.
+#
+# Cada conexión dura poco (views.SSE_DURACION) y el navegador reconecta solo
+# con Last-Event-ID: los últimos mensajes quedan en `_recientes` para
+# reenviarle lo que pasó mientras reconectaba. Si ya no están (o el id es de
+# otro proceso) se le pide recargar (resync).
+
+# Deltas pendientes por cliente y mensajes guardados para reenviar; si un
+# cliente lento llena su cola se le pide recargar en vez de acumular memoria.
+MAX_PENDIENTES = 200
+
+# Tras cerrarse la última conexión se sigue publicando este tiempo (segundos),
+# para que el cliente que está reconectando reciba lo que se perdió.
+VENTANA_RECONEXION = 30
+
+
+class Hub:
+    def __init__(self):
+        self._suscriptores = set()
+        self._recientes = deque(maxlen=MAX_PENDIENTES)  # (secuencia, id, mensaje)
+        self._secuencia = itertools.count(1)
+        self._ultima = 0
+        self._proceso = uuid4().hex[:8]  # los ids de otro proceso no se pueden reanudar
+        self._ultima_desconexion = float('-inf')
+        self._lock = threading.Lock()
+
+    def _id(self, secuencia):
+        return f"{self._proceso}-{secuencia}"
+
+    def _secuencia_de(self, ultimo_id):
+        proceso, _, secuencia = (ultimo_id or '').partition('-')
+        if proceso != self._proceso or not secuencia.isdigit():
+            return None
+        return int(secuencia)
+
+    def suscribir(self, ultimo_id=None):
+        """
+        Registra una cola y la devuelve. Con `ultimo_id` (Last-Event-ID del
+        navegador) la cola parte con lo publicado después de ese mensaje.
+        Items de la cola: (id, mensaje).
+        """
+        cola = queue.Queue(maxsize=MAX_PENDIENTES)
+        with self._lock:
+            if ultimo_id:
+                desde = self._secuencia_de(ultimo_id)
+                primera = self._recientes[0][0] if self._recientes else self._ultima + 1
+                if desde is None or desde > self._ultima or desde + 1 < primera:
+                    cola.put_nowait((self._id(self._ultima), {'tipo': 'resync'}))
+                else:
+                    for secuencia, id_mensaje, mensaje in self._recientes:
+                        if secuencia > desde:
+                            cola.put_nowait((id_mensaje, mensaje))
+            self._suscriptores.add(cola)
+        return cola
+
+    def desuscribir(self, cola):
+        with self._lock:
+            self._suscriptores.discard(cola)
+            self._ultima_desconexion = time.monotonic()
+
+    def hay_suscriptores(self):
+        return bool(self._suscriptores) or (
+            time.monotonic() - self._ultima_desconexion < VENTANA_RECONEXION
+        )
+
+    def publicar(self, mensaje):
+        """Entrega `mensaje` (dict) a todos los suscriptores. Seguro desde cualquier hilo."""
+        with self._lock:
+            secuencia = next(self._secuencia)
+            id_mensaje = self._id(secuencia)
+            self._recientes.append((secuencia, id_mensaje, mensaje))
+            self._ultima = secuencia
+            suscriptores = list(self._suscriptores)
+        for cola in suscriptores:
+            _encolar(cola, id_mensaje, mensaje)
+
+
+def _encolar(cola, id_mensaje, mensaje):
+    try:
+        cola.put_nowait((id_mensaje, mensaje))
+    except queue.Full:
+        try:
+            while True:
+                cola.get_nowait()
+        except queue.Empty:
+            pass
+        cola.put_nowait((id_mensaje, {'tipo': 'resync'}))
+
+
+hub = Hub()
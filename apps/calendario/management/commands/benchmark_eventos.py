@@ -0,0 +1,66 @@
+import json
+import time
+import tracemalloc
+from datetime import date, time as hora, timedelta
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.calendario.eventos import CHUNK_SIZE, evento_reserva, streaming_json_array
+
+
+def filas_sinteticas(total):
+    """Genera filas con la misma forma que .values() de Reserva (sin tocar la BD)."""
+    base = date(2025, 1, 1)
+    for i in range(total):
+        yield {
+            'id': i,
+            'fecha': base + timedelta(days=i % 365),
+            'hora_inicio': hora(8 + i % 12),
+            'hora_fin': hora(9 + i % 12),
+            'socio_id': i % 5000,
+            'cancha_id': i % 8,
+            'socio__nombre': f"Socio {i % 5000}",
+            'cancha__nombre': f"Cancha {i % 8}",
+        }
+
+
+def modo_lista(total, chunk_size):
+    """Ruta actual: arma la lista completa y la serializa de una vez (JsonResponse)."""
+    eventos = [evento_reserva(r) for r in filas_sinteticas(total)]
+    return len(json.dumps(eventos, cls=DjangoJSONEncoder))
+
+
+def modo_streaming(total, chunk_size):
+    """Ruta streaming: consume los fragmentos como lo haría el servidor WSGI/ASGI."""
+    eventos = map(evento_reserva, filas_sinteticas(total))
+    return sum(len(fragmento) for fragmento in streaming_json_array(eventos, chunk_size))
+
+
+class Command(BaseCommand):
+    help = "Compara memoria pico y latencia del feed de eventos: lista completa vs. streaming."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--eventos', type=int, default=100_000)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        total = options['eventos']
+        chunk_size = options['chunk_size']
+
+        self.stdout.write(f"Eventos: {total:,} | chunk_size: {chunk_size:,}")
+        for nombre, funcion in (('lista', modo_lista), ('streaming', modo_streaming)):
+            # Latencia sin tracemalloc (su instrumentación distorsiona los tiempos)
+            t0 = time.perf_counter()
+            bytes_json = funcion(total, chunk_size)
+            segundos = time.perf_counter() - t0
+
+            tracemalloc.start()
+            funcion(total, chunk_size)
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            self.stdout.write(
+                f"{nombre:<10} {segundos * 1000:9.1f} ms | "
+                f"pico {pico / 1024 / 1024:8.2f} MiB | {bytes_json / 1024 / 1024:.2f} MiB JSON"
+            )
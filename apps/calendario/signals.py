@@ -0,0 +1,180 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.canchas.models import Cancha, Reserva
+from apps.canchas.signals import reservas_creadas_en_lote
+from apps.socios.models import Socio
+from apps.talleres.models import InscripcionTaller, Taller
+from apps.talleres.signals import talleres_creados_en_lote
+from .cache_eventos import invalidar_dias, invalidar_todo
+from .eventos import evento_reserva, evento_taller, fila_reserva
+from .live import hub
+from .versiones import marcar_cambio
+
+
+# Todo se hace al confirmar la transacción, para que ningún lector cachee un
+# ETag o un día con datos aún no confirmados, ni reciba un delta que luego
+# se revierte.
+
+
+# ============================
+#   FECHA ORIGINAL
+# ============================
+# Si una reserva o taller cambia de fecha hay que invalidar el día antiguo y
+# el nuevo. Se lee del __dict__ para no cargar campos diferidos.
+
+@receiver(post_init, sender=Reserva)
+@receiver(post_init, sender=Taller)
+def recordar_fecha(sender, instance, **kwargs):
+    instance._fecha_original = instance.__dict__.get('fecha')
+
+
+def _fechas_afectadas(instance):
+    fechas = {instance._fecha_original, instance.fecha}
+    instance._fecha_original = instance.fecha
+    return fechas
+
+
+# ============================
+#   INVALIDACIÓN (ETag + caché por día)
+# ============================
+
+@receiver(post_save, sender=Reserva)
+@receiver(post_delete, sender=Reserva)
+def cambio_reserva(sender, instance, **kwargs):
+    fechas = _fechas_afectadas(instance)
+
+    def invalidar():
+        invalidar_dias('canchas', fechas)
+        marcar_cambio('canchas')
+    transaction.on_commit(invalidar)
+
+
+@receiver(reservas_creadas_en_lote)
+def reservas_en_lote(sender, reservas, **kwargs):
+    fechas = {r.fecha for r in reservas}
+
+    def invalidar():
+        invalidar_dias('canchas', fechas)
+        marcar_cambio('canchas')
+    transaction.on_commit(invalidar)
+
+
+@receiver([post_save, post_delete], sender=Cancha)
+@receiver([post_save, post_delete], sender=Socio)
+def cambio_nombres_canchas(sender, **kwargs):
+    # El nombre de la cancha / socio va en el título de todas sus reservas
+    def invalidar():
+        invalidar_todo('canchas')
+        marcar_cambio('canchas')
+    transaction.on_commit(invalidar)
+
+
+@receiver(post_save, sender=Taller)
+@receiver(post_delete, sender=Taller)
+def cambio_taller(sender, instance, **kwargs):
+    fechas = _fechas_afectadas(instance)
+
+    def invalidar():
+        invalidar_dias('talleres', fechas)
+        marcar_cambio('talleres')
+    transaction.on_commit(invalidar)
+
+
+@receiver(talleres_creados_en_lote)
+def talleres_en_lote(sender, talleres, **kwargs):
+    fechas = {t.fecha for t in talleres}
+
+    def invalidar():
+        invalidar_dias('talleres', fechas)
+        marcar_cambio('talleres')
+    transaction.on_commit(invalidar)
+
+
+@receiver([post_save, post_delete], sender=InscripcionTaller)
+def cambio_inscripcion(sender, instance, **kwargs):
+    # Cambia el contador de inscritos que muestra el evento del taller
+    taller_id = instance.taller_id
+
+    def invalidar():
+        invalidar_dias('talleres', Taller.objects.filter(pk=taller_id).values_list('fecha', flat=True))
+        marcar_cambio('talleres')
+    transaction.on_commit(invalidar)
+
+
+# ============================
+#   DELTAS EN VIVO (SSE)
+# ============================
+# Mensaje: {'tipo': 'delta', 'fuente', 'accion', 'id', 'evento'}; 'evento' es
+# el mismo dict del feed (None si hay que quitarlo del calendario).
+
+def _publicar(fuente, accion, id, evento=None):
+    hub.publicar({'tipo': 'delta', 'fuente': fuente, 'accion': accion, 'id': id, 'evento': evento})
+
+
+def _publicar_reserva(reserva, creada):
+    if not hub.hay_suscriptores():
+        return
+    if reserva.estado != 'confirmada':  # el calendario solo muestra confirmadas
+        _publicar('canchas', 'cancelled', reserva.pk)
+        return
+    _publicar('canchas', 'created' if creada else 'updated', reserva.pk, evento_reserva(fila_reserva(reserva)))
+
+
+@receiver(post_save, sender=Reserva)
+def reserva_guardada(sender, instance, created, **kwargs):
+    transaction.on_commit(lambda: _publicar_reserva(instance, created))
+
+
+@receiver(post_delete, sender=Reserva)
+def reserva_eliminada(sender, instance, **kwargs):
+    reserva_id = instance.pk  # Django lo deja en None tras el delete
+    transaction.on_commit(lambda: _publicar('canchas', 'deleted', reserva_id))
+
+
+@receiver(reservas_creadas_en_lote)
+def reservas_en_lote_publicar(sender, reservas, **kwargs):
+    def publicar():
+        for reserva in reservas:
+            _publicar_reserva(reserva, creada=True)
+    transaction.on_commit(publicar)
+
+
+def _publicar_taller(taller_id, accion):
+    if not hub.hay_suscriptores():  # evita la consulta si nadie escucha
+        return
+    taller = Taller.objects.filter(pk=taller_id, activo=True).con_inscritos().first()
+    if taller is None:  # eliminado o desactivado
+        _publicar('talleres', 'deleted', taller_id)
+        return
+    _publicar('talleres', accion, taller_id, evento_taller(taller))
+
+
+@receiver(post_save, sender=Taller)
+def taller_guardado(sender, instance, created, **kwargs):
+    taller_id = instance.pk
+    transaction.on_commit(lambda: _publicar_taller(taller_id, 'created' if created else 'updated'))
+
+
+@receiver(post_delete, sender=Taller)
+def taller_eliminado(sender, instance, **kwargs):
+    taller_id = instance.pk
+    transaction.on_commit(lambda: _publicar('talleres', 'deleted', taller_id))
+
+
+@receiver(talleres_creados_en_lote)
+def talleres_en_lote_publicar(sender, talleres, **kwargs):
+    # Recién creados (sin inscritos): el evento se arma sin volver a la BD
+    def publicar():
+        if not hub.hay_suscriptores():
+            return
+        for taller in talleres:
+            _publicar('talleres', 'created', taller.pk, evento_taller(taller))
+    transaction.on_commit(publicar)
+
+
+@receiver([post_save, post_delete], sender=InscripcionTaller)
+def inscripcion_cambiada(sender, instance, **kwargs):
+    taller_id = instance.taller_id
+    transaction.on_commit(lambda: _publicar_taller(taller_id, 'updated'))
@@ -1,3 +1,271 @@
+import json
+from datetime import date, time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.canchas.models import Cancha, Reserva
+from apps.socios.models import Socio
+from apps.talleres.inscripciones import inscribir
+from apps.talleres.models import Taller
+from apps.users.models import Usuario
+from .cache_eventos import fragmentos_por_dia, invalidar_dias
+from .live import hub
+
+
+class EventosTalleresTests(TestCase):
+    """El feed de talleres no debe hacer consultas por fila (profesor / inscritos)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_user(
+            rut='11111111-1', password='x', nombre='Ana', apellido='Admin',
+            correo='admin@gym.cl', rol='admin',
+        )
+        cls.socio = Socio.objects.create(
+            rut='22222222-2', nombre='Sofía', apellido_paterno='Soto', correo='sofia@gym.cl',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def crear_talleres(self, cantidad, desde=0):
+        """Un taller por profesor distinto, cada uno con un socio inscrito."""
+        for i in range(desde, desde + cantidad):
+            profesor = Usuario.objects.create_user(
+                rut=f'3000000{i}-{i}', password='x', nombre=f'Profe {i}', apellido='P',
+                correo=f'profe{i}@gym.cl', rol='profesor',
+            )
+            taller = Taller.objects.create(
+                nombre=f'Taller {i}', profesor=profesor, cupos=10,
+                fecha=date(2025, 11, 3 + i), hora_inicio=time(9), hora_fin=time(10),
+            )
+            inscribir(self.socio, taller)
+
+    def consultas_feed(self):
+        with CaptureQueriesContext(connection) as ctx:
+            respuesta = self.client.get('/calendario/eventos/talleres/')
+        self.assertEqual(respuesta.status_code, 200)
+        return len(ctx.captured_queries), respuesta.json()
+
+    def test_cantidad_de_consultas_constante(self):
+        self.client.force_login(self.admin)
+
+        self.crear_talleres(1)
+        consultas_uno, eventos = self.consultas_feed()
+        self.assertEqual(eventos[0]['extendedProps']['inscritos'], 1)
+
+        self.crear_talleres(5, desde=1)
+        consultas_seis, eventos = self.consultas_feed()
+        self.assertEqual(len(eventos), 6)
+        self.assertEqual(consultas_uno, consultas_seis)
+
+    def test_detalle_taller_usa_anotacion(self):
+        self.client.force_login(self.admin)
+        self.crear_talleres(1)
+        taller = Taller.objects.get()
+
+        respuesta = self.client.get(f'/talleres/api/{taller.id_taller}/')
+
+        datos = respuesta.json()['taller']
+        self.assertEqual(datos['inscritos'], 1)
+        self.assertEqual(datos['cupos_disponibles'], 9)
+
+
+class FeedEventosTests(TestCase):
+    """ETag/304, ventana start/end, ?stream=1 y ?sources= de los feeds JSON."""
+
+    def setUp(self):
+        cache.clear()
+        admin = Usuario.objects.create_user(
+            rut='11111111-1', password='x', nombre='Ana', apellido='Admin', correo='admin@gym.cl', rol='admin',
+        )
+        self.client.force_login(admin)
+        self.cancha = Cancha.objects.create(nombre='Cancha 1', tipo='futbol')
+        self.socio = Socio.objects.create(
+            rut='22222222-2', nombre='Sofía', apellido_paterno='Soto', correo='sofia@gym.cl',
+        )
+        for dia in (3, 4, 5):
+            self.reservar(dia)
+        profesor = Usuario.objects.create_user(
+            rut='30000000-0', password='x', nombre='Profe', apellido='P', correo='profe@gym.cl', rol='profesor',
+        )
+        self.taller = Taller.objects.create(
+            nombre='Yoga', profesor=profesor, cupos=10,
+            fecha=date(2025, 11, 4), hora_inicio=time(9), hora_fin=time(10),
+        )
+
+    def reservar(self, dia, inicio=10):
+        return Reserva.objects.create(
+            socio=self.socio, cancha=self.cancha, fecha=date(2025, 11, dia),
+            hora_inicio=time(inicio), hora_fin=time(inicio + 1), estado='confirmada',
+        )
+
+    def etag(self, url):
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta['ETag']
+
+    def test_304_sin_consultar_eventos(self):
+        for url, tabla in (('/calendario/eventos/canchas/', 'canchas_reserva'),
+                           ('/calendario/eventos/talleres/', 'talleres_taller'),
+                           ('/calendario/eventos/', 'canchas_reserva')):
+            etag = self.etag(url)
+            with CaptureQueriesContext(connection) as ctx:
+                respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(respuesta.status_code, 304, url)
+            self.assertFalse([q for q in ctx.captured_queries if tabla in q['sql']], url)
+
+    def test_reserva_cambia_el_etag_al_confirmar(self):
+        url = '/calendario/eventos/canchas/'
+        etag = self.etag(url)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.reservar(3, inicio=12)
+        self.assertEqual(self.etag(url), etag)  # sin confirmar todavía
+
+        for callback in callbacks:
+            callback()
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()), 4)
+
+    def test_inscripcion_cambia_el_etag_de_talleres_y_del_combinado(self):
+        etags = {url: self.etag(url) for url in ('/calendario/eventos/talleres/', '/calendario/eventos/',
+                                                 '/calendario/eventos/canchas/')}
+        with self.captureOnCommitCallbacks(execute=True):
+            inscribir(self.socio, self.taller)
+
+        self.assertNotEqual(self.etag('/calendario/eventos/talleres/'), etags['/calendario/eventos/talleres/'])
+        self.assertNotEqual(self.etag('/calendario/eventos/'), etags['/calendario/eventos/'])
+        self.assertEqual(self.etag('/calendario/eventos/canchas/'), etags['/calendario/eventos/canchas/'])
+        taller, = self.client.get('/calendario/eventos/talleres/').json()
+        self.assertEqual(taller['extendedProps']['inscritos'], 1)
+
+    def test_ventana_start_end(self):
+        # FullCalendar manda fecha y hora con zona; end es exclusivo
+        eventos = self.client.get('/calendario/eventos/canchas/', {
+            'start': '2025-11-04T00:00:00-03:00', 'end': '2025-11-05T00:00:00-03:00',
+        }).json()
+        self.assertEqual([e['start'][:10] for e in eventos], ['2025-11-04'])
+
+        eventos = self.client.get('/calendario/eventos/canchas/', {'start': 'x', 'end': ''}).json()
+        self.assertEqual(len(eventos), 3)  # sin ventana válida: todo
+
+    def test_stream_igual_al_feed(self):
+        params = {'start': '2025-11-01', 'end': '2025-12-01'}
+        esperado = self.client.get('/calendario/eventos/', params).json()
+
+        respuesta = self.client.get('/calendario/eventos/', {**params, 'stream': '1'})
+        self.assertTrue(respuesta.streaming)
+        eventos = json.loads(b''.join(respuesta.streaming_content))
+        self.assertEqual(sorted(e['start'] for e in eventos), sorted(e['start'] for e in esperado))
+        self.assertEqual(len(eventos), 4)
+
+    def test_fuentes_combinadas(self):
+        def colores(sources):
+            eventos = self.client.get('/calendario/eventos/', {'sources': sources}).json()
+            return sorted(e['color'] for e in eventos)
+
+        self.assertEqual(colores('canchas'), ['#ffc107'] * 3)
+        self.assertEqual(colores('talleres'), ['#007bff'])
+        self.assertEqual(colores('canchas,talleres'), ['#007bff'] + ['#ffc107'] * 3)
+        self.assertEqual(colores('otra'), [])
+
+
+@patch('apps.calendario.views.SSE_DURACION', 0.3)
+@patch('apps.calendario.views.SSE_HEARTBEAT', 0.1)
+class StreamEventosTests(TestCase):
+    """El stream SSE es un generador síncrono que termina solo (WSGI)."""
+
+    def setUp(self):
+        admin = Usuario.objects.create_user(
+            rut='11111111-1', password='x', nombre='Ana', apellido='Admin', correo='admin@gym.cl', rol='admin',
+        )
+        self.client.force_login(admin)
+
+    def tearDown(self):
+        # Sin la ventana de reconexión, las señales de otros tests no publican
+        hub._ultima_desconexion = float('-inf')
+
+    def abrir(self, **headers):
+        respuesta = self.client.get('/calendario/eventos/stream/?sources=canchas', **headers)
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        frames = iter(respuesta.streaming_content)
+        self.assertEqual(next(frames), b'retry: 2000\n\n')  # ya está suscrito
+        return frames
+
+    def test_entrega_deltas_y_termina(self):
+        frames = self.abrir()
+        hub.publicar({'tipo': 'delta', 'fuente': 'talleres', 'id': 9})
+        hub.publicar({'tipo': 'delta', 'fuente': 'canchas', 'id': 1, 'evento': {'x': 1}})
+
+        resto = [f.decode() for f in frames]  # se corta a los SSE_DURACION segundos
+        deltas = [f for f in resto if 'event: delta' in f]
+        self.assertEqual(len(deltas), 1)
+        self.assertIn('"fuente": "canchas"', deltas[0])
+        self.assertTrue(deltas[0].startswith('id: '))
+        self.assertIn(': ping\n\n', resto)
+
+    def test_reconexion_con_last_event_id(self):
+        hub.publicar({'tipo': 'delta', 'fuente': 'canchas', 'id': 1, 'evento': None})
+        frames = self.abrir()
+        hub.publicar({'tipo': 'delta', 'fuente': 'canchas', 'id': 2, 'evento': None})
+        ultimo_id = next(frames).decode().split('\n')[0][len('id: '):]
+        list(frames)
+
+        # Lo publicado mientras el navegador reconectaba llega al reconectar
+        hub.publicar({'tipo': 'delta', 'fuente': 'canchas', 'id': 3, 'evento': None})
+        frames = self.abrir(HTTP_LAST_EVENT_ID=ultimo_id)
+        self.assertIn('"id": 3', next(frames).decode())
+        list(frames)
+
+        # Un id desconocido (otro proceso, reinicio) pide recargar
+        frames = self.abrir(HTTP_LAST_EVENT_ID='otro-5')
+        self.assertIn('event: resync', next(frames).decode())
+        list(frames)
+
+
+class CacheEventosPorDiaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.titulo = 'antes'
+        self.consultas = 0
+        self.cambio_en_medio = False
+
+    def consulta(self, inicio, fin):
+        self.consultas += 1
+        filas = [{'start': '2025-11-03T10:00:00', 'title': self.titulo}]
+        if self.cambio_en_medio:
+            # Otro request confirma un cambio entre la consulta y el set_many
+            self.cambio_en_medio = False
+            self.titulo = 'despues'
+            invalidar_dias('prueba', [date(2025, 11, 3)])
+        return filas
+
+    def fragmentos(self):
+        return fragmentos_por_dia('prueba', date(2025, 11, 3), date(2025, 11, 5), self.consulta, lambda fila: fila)
+
+    def test_cachea_por_dia(self):
+        self.assertIn('antes', self.fragmentos()[0])
+        self.assertEqual(self.fragmentos()[1], '')
+        self.assertEqual(self.consultas, 1)
+
+        invalidar_dias('prueba', ['2025-11-03'])
+        self.titulo = 'despues'
+        self.assertIn('despues', self.fragmentos()[0])
+        self.assertEqual(self.consultas, 2)
+
+    def test_invalidacion_entre_consulta_y_set(self):
+        self.cambio_en_medio = True
+        self.assertIn('antes', self.fragmentos()[0])  # lo que se leyó en ese momento
 
-# Create your tests here.
+        # El fragmento viejo que quedó escrito no se vuelve a servir
+        self.assertIn('despues', self.fragmentos()[0])
+        self.assertEqual(self.consultas, 2)
+        self.fragmentos()
+        self.assertEqual(self.consultas, 2)
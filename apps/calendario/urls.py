@@ -5,12 +5,19 @@ urlpatterns = [
     # ============================================================
     #CALENDARIOS (VISTAS PRINCIPALES)
     # ============================================================
+    path('', views.calendario_general, name='calendario_general'),
     path('canchas/', views.calendario_canchas, name='calendario_canchas'),
     path('talleres/', views.calendario_talleres, name='calendario_talleres'),
 
     # ============================================================
     #EVENTOS JSON (FullCalendar)
     # ============================================================
+    path('eventos/', views.eventos_json, name='eventos_json'),
     path('eventos/canchas/', views.eventos_canchas_json, name='eventos_canchas_json'),
     path('eventos/talleres/', views.eventos_talleres_json, name='eventos_talleres_json'),
+
+    # ============================================================
+    #CAMBIOS EN VIVO (Server-Sent Events)
+    # ============================================================
+    path('eventos/stream/', views.stream_eventos, name='stream_eventos'),
 ]
@@ -0,0 +1,41 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.utils import timezone
+
+
+# ============================
+#   VERSIÓN POR RECURSO (ETag)
+# ============================
+# Cada feed del calendario ('canchas', 'talleres') tiene una versión que se
+# renueva con cada cambio en sus modelos (ver signals.py). La versión es un
+# token aleatorio y no un contador, para que un reinicio o una expulsión del
+# caché nunca repita un ETag antiguo.
+
+def _clave(recurso):
+    return f"calendario:version:{recurso}"
+
+
+def obtener_version(recurso):
+    """Devuelve (token, fecha_modificacion) del recurso; la crea si no existe."""
+    clave = _clave(recurso)
+    version = cache.get(clave)
+    if version is None:
+        cache.add(clave, (uuid4().hex, timezone.now()), timeout=None)
+        version = cache.get(clave)
+    return version
+
+
+def marcar_cambio(recurso):
+    """Invalida la versión actual: los clientes dejarán de recibir 304."""
+    cache.set(_clave(recurso), (uuid4().hex, timezone.now()), timeout=None)
+
+
+def etag_recurso(recurso):
+    """Función etag_func para @condition."""
+    return lambda request, *args, **kwargs: f"{recurso}-{obtener_version(recurso)[0]}"
+
+
+def last_modified_recurso(recurso):
+    """Función last_modified_func para @condition."""
+    return lambda request, *args, **kwargs: obtener_version(recurso)[1]
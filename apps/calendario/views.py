@@ -1,13 +1,24 @@
 import json
-from django.http import JsonResponse
+import queue
+import time
+from itertools import chain
+
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
 from apps.users.models import Usuario
 from apps.socios.models import Socio
 from apps.canchas.models import Cancha, Reserva
 from apps.talleres.models import Taller
+from .cache_eventos import MAX_DIAS_CACHE, fragmentos_por_dia
+from .live import hub
+from .eventos import CHUNK_SIZE, evento_reserva, evento_taller, streaming_json_array
+from .versiones import etag_recurso, last_modified_recurso, obtener_version
 
 
 # ============================
@@ -24,6 +35,122 @@ def es_admin_superadmin_profesor_socio(user):
     return user.is_authenticated and getattr(user, 'rol', None) in ['admin', 'superadmin', 'profesor', 'socio']
 
 
+def _rango_visible(request):
+    """
+    Devuelve (inicio, fin) como fechas a partir de los parámetros start/end
+    que envía FullCalendar (ISO 8601). Si faltan o son inválidos → None.
+    """
+    rango = []
+    for param in ('start', 'end'):
+        try:
+            rango.append(parse_date((request.GET.get(param) or '')[:10]))
+        except ValueError:
+            rango.append(None)
+    return tuple(rango)
+
+
+def _reservas_visibles(inicio, fin):
+    """Reservas confirmadas del rango visible, proyectadas con .values()."""
+    # 🔹 SOCIO AHORA VE TODAS LAS RESERVAS, NO SOLO LAS SUYAS
+    # Admin / Superadmin / Profesor / Socio → todas las reservas confirmadas
+    reservas = Reserva.objects.filter(estado='confirmada')
+
+    # Solo el rango visible del calendario (usa el índice fecha + estado)
+    if inicio:
+        reservas = reservas.filter(fecha__gte=inicio)
+    if fin:
+        reservas = reservas.filter(fecha__lt=fin)
+
+    return reservas.values(
+        'id', 'fecha', 'hora_inicio', 'hora_fin',
+        'socio_id', 'cancha_id', 'socio__nombre', 'cancha__nombre',
+    )
+
+
+def _talleres_visibles(inicio, fin):
+    """Talleres activos del rango visible, con profesor e inscritos en la misma consulta."""
+    talleres = Taller.objects.filter(activo=True)
+    if inicio:
+        talleres = talleres.filter(fecha__gte=inicio)
+    if fin:
+        talleres = talleres.filter(fecha__lt=fin)
+    return talleres.con_inscritos()
+
+
+# Fuentes de eventos: nombre → (consulta por rango, serializador)
+FUENTES = {
+    'canchas': (_reservas_visibles, evento_reserva),
+    'talleres': (_talleres_visibles, evento_taller),
+}
+
+
+def _fuentes_pedidas(request):
+    """Fuentes de ?sources=canchas,talleres (todas si no se indica)."""
+    pedidas = request.GET.get('sources')
+    if not pedidas:
+        return list(FUENTES)
+    pedidas = {f.strip() for f in pedidas.split(',')}
+    return [f for f in FUENTES if f in pedidas]
+
+
+def _etag_eventos(request, *args, **kwargs):
+    """ETag del feed combinado: la versión de cada fuente pedida."""
+    fuentes = _fuentes_pedidas(request)
+    if not fuentes:
+        return None
+    return '-'.join(f"{f}-{obtener_version(f)[0]}" for f in fuentes)
+
+
+def _last_modified_eventos(request, *args, **kwargs):
+    return max((obtener_version(f)[1] for f in _fuentes_pedidas(request)), default=None)
+
+
+def _responder_eventos(request, nombres):
+    """
+    Responde los eventos de las fuentes `nombres` en el rango visible.
+
+    - ?stream=1: recorre cada queryset con .iterator() y escribe el arreglo JSON
+      de forma incremental (memoria plana sin importar el total).
+    - Ventana acotada (lo normal en FullCalendar): se arma con los fragmentos
+      por día de cache_eventos; solo los días sin caché van a la BD.
+    - Sin ventana: consulta directa.
+    """
+    inicio, fin = _rango_visible(request)
+
+    if request.GET.get('stream') == '1':
+        eventos = chain.from_iterable(
+            map(serializar, consulta(inicio, fin).iterator(chunk_size=CHUNK_SIZE))
+            for consulta, serializar in (FUENTES[n] for n in nombres)
+        )
+        return StreamingHttpResponse(streaming_json_array(eventos), content_type='application/json')
+
+    if inicio and fin and 0 < (fin - inicio).days <= MAX_DIAS_CACHE:
+        fragmentos = [
+            fragmento
+            for n in nombres
+            for fragmento in fragmentos_por_dia(n, inicio, fin, *FUENTES[n])
+            if fragmento
+        ]
+        return HttpResponse('[' + ', '.join(fragmentos) + ']', content_type='application/json')
+
+    return JsonResponse([
+        serializar(fila)
+        for consulta, serializar in (FUENTES[n] for n in nombres)
+        for fila in consulta(inicio, fin)
+    ], safe=False)
+
+
+# ============================
+#   CALENDARIO GENERAL
+# ============================
+
+@login_required
+@user_passes_test(es_admin_superadmin_profesor_socio)
+def calendario_general(request):
+    """Canchas y talleres juntos (una sola fuente de eventos)."""
+    return render(request, 'calendario/calendario.html')
+
+
 # ============================
 #   CALENDARIO CANCHAS
 # ============================
@@ -68,39 +195,10 @@ def calendario_talleres(request):
 # ============================
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=etag_recurso('canchas'), last_modified_func=last_modified_recurso('canchas'))
 def eventos_canchas_json(request):
-    eventos = []
-    rol = getattr(request.user, 'rol', None)
-
-    # 🔹 SOCIO AHORA VE TODAS LAS RESERVAS, NO SOLO LAS SUYAS
-    if rol == 'socio':
-        reservas = Reserva.objects.filter(
-            estado='confirmada'
-        ).select_related('cancha', 'socio')   # 👈 AQUÍ SE QUITÓ EL FILTRO DEL RUT
-    else:
-        # Admin / Superadmin / Profesor → todas las reservas
-        reservas = Reserva.objects.filter(
-            estado='confirmada'
-        ).select_related('cancha', 'socio')
-
-    for r in reservas:
-        eventos.append({
-            "id": r.id,
-            "title": f"{r.cancha.nombre} - {r.socio.nombre}",
-            "start": f"{r.fecha}T{r.hora_inicio}",
-            "end": f"{r.fecha}T{r.hora_fin}",
-            "color": "#ffc107",
-            "extendedProps": {
-                "id": r.id,
-                "socio_id": r.socio.id,
-                "cancha_id": r.cancha.id,
-                "hora_inicio": str(r.hora_inicio),
-                "hora_fin": str(r.hora_fin),
-            },
-        })
-
-    return JsonResponse(eventos, safe=False)
-
+    return _responder_eventos(request, ['canchas'])
 
 
 # ============================
@@ -108,19 +206,69 @@ def eventos_canchas_json(request):
 # ============================
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=etag_recurso('talleres'), last_modified_func=last_modified_recurso('talleres'))
 def eventos_talleres_json(request):
-    eventos = []
-    for taller in Taller.objects.filter(activo=True):
-        eventos.append({
-            "id": taller.id_taller,
-            "title": taller.nombre,
-            "start": f"{taller.fecha}T{taller.hora_inicio}",
-            "end": f"{taller.fecha}T{taller.hora_fin}",
-            "color": "#007bff",
-            "extendedProps": {
-                "profesor": f"{taller.profesor.nombre} {getattr(taller.profesor, 'apellido', '')}".strip(),
-                "cupos": taller.cupos,
-                "inscritos": taller.inscritos_count(),
-            },
-        })
-    return JsonResponse(eventos, safe=False)
+    return _responder_eventos(request, ['talleres'])
+
+
+# ============================
+#   EVENTOS COMBINADOS (JSON)
+# ============================
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_etag_eventos, last_modified_func=_last_modified_eventos)
+def eventos_json(request):
+    """Canchas y talleres en una sola respuesta (?sources=canchas,talleres&start&end)."""
+    return _responder_eventos(request, _fuentes_pedidas(request))
+
+
+
+# ============================
+#   CAMBIOS EN VIVO (SSE)
+# ============================
+
+# Comentario keep-alive para que proxies y navegador no corten la conexión
+SSE_HEARTBEAT = 15
+
+# El proyecto se sirve por WSGI: cada calendario abierto ocupa un hilo del
+# servidor mientras dura la conexión. Se corta a los SSE_DURACION segundos y el
+# navegador reconecta (retry) con Last-Event-ID, sin perder cambios (live.py).
+SSE_DURACION = 55
+SSE_RETRY_MS = 2000
+
+
+def _flujo_sse(fuentes, ultimo_id=None):
+    cola = hub.suscribir(ultimo_id)
+    try:
+        yield f'retry: {SSE_RETRY_MS}\n\n'
+        fin = time.monotonic() + SSE_DURACION
+        while (restante := fin - time.monotonic()) > 0:
+            try:
+                id_mensaje, mensaje = cola.get(timeout=min(SSE_HEARTBEAT, restante))
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            # 'resync' no tiene fuente: se envía siempre
+            if mensaje.get('fuente') and mensaje['fuente'] not in fuentes:
+                continue
+            datos = json.dumps(mensaje, cls=DjangoJSONEncoder)
+            yield f"id: {id_mensaje}\nevent: {mensaje['tipo']}\ndata: {datos}\n\n"
+    finally:
+        # También al cerrar el cliente: el servidor WSGI llama a close()
+        hub.desuscribir(cola)
+
+
+@login_required
+def stream_eventos(request):
+    """
+    Server-Sent Events con los cambios de reservas y talleres (?sources=canchas,talleres).
+    Cada delta trae el evento ya serializado, el calendario lo aplica sin
+    volver a consultar.
+    """
+    return StreamingHttpResponse(
+        _flujo_sse(_fuentes_pedidas(request), request.headers.get('Last-Event-ID')),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
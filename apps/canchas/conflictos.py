@@ -0,0 +1,200 @@
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+from itertools import accumulate
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from apps.core.utils import a_fecha, a_hora, bloquear_fila
+from .models import Cancha, Reserva
+from .signals import reservas_creadas_en_lote
+
+
+# Estados que ocupan la cancha
+ESTADOS_ACTIVOS = ('pendiente', 'confirmada')
+
+
+# Tope de una serie semanal (un año)
+MAX_DIAS_SERIE = 366
+
+
+class ConflictoReserva(Exception):
+    """La reserva se solapa con otra de la misma cancha y fecha."""
+
+
+class ConflictoSerie(ConflictoReserva):
+    """Una o más fechas de la serie chocan con reservas existentes."""
+
+    def __init__(self, fechas):
+        self.fechas = fechas
+        super().__init__(f"{len(fechas)} fecha(s) de la serie ya tienen reservas en ese horario.")
+
+
+# ============================
+#   ÍNDICE DE INTERVALOS
+# ============================
+
+class AgendaCancha:
+    """
+    Intervalos ocupados de una cancha en una fecha, ordenados por hora de inicio.
+
+    Junto a los inicios se guarda el máximo fin acumulado, así un solapamiento
+    se resuelve con una búsqueda binaria: basta mirar el mayor fin entre los
+    intervalos que empiezan antes de que termine el nuevo.
+    """
+
+    def __init__(self, intervalos=()):
+        intervalos = sorted(intervalos)
+        self.intervalos = intervalos
+        self.inicios = [inicio for inicio, _ in intervalos]
+        self.max_fin = list(accumulate((fin for _, fin in intervalos), max))
+
+    def __len__(self):
+        return len(self.intervalos)
+
+    def solapa(self, hora_inicio, hora_fin):
+        """True si [hora_inicio, hora_fin) choca con algún intervalo ocupado."""
+        idx = bisect_left(self.inicios, hora_fin)
+        return idx > 0 and self.max_fin[idx - 1] > hora_inicio
+
+
+def cargar_agendas(cancha_ids, fechas, excluir_id=None):
+    """
+    Arma las agendas de varias (cancha, fecha) con una sola consulta.
+    Devuelve un dict {(cancha_id, fecha): AgendaCancha}; las vacías no aparecen.
+    """
+    filas = Reserva.objects.filter(
+        cancha_id__in=cancha_ids,
+        fecha__in=fechas,
+        estado__in=ESTADOS_ACTIVOS,
+    ).exclude(id=excluir_id).values_list('cancha_id', 'fecha', 'hora_inicio', 'hora_fin')
+
+    ocupados = defaultdict(list)
+    for cancha_id, fecha, hora_inicio, hora_fin in filas:
+        ocupados[(cancha_id, fecha)].append((hora_inicio, hora_fin))
+
+    return {clave: AgendaCancha(intervalos) for clave, intervalos in ocupados.items()}
+
+
+def agenda_cancha(cancha_id, fecha, excluir_id=None):
+    """Agenda de una cancha en una fecha (vacía si no hay reservas)."""
+    agendas = cargar_agendas([cancha_id], [fecha], excluir_id=excluir_id)
+    return agendas.get((cancha_id, fecha), AgendaCancha())
+
+
+def guardar_reserva(*, socio, cancha, fecha, hora_inicio, hora_fin, reserva=None, estado=None):
+    """
+    Crea (o actualiza si se pasa `reserva`) una reserva de cancha.
+
+    La verificación de solapamiento y el guardado ocurren en la misma
+    transacción, con la cancha bloqueada. Lanza ConflictoReserva si el horario
+    está ocupado (también si una reserva cancelada tiene el mismo inicio, por
+    el unique_together) y ValueError si la fecha u horas son inválidas.
+    """
+    fecha = a_fecha(fecha)
+    hora_inicio = a_hora(hora_inicio)
+    hora_fin = a_hora(hora_fin)
+    if hora_fin <= hora_inicio:
+        raise ValueError("La hora de término debe ser posterior a la de inicio.")
+
+    with transaction.atomic():
+        bloquear_fila(Cancha, cancha.pk)
+
+        agenda = agenda_cancha(cancha.pk, fecha, excluir_id=reserva.pk if reserva else None)
+        if agenda.solapa(hora_inicio, hora_fin):
+            raise ConflictoReserva("Ya existe una reserva para esa cancha en ese horario.")
+
+        if reserva is None:
+            reserva = Reserva(estado=estado or 'confirmada')
+        elif estado:
+            reserva.estado = estado
+
+        reserva.socio = socio
+        reserva.cancha = cancha
+        reserva.fecha = fecha
+        reserva.hora_inicio = hora_inicio
+        reserva.hora_fin = hora_fin
+        try:
+            reserva.save()
+        except IntegrityError:
+            # Una cancelada conserva (cancha, fecha, hora_inicio): no ocupa la
+            # agenda pero el índice único no deja repetir el inicio
+            raise ConflictoReserva("Ya existe una reserva para esa cancha en ese horario.")
+
+    return reserva
+
+
+# ============================
+#   SERIES SEMANALES
+# ============================
+
+def fechas_serie(fecha, hasta, cada=1):
+    """Fechas de una serie semanal: `fecha` y cada `cada` semanas hasta `hasta` (inclusive)."""
+    paso = timedelta(weeks=cada)
+    fechas = []
+    while fecha <= hasta:
+        fechas.append(fecha)
+        fecha += paso
+    return fechas
+
+
+def reservar_serie(*, socio, cancha, fecha, hasta, hora_inicio, hora_fin, cada=1, estado='confirmada'):
+    """
+    Reserva la misma cancha y horario cada `cada` semanas desde `fecha` hasta `hasta`.
+
+    Todas las fechas se validan con una sola consulta y, si ninguna choca, la
+    serie completa se inserta con bulk_create en la misma transacción. Si hay
+    choques no se crea nada y se lanza ConflictoSerie con las fechas en conflicto
+    (también las que tienen una reserva cancelada con el mismo inicio, que el
+    unique_together no deja repetir).
+    """
+    fecha = a_fecha(fecha)
+    hasta = a_fecha(hasta)
+    hora_inicio = a_hora(hora_inicio)
+    hora_fin = a_hora(hora_fin)
+    cada = int(cada)
+    if hora_fin <= hora_inicio:
+        raise ValueError("La hora de término debe ser posterior a la de inicio.")
+    if cada < 1 or hasta < fecha or (hasta - fecha).days > MAX_DIAS_SERIE:
+        raise ValueError("Rango de la serie inválido.")
+
+    fechas = fechas_serie(fecha, hasta, cada)
+
+    with transaction.atomic():
+        bloquear_fila(Cancha, cancha.pk)
+
+        filas = Reserva.objects.filter(cancha_id=cancha.pk, fecha__in=fechas).filter(
+            Q(estado__in=ESTADOS_ACTIVOS) | Q(hora_inicio=hora_inicio)
+        ).order_by().values_list('fecha', 'hora_inicio', 'hora_fin', 'estado')
+
+        ocupados = defaultdict(list)
+        inicio_tomado = set()
+        for f, inicio, fin, estado_reserva in filas:
+            if estado_reserva in ESTADOS_ACTIVOS:
+                ocupados[f].append((inicio, fin))
+            else:
+                inicio_tomado.add(f)
+        conflictos = [
+            f for f in fechas
+            if f in inicio_tomado or AgendaCancha(ocupados[f]).solapa(hora_inicio, hora_fin)
+        ]
+        if conflictos:
+            raise ConflictoSerie(conflictos)
+
+        reservas = Reserva.objects.bulk_create([
+            Reserva(
+                socio=socio,
+                cancha=cancha,
+                fecha=f,
+                hora_inicio=hora_inicio,
+                hora_fin=hora_fin,
+                estado=estado,
+            )
+            for f in fechas
+        ])
+        transaction.on_commit(
+            lambda: reservas_creadas_en_lote.send(sender=Reserva, reservas=reservas)
+        )
+
+    return reservas
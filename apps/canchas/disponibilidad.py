@@ -0,0 +1,100 @@
+from collections import defaultdict
+from datetime import time, timedelta
+
+from django.utils import timezone
+
+from .conflictos import ESTADOS_ACTIVOS
+from .models import Cancha, Reserva
+
+
+# Horario de atención (el mismo que muestra el calendario)
+HORA_APERTURA = time(8, 0)
+HORA_CIERRE = time(22, 0)
+
+# Límites de la consulta
+MAX_DIAS = 31
+SLOT_MIN, SLOT_MAX = 15, 240
+
+
+def _minutos(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def _hora(minutos):
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def fusionar(ocupados):
+    """Une los intervalos (ordenados por inicio) que se solapan en bloques disjuntos."""
+    fusionados = []
+    for inicio, fin in ocupados:
+        if fusionados and inicio <= fusionados[-1][1]:
+            fusionados[-1][1] = max(fusionados[-1][1], fin)
+        else:
+            fusionados.append([inicio, fin])
+    return fusionados
+
+
+def slots_libres(ocupados, slot, desde=None):
+    """
+    Barrido lineal de la grilla de `slot` minutos (desde la apertura) contra los
+    intervalos ocupados de una cancha en un día, ya ordenados por inicio.
+    Devuelve los bloques [inicio, fin) libres; `desde` (minutos) descarta los
+    que ya comenzaron.
+    """
+    ocupados = fusionar(ocupados)
+    apertura, cierre = _minutos(HORA_APERTURA), _minutos(HORA_CIERRE)
+    libres = []
+    i = 0
+    inicio = apertura
+    while inicio + slot <= cierre:
+        fin = inicio + slot
+        # Avanza el barrido hasta el primer bloque ocupado que termina después del inicio
+        while i < len(ocupados) and ocupados[i][1] <= inicio:
+            i += 1
+        choca = i < len(ocupados) and ocupados[i][0] < fin
+        if not choca and (desde is None or inicio >= desde):
+            libres.append([_hora(inicio), _hora(fin)])
+        inicio = fin
+    return libres
+
+
+def disponibilidad(desde, hasta, slot, tipo=None):
+    """
+    Bloques libres por cancha activa y día entre `desde` y `hasta` (inclusive).
+    Usa una consulta para las canchas y una sola consulta por rango para las
+    reservas; el resto es un barrido en memoria.
+    """
+    canchas = Cancha.objects.filter(activo=True)
+    if tipo:
+        canchas = canchas.filter(tipo=tipo)
+    canchas = list(canchas.values('id', 'nombre', 'tipo'))
+
+    reservas = Reserva.objects.filter(
+        cancha_id__in=[c['id'] for c in canchas],
+        fecha__range=(desde, hasta),
+        estado__in=ESTADOS_ACTIVOS,
+    ).order_by('hora_inicio').values_list('cancha_id', 'fecha', 'hora_inicio', 'hora_fin')
+
+    ocupados = defaultdict(list)
+    for cancha_id, fecha, hora_inicio, hora_fin in reservas:
+        ocupados[(cancha_id, fecha)].append((_minutos(hora_inicio), _minutos(hora_fin)))
+
+    ahora = timezone.localtime()
+    dias = [desde + timedelta(days=n) for n in range((hasta - desde).days + 1)]
+
+    resultado = []
+    for cancha in canchas:
+        cancha['dias'] = [
+            {
+                'fecha': dia.isoformat(),
+                'libres': slots_libres(
+                    ocupados.get((cancha['id'], dia), []),
+                    slot,
+                    desde=_minutos(ahora) if dia == ahora.date() else None,
+                ),
+            }
+            for dia in dias
+        ]
+        resultado.append(cancha)
+    return resultado
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('canchas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['fecha', 'estado'], name='reserva_fecha_estado_idx'),
+        ),
+    ]
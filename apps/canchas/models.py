@@ -55,6 +55,10 @@ class Reserva(models.Model):
 
     class Meta:
         unique_together = ('cancha', 'fecha', 'hora_inicio')
+        indexes = [
+            # Feed del calendario: filtra por rango de fechas + estado
+            models.Index(fields=['fecha', 'estado'], name='reserva_fecha_estado_idx'),
+        ]
         ordering = ['-fecha', 'hora_inicio']
         verbose_name = "Reserva"
         verbose_name_plural = "Reservas"
@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+
+# bulk_create no emite post_save: quien cree reservas en lote envía esta señal
+# al confirmar la transacción, con `reservas` (lista de Reserva), para que los
+# feeds del calendario se enteren.
+reservas_creadas_en_lote = Signal()
@@ -1,3 +1,282 @@
+from datetime import date, time, timedelta
+from unittest.mock import patch
+
+from django.contrib.messages import get_messages
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.planes.models import Plan, SocioPlan
+from apps.socios.models import Socio
+from apps.users.models import Usuario
+from .conflictos import AgendaCancha, ConflictoReserva, ConflictoSerie, guardar_reserva, reservar_serie
+from .disponibilidad import MAX_DIAS, SLOT_MAX, SLOT_MIN, disponibilidad, fusionar, slots_libres
+from .models import Cancha, Reserva
+from .signals import reservas_creadas_en_lote
+
+
+FECHA = date(2030, 1, 7)
+
+
+class DatosReservaMixin:
+    """Cancha, socio con plan que permite reservar y un admin conectado."""
+
+    def setUp(self):
+        self.cancha = Cancha.objects.create(nombre='Cancha 1', tipo='futbol')
+        self.socio = Socio.objects.create(
+            rut='12345678-5', nombre='Ana', apellido_paterno='S', correo='ana@gym.cl',
+        )
+        plan = Plan.objects.create(nombre='Full', precio=30000, duracion=30, puede_reservar_canchas=True)
+        hoy = timezone.localdate()
+        SocioPlan.objects.create(socio=self.socio, plan=plan, fecInicio=hoy, fecFin=hoy + timedelta(days=30))
+
+        admin = Usuario.objects.create_user(
+            rut='11111111-1', password='x', nombre='Ana', apellido='Admin', correo='admin@gym.cl', rol='admin',
+        )
+        self.client.force_login(admin)
+
+    def reservar(self, inicio, fin, estado='confirmada', fecha=FECHA):
+        return Reserva.objects.create(
+            socio=self.socio, cancha=self.cancha, fecha=fecha,
+            hora_inicio=time(*inicio), hora_fin=time(*fin), estado=estado,
+        )
+
+
+class AgendaCanchaTests(TestCase):
+
+    def setUp(self):
+        # Desordenados a propósito; el de 9 a 12 tapa al de 10 a 11
+        self.agenda = AgendaCancha([
+            (time(14), time(15)),
+            (time(9), time(12)),
+            (time(10), time(11)),
+        ])
+
+    def test_bordes_no_solapan(self):
+        self.assertFalse(self.agenda.solapa(time(8), time(9)))    # termina justo al empezar
+        self.assertFalse(self.agenda.solapa(time(12), time(14)))  # entre dos intervalos
+        self.assertFalse(self.agenda.solapa(time(15), time(16)))  # empieza justo al terminar
+
+    def test_solapamientos(self):
+        self.assertTrue(self.agenda.solapa(time(8), time(9, 1)))
+        self.assertTrue(self.agenda.solapa(time(11, 59), time(13)))
+        self.assertTrue(self.agenda.solapa(time(11, 30), time(11, 45)))  # solo lo ve el fin acumulado
+        self.assertTrue(self.agenda.solapa(time(14), time(15)))
+        self.assertTrue(self.agenda.solapa(time(7), time(20)))
+
+    def test_vacia(self):
+        self.assertFalse(AgendaCancha().solapa(time(8), time(22)))
+
+
+class GuardarReservaTests(DatosReservaMixin, TestCase):
+
+    def test_cancelada_con_el_mismo_inicio_es_conflicto(self):
+        self.reservar((10, 0), (11, 0), estado='cancelada')
+        with self.assertRaises(ConflictoReserva):
+            guardar_reserva(
+                socio=self.socio, cancha=self.cancha, fecha=FECHA,
+                hora_inicio='10:00', hora_fin='10:30',
+            )
+        self.assertEqual(Reserva.objects.count(), 1)
+
+    def test_editar_sin_chocar_consigo_misma(self):
+        reserva = self.reservar((10, 0), (11, 0))
+        guardar_reserva(
+            socio=self.socio, cancha=self.cancha, fecha=FECHA,
+            hora_inicio='10:00', hora_fin='11:30', reserva=reserva,
+        )
+        reserva.refresh_from_db()
+        self.assertEqual(reserva.hora_fin, time(11, 30))
+
+
+class ReservaVistasTests(DatosReservaMixin, TestCase):
+
+    def datos(self, inicio, fin):
+        return {
+            'socio': self.socio.id, 'cancha': self.cancha.id,
+            'fecha': FECHA.isoformat(), 'hora_inicio': inicio, 'hora_fin': fin,
+        }
+
+    def test_crear_con_solapamiento_responde_400(self):
+        self.reservar((10, 0), (11, 0))
+        url = reverse('crear_reserva_ajax')
+
+        respuesta = self.client.post(url, self.datos('10:30', '11:30'))
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json()['status'], 'error')
+
+        respuesta = self.client.post(url, self.datos('11:00', '12:00'))  # contigua
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(Reserva.objects.count(), 2)
+
+    def test_inicio_de_una_cancelada_responde_400(self):
+        self.reservar((10, 0), (11, 0), estado='cancelada')
+        otra = self.reservar((12, 0), (13, 0))
+
+        respuesta = self.client.post(reverse('crear_reserva_ajax'), self.datos('10:00', '11:00'))
+        self.assertEqual(respuesta.status_code, 400)
+
+        respuesta = self.client.post(reverse('editar_reserva_ajax', args=[otra.id]), self.datos('10:00', '10:45'))
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_formulario_con_solapamiento_redirige_con_error(self):
+        self.reservar((10, 0), (11, 0), estado='cancelada')
+        respuesta = self.client.post(reverse('reserva_cancha_crear'), self.datos('10:00', '11:00'))
+        self.assertRedirects(respuesta, reverse('reservas_cancha_list'), fetch_redirect_response=False)
+        mensajes = [str(m) for m in get_messages(respuesta.wsgi_request)]
+        self.assertIn('Ya existe una reserva', mensajes[0])
+        self.assertEqual(Reserva.objects.count(), 1)
+
+
+class DisponibilidadTests(DatosReservaMixin, TestCase):
+
+    def test_fusionar_solapados_y_contiguos(self):
+        self.assertEqual(
+            fusionar([(480, 540), (500, 600), (600, 660), (700, 720), (705, 710)]),
+            [[480, 660], [700, 720]],
+        )
+        self.assertEqual(fusionar([]), [])
+
+    def test_slots_alineados_a_la_grilla(self):
+        # Ocupado de 9:30 a 10:15: bloquea los slots de 9 y de 10, no el de 8 ni el de 11
+        libres = slots_libres([(570, 615)], 60)
+        self.assertEqual(libres[:2], [['08:00', '09:00'], ['11:00', '12:00']])
+        self.assertEqual(libres[-1], ['21:00', '22:00'])
+        self.assertEqual(len(libres), 12)
+
+        # Los slots siguen la grilla desde la apertura aunque sobre un resto al cierre
+        libres = slots_libres([], 90)
+        self.assertEqual(libres[1], ['09:30', '11:00'])
+        self.assertEqual(libres[-1], ['20:00', '21:30'])
+
+        # `desde` descarta los que ya comenzaron
+        self.assertEqual(slots_libres([], 60, desde=20 * 60 + 1), [['21:00', '22:00']])
+
+    def test_disponibilidad_ignora_canceladas_e_inactivas(self):
+        Cancha.objects.create(nombre='Cerrada', tipo='futbol', activo=False)
+        self.reservar((8, 0), (21, 0))
+        self.reservar((21, 0), (22, 0), estado='cancelada')
+
+        canchas = disponibilidad(FECHA, FECHA + timedelta(days=1), 60)
+        self.assertEqual([c['nombre'] for c in canchas], ['Cancha 1'])
+        primer_dia, segundo_dia = canchas[0]['dias']
+        self.assertEqual(primer_dia['libres'], [['21:00', '22:00']])
+        self.assertEqual(len(segundo_dia['libres']), 14)
+
+    def consultar(self, **params):
+        return self.client.get(reverse('disponibilidad_canchas_ajax'), params)
+
+    def test_parametros_invalidos_responden_400(self):
+        inicio = timezone.localdate() + timedelta(days=1)
+        invalidos = [
+            {'desde': 'mañana'},
+            {'desde': inicio.isoformat(), 'slot': 'x'},
+            {'desde': inicio.isoformat(), 'tipo': 'polo'},
+            {'desde': inicio.isoformat(), 'hasta': (inicio - timedelta(days=1)).isoformat()},
+            {'desde': inicio.isoformat(), 'hasta': (inicio + timedelta(days=MAX_DIAS)).isoformat()},
+            {'desde': inicio.isoformat(), 'slot': SLOT_MIN - 1},
+            {'desde': inicio.isoformat(), 'slot': SLOT_MAX + 1},
+        ]
+        for params in invalidos:
+            with self.subTest(params=params):
+                self.assertEqual(self.consultar(**params).status_code, 400)
+
+    def test_limites_aceptados(self):
+        inicio = timezone.localdate() + timedelta(days=1)
+        respuesta = self.consultar(
+            desde=inicio.isoformat(), hasta=(inicio + timedelta(days=MAX_DIAS - 1)).isoformat(), slot=SLOT_MIN,
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()['canchas'][0]['dias']), MAX_DIAS)
+        self.assertEqual(self.consultar(desde=inicio.isoformat(), slot=SLOT_MAX).status_code, 200)
+
+    def test_consultas_fijas(self):
+        inicio = timezone.localdate() + timedelta(days=1)
+        for i in range(3):
+            cancha = Cancha.objects.create(nombre=f'Extra {i}', tipo='futbol')
+            for dia in range(5):
+                Reserva.objects.create(
+                    socio=self.socio, cancha=cancha, fecha=inicio + timedelta(days=dia),
+                    hora_inicio=time(10), hora_fin=time(11), estado='confirmada',
+                )
+        params = {'desde': inicio.isoformat(), 'hasta': (inicio + timedelta(days=6)).isoformat()}
+
+        # Sesión + usuario, canchas y reservas: no crece con canchas ni días
+        with self.assertNumQueries(4):
+            respuesta = self.consultar(**params)
+        self.assertEqual(len(respuesta.json()['canchas']), 4)
+
+
+class ReservarSerieTests(DatosReservaMixin, TestCase):
+
+    def serie(self, **kwargs):
+        datos = dict(
+            socio=self.socio, cancha=self.cancha, fecha=FECHA, hasta=FECHA + timedelta(weeks=4),
+            hora_inicio='18:00', hora_fin='19:00',
+        )
+        datos.update(kwargs)
+        return reservar_serie(**datos)
+
+    def test_fechas_en_conflicto_y_todo_o_nada(self):
+        segunda, cuarta = FECHA + timedelta(weeks=1), FECHA + timedelta(weeks=3)
+        self.reservar((18, 30), (19, 30), fecha=segunda)
+        self.reservar((17, 0), (18, 1), fecha=cuarta)
+        self.reservar((19, 0), (20, 0), fecha=FECHA)  # contigua: no choca
+
+        with self.assertRaises(ConflictoSerie) as ctx:
+            self.serie()
+        self.assertEqual(ctx.exception.fechas, [segunda, cuarta])
+        self.assertEqual(Reserva.objects.count(), 3)  # no se creó ninguna
+
+    def test_cancelada_con_el_mismo_inicio_es_conflicto(self):
+        tercera = FECHA + timedelta(weeks=2)
+        self.reservar((18, 0), (19, 0), estado='cancelada', fecha=tercera)
+        self.reservar((17, 0), (18, 0), estado='cancelada', fecha=FECHA)  # otro inicio: no molesta
+
+        # Bloqueo de la cancha y una sola consulta para todas las fechas (+ savepoint)
+        with self.assertNumQueries(5):
+            with self.assertRaises(ConflictoSerie) as ctx:
+                self.serie()
+        self.assertEqual(ctx.exception.fechas, [tercera])
+
+    def test_un_solo_bulk_create(self):
+        with patch.object(Reserva.objects, 'bulk_create', wraps=Reserva.objects.bulk_create) as bulk:
+            reservas = self.serie(cada=2)
+        bulk.assert_called_once()
+        self.assertEqual([r.fecha for r in reservas], [FECHA + timedelta(weeks=n) for n in (0, 2, 4)])
+        self.assertEqual(Reserva.objects.filter(hora_inicio=time(18)).count(), 3)
+
+    def test_senal_al_confirmar(self):
+        recibidas = []
+        receptor = lambda reservas, **kwargs: recibidas.extend(reservas)
+        reservas_creadas_en_lote.connect(receptor)
+        self.addCleanup(reservas_creadas_en_lote.disconnect, receptor)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            reservas = self.serie()
+        self.assertEqual(recibidas, [])  # nada antes del commit
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(recibidas, reservas)
+
+        # Una serie rechazada no avisa
+        recibidas.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ConflictoSerie):
+                self.serie()
+        self.assertEqual(recibidas, [])
 
-# Create your tests here.
+    def test_vista_lista_las_fechas_en_conflicto(self):
+        self.reservar((18, 0), (19, 0), fecha=FECHA + timedelta(weeks=2))
+        self.reservar((18, 0), (18, 30), estado='cancelada', fecha=FECHA + timedelta(weeks=3))
+        respuesta = self.client.post(reverse('crear_serie_reservas_ajax'), {
+            'socio': self.socio.id, 'cancha': self.cancha.id,
+            'fecha': FECHA.isoformat(), 'hasta': (FECHA + timedelta(weeks=4)).isoformat(),
+            'hora_inicio': '18:00', 'hora_fin': '19:00',
+        })
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(
+            [c['fecha'] for c in respuesta.json()['conflictos']],
+            [(FECHA + timedelta(weeks=2)).isoformat(), (FECHA + timedelta(weeks=3)).isoformat()],
+        )
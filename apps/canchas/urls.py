@@ -23,7 +23,9 @@ urlpatterns = [
     # ============================================================
 
     path('api/reservas/crear/', views.crear_reserva_ajax, name='crear_reserva_ajax'),
+    path('api/reservas/serie/', views.crear_serie_reservas_ajax, name='crear_serie_reservas_ajax'),
     path('api/reservas/editar/<int:reserva_id>/', views.editar_reserva_ajax, name='editar_reserva_ajax'),
     path('api/reservas/eliminar/<int:reserva_id>/', views.eliminar_reserva_ajax, name='eliminar_reserva_ajax'),
+    path('api/disponibilidad/', views.disponibilidad_canchas_ajax, name='disponibilidad_canchas_ajax'),
 
 ]
@@ -2,9 +2,14 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponseForbidden
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.views.decorators.http import require_POST
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
 
+from apps.canchas.conflictos import ConflictoReserva, ConflictoSerie, guardar_reserva, reservar_serie
+from apps.canchas.disponibilidad import MAX_DIAS, SLOT_MAX, SLOT_MIN, disponibilidad
 from apps.canchas.models import Cancha, Reserva
+from apps.core.utils import a_fecha
+from apps.socios.middleware import socio_actual
 from apps.socios.models import Socio
 from apps.planes.models import SocioPlan
 
@@ -88,7 +93,7 @@ def reservas_cancha_list(request):
         reservas = Reserva.objects.select_related('cancha', 'socio').all()
     else:  # socio
         reservas = Reserva.objects.filter(
-            socio__rut=request.user.rut
+            socio__usuario=request.user
         ).select_related('cancha', 'socio')
 
     return render(request, 'canchas/reservas_cancha_list.html', {'reservas': reservas})
@@ -102,14 +107,14 @@ def reserva_cancha_form(request, reserva_id=None):
     reserva = get_object_or_404(Reserva, id=reserva_id) if reserva_id else None
 
     # 🔒 Socio no puede abrir/editar reservas que no son suyas
-    if reserva and rol == 'socio' and reserva.socio.rut != request.user.rut:
+    if reserva and rol == 'socio' and reserva.socio_id != socio_actual(request).id:
         return HttpResponseForbidden("No puedes editar reservas de otro socio.")
 
     # ================================
     # SOCIOS LISTADOS SEGÚN EL ROL
     # ================================
     if rol == 'socio':
-        socios = Socio.objects.filter(rut=request.user.rut)
+        socios = Socio.objects.filter(usuario=request.user)
     else:
         socios = Socio.objects.filter(estado=True)
 
@@ -118,7 +123,7 @@ def reserva_cancha_form(request, reserva_id=None):
     if request.method == 'POST':
         # SOCIO NO ELIGE, FORZAR SU PROPIO ID
         if rol == 'socio':
-            socio = get_object_or_404(Socio, rut=request.user.rut)
+            socio = socio_actual(request)
         else:
             socio = get_object_or_404(Socio, id=request.POST.get('socio'))
 
@@ -133,39 +138,25 @@ def reserva_cancha_form(request, reserva_id=None):
             messages.error(request, '❌ El socio no puede reservar canchas con su plan.')
             return redirect('reservas_cancha_list')
 
-        # VALIDAR SOLAPAMIENTO
-        solapa = Reserva.objects.filter(
-            cancha=cancha,
-            fecha=fecha,
-            estado__in=['pendiente', 'confirmada']
-        ).exclude(id=reserva.id if reserva else None).filter(
-            hora_inicio__lt=hora_fin,
-            hora_fin__gt=hora_inicio
-        ).exists()
-        if solapa:
-            messages.error(request, '❌ Ya existe una reserva para esa cancha en ese horario.')
-            return redirect('reservas_cancha_list')
-
-        # GUARDADO
-        if reserva:
-            reserva.socio = socio
-            reserva.cancha = cancha
-            reserva.fecha = fecha
-            reserva.hora_inicio = hora_inicio
-            reserva.hora_fin = hora_fin
-            reserva.estado = 'confirmada'
-            reserva.save()
-            messages.success(request, '✅ Reserva actualizada.')
-        else:
-            Reserva.objects.create(
+        # VALIDAR SOLAPAMIENTO + GUARDADO (en una transacción)
+        try:
+            guardar_reserva(
                 socio=socio,
                 cancha=cancha,
                 fecha=fecha,
                 hora_inicio=hora_inicio,
                 hora_fin=hora_fin,
-                estado='confirmada'
+                reserva=reserva,
+                estado='confirmada',
             )
-            messages.success(request, '✅ Reserva creada.')
+        except ConflictoReserva:
+            messages.error(request, '❌ Ya existe una reserva para esa cancha en ese horario.')
+            return redirect('reservas_cancha_list')
+        except ValueError:
+            messages.error(request, '❌ Fecha u horario inválido.')
+            return redirect('reservas_cancha_list')
+
+        messages.success(request, '✅ Reserva actualizada.' if reserva else '✅ Reserva creada.')
 
         return redirect('reservas_cancha_list')
 
@@ -185,7 +176,7 @@ def reserva_cancha_cancelar(request, reserva_id):
 
     # 🔒 Socio solo puede cancelar sus propias reservas
     if rol == 'socio':
-        socio_usuario = get_object_or_404(Socio, rut=request.user.rut)
+        socio_usuario = socio_actual(request)
         if reserva.socio_id != socio_usuario.id:
             return HttpResponseForbidden("No puedes cancelar reservas de otro socio.")
 
@@ -206,7 +197,7 @@ def crear_reserva_ajax(request):
     rol = getattr(request.user, 'rol', None)
 
     if rol == 'socio':
-        socio = get_object_or_404(Socio, rut=request.user.rut)
+        socio = socio_actual(request)
     else:
         socio = get_object_or_404(Socio, id=request.POST.get('socio'))
 
@@ -219,29 +210,66 @@ def crear_reserva_ajax(request):
     if not socio_plan or not socio_plan.plan.puede_reservar_canchas:
         return JsonResponse({'status': 'error', 'message': 'El socio no puede reservar canchas con su plan.'}, status=400)
 
-    solapa = Reserva.objects.filter(
-        cancha=cancha,
-        fecha=fecha,
-        estado__in=['pendiente', 'confirmada']
-    ).filter(
-        hora_inicio__lt=hora_fin,
-        hora_fin__gt=hora_inicio
-    ).exists()
-
-    if solapa:
+    try:
+        guardar_reserva(
+            socio=socio,
+            cancha=cancha,
+            fecha=fecha,
+            hora_inicio=hora_inicio,
+            hora_fin=hora_fin,
+            estado='confirmada',
+        )
+    except ConflictoReserva:
         return JsonResponse({'status': 'error', 'message': 'Ya existe una reserva en ese horario.'}, status=400)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Fecha u horario inválido.'}, status=400)
 
-    Reserva.objects.create(
-        socio=socio,
-        cancha=cancha,
-        fecha=fecha,
-        hora_inicio=hora_inicio,
-        hora_fin=hora_fin,
-        estado='confirmada'
-    )
     return JsonResponse({'status': 'success', 'message': 'Reserva creada correctamente.'})
 
 
+@login_required
+@user_passes_test(es_admin_superadmin_profesor_socio)
+@require_POST
+def crear_serie_reservas_ajax(request):
+    """Reserva semanal: misma cancha y horario cada N semanas hasta una fecha."""
+    rol = getattr(request.user, 'rol', None)
+
+    if rol == 'socio':
+        socio = socio_actual(request)
+    else:
+        socio = get_object_or_404(Socio, id=request.POST.get('socio'))
+
+    cancha = get_object_or_404(Cancha, id=request.POST.get('cancha'))
+
+    socio_plan = SocioPlan.objects.filter(socio=socio, estado=True).order_by('-fecFin').first()
+    if not socio_plan or not socio_plan.plan.puede_reservar_canchas:
+        return JsonResponse({'status': 'error', 'message': 'El socio no puede reservar canchas con su plan.'}, status=400)
+
+    try:
+        reservas = reservar_serie(
+            socio=socio,
+            cancha=cancha,
+            fecha=request.POST.get('fecha'),
+            hasta=request.POST.get('hasta'),
+            hora_inicio=request.POST.get('hora_inicio'),
+            hora_fin=request.POST.get('hora_fin'),
+            cada=request.POST.get('cada') or 1,
+        )
+    except ConflictoSerie as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e),
+            'conflictos': [
+                {'fecha': f.isoformat(), 'message': 'Ya existe una reserva en ese horario.'}
+                for f in e.fechas
+            ],
+        }, status=400)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Fecha, horario o repetición inválidos.'}, status=400)
+
+    return JsonResponse({'status': 'success', 'message': f'Serie creada: {len(reservas)} reservas.', 'reservas': len(reservas)})
+
+
 @login_required
 @user_passes_test(es_admin_superadmin_profesor_socio)
 @require_POST
@@ -252,12 +280,12 @@ def editar_reserva_ajax(request, reserva_id):
 
     # 🔒 Socio solo puede editar sus propias reservas
     if rol == 'socio':
-        socio_usuario = get_object_or_404(Socio, rut=request.user.rut)
+        socio_usuario = socio_actual(request)
         if reserva.socio_id != socio_usuario.id:
             return JsonResponse({'status': 'error', 'message': 'No puedes editar reservas de otro socio.'}, status=403)
 
     if rol == 'socio':
-        socio = get_object_or_404(Socio, rut=request.user.rut)
+        socio = socio_actual(request)
     else:
         socio = get_object_or_404(Socio, id=request.POST.get('socio'))
 
@@ -266,24 +294,19 @@ def editar_reserva_ajax(request, reserva_id):
     hora_inicio = request.POST.get('hora_inicio')
     hora_fin = request.POST.get('hora_fin')
 
-    solapa = Reserva.objects.filter(
-        cancha=cancha,
-        fecha=fecha,
-        estado__in=['pendiente', 'confirmada']
-    ).exclude(id=reserva.id).filter(
-        hora_inicio__lt=hora_fin,
-        hora_fin__gt=hora_inicio
-    ).exists()
-
-    if solapa:
+    try:
+        guardar_reserva(
+            socio=socio,
+            cancha=cancha,
+            fecha=fecha,
+            hora_inicio=hora_inicio,
+            hora_fin=hora_fin,
+            reserva=reserva,
+        )
+    except ConflictoReserva:
         return JsonResponse({'status': 'error', 'message': 'Ya existe una reserva para esa cancha en ese horario.'}, status=400)
-
-    reserva.socio = socio
-    reserva.cancha = cancha
-    reserva.fecha = fecha
-    reserva.hora_inicio = hora_inicio
-    reserva.hora_fin = hora_fin
-    reserva.save()
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Fecha u horario inválido.'}, status=400)
 
     return JsonResponse({'status': 'success', 'message': 'Reserva actualizada correctamente.'})
 
@@ -298,9 +321,40 @@ def eliminar_reserva_ajax(request, reserva_id):
 
     # 🔒 Socio solo puede eliminar sus propias reservas
     if rol == 'socio':
-        socio_usuario = get_object_or_404(Socio, rut=request.user.rut)
+        socio_usuario = socio_actual(request)
         if reserva.socio_id != socio_usuario.id:
             return JsonResponse({'status': 'error', 'message': 'No puedes eliminar reservas de otro socio.'}, status=403)
 
     reserva.delete()
     return JsonResponse({'status': 'success', 'message': 'Reserva eliminada correctamente.'})
+
+
+@login_required
+@user_passes_test(es_admin_superadmin_profesor_socio)
+@require_GET
+def disponibilidad_canchas_ajax(request):
+    """Bloques libres por cancha activa en un rango de fechas (?desde&hasta&slot&tipo)."""
+    try:
+        desde = a_fecha(request.GET.get('desde'))
+        hasta = a_fecha(request.GET.get('hasta') or request.GET.get('desde'))
+        slot = int(request.GET.get('slot') or 60)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Parámetros inválidos.'}, status=400)
+
+    tipo = request.GET.get('tipo') or None
+    if tipo and tipo not in dict(Cancha.TIPO):
+        return JsonResponse({'status': 'error', 'message': 'Tipo de cancha inválido.'}, status=400)
+
+    desde = max(desde, timezone.localdate())
+    if hasta < desde or (hasta - desde).days >= MAX_DIAS:
+        return JsonResponse({'status': 'error', 'message': f'El rango debe ser de 1 a {MAX_DIAS} días desde hoy.'}, status=400)
+    if not SLOT_MIN <= slot <= SLOT_MAX:
+        return JsonResponse({'status': 'error', 'message': f'El bloque debe durar entre {SLOT_MIN} y {SLOT_MAX} minutos.'}, status=400)
+
+    return JsonResponse({
+        'status': 'success',
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        'slot': slot,
+        'canchas': disponibilidad(desde, hasta, slot, tipo=tipo),
+    })
@@ -0,0 +1,111 @@
+import base64
+import datetime
+import json
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+# ============================
+#   PAGINACIÓN KEYSET
+# ============================
+# En vez de OFFSET (que recorre todas las filas saltadas) la página se pide
+# "después de" / "antes de" la última fila vista, según un orden único de
+# columnas respaldado por un índice. Cada página cuesta lo mismo sin importar
+# cuántas filas queden atrás. Un campo con '-' adelante ordena descendente.
+
+Pagina = namedtuple('Pagina', ['items', 'siguiente', 'anterior'])
+
+
+class _Codificador(DjangoJSONEncoder):
+    # DjangoJSONEncoder recorta a milisegundos: el cursor necesita el valor exacto
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def codificar_cursor(valores):
+    """Lista de valores de la clave de orden → texto apto para URL."""
+    crudo = json.dumps(valores, cls=_Codificador, separators=(',', ':'))
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(texto, largo):
+    """Inverso de codificar_cursor. None si falta o no es válido."""
+    if not texto:
+        return None
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(texto + '=' * (-len(texto) % 4)))
+    except (ValueError, TypeError):
+        return None
+    return valores if isinstance(valores, list) and len(valores) == largo else None
+
+
+def _nombre(campo):
+    return campo.lstrip('-')
+
+
+def _invertir(campo):
+    return _nombre(campo) if campo.startswith('-') else f'-{campo}'
+
+
+def _mas_alla(campos, valores, atras=False):
+    """
+    Filas que van después de `valores` en el orden de `campos` (antes si
+    `atras`). (c1, c2, c3) > (v1, v2, v3) se expande a OR de igualdades, con un
+    c1 >= v1 redundante al frente para que la BD haga un rango sobre el índice.
+    """
+    def op(campo):
+        return 'lt' if campo.startswith('-') != atras else 'gt'
+
+    nombres = [_nombre(c) for c in campos]
+    expandido = Q()
+    for i, campo in enumerate(campos):
+        expandido |= Q(**dict(zip(nombres[:i], valores[:i])), **{f'{nombres[i]}__{op(campo)}': valores[i]})
+    return Q(**{f'{nombres[0]}__{op(campos[0])}e': valores[0]}) & expandido
+
+
+def _clave(fila, campos):
+    nombres = [_nombre(c) for c in campos]
+    if isinstance(fila, dict):  # querysets con .values()
+        return [fila[c] for c in nombres]
+    return [getattr(fila, c) for c in nombres]
+
+
+def pagina_keyset(queryset, campos, despues=None, antes=None, tamano=25):
+    """
+    Una página de `queryset` ordenado por `campos` (el último debe ser único,
+    p. ej. la PK; '-campo' = descendente). `despues` / `antes` son cursores de
+    codificar_cursor. Devuelve Pagina(items, siguiente, anterior) con los
+    cursores para los enlaces (None si no hay más en esa dirección). Un cursor
+    con valores que no calzan con los campos (alterado o de otro orden) lleva
+    a la primera página.
+    """
+    despues = decodificar_cursor(despues, len(campos))
+    antes = None if despues else decodificar_cursor(antes, len(campos))
+
+    if despues or antes:
+        try:
+            queryset = queryset.filter(_mas_alla(campos, despues or antes, atras=bool(antes)))
+        except (ValidationError, ValueError, TypeError):
+            despues = antes = None
+    queryset = queryset.order_by(*(map(_invertir, campos) if antes else campos))
+
+    filas = list(queryset[:tamano + 1])
+    hay_mas = len(filas) > tamano
+    filas = filas[:tamano]
+    if antes:
+        filas.reverse()
+
+    if not filas:
+        return Pagina([], None, None)
+
+    # Volviendo hacia atrás siempre hay página siguiente (de la que se vino)
+    hay_siguiente = True if antes else hay_mas
+    hay_anterior = hay_mas if antes else bool(despues)
+    siguiente = codificar_cursor(_clave(filas[-1], campos)) if hay_siguiente else None
+    anterior = codificar_cursor(_clave(filas[0], campos)) if hay_anterior else None
+    return Pagina(filas, siguiente, anterior)
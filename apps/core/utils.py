@@ -1,3 +1,8 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, time
+
+
 def formatear_rut(rut):
     """Formatea un RUT chileno sin puntos ni guion -> con puntos y guion."""
     try:
@@ -9,6 +14,23 @@ def formatear_rut(rut):
         return rut  # si viene vacío o mal formado, se deja igual
 
 
+def normalizar_rut(rut):
+    """RUT como lo guarda Usuario.objects.create_user: sin puntos ni guion."""
+    return str(rut).strip().replace('.', '').replace('-', '')
+
+
+def variantes_rut(rut):
+    """
+    Formas en que un mismo RUT puede estar guardado (create_user lo deja sin
+    guion, los formularios de socios tal como se escribió), para buscarlo con
+    rut__in.
+    """
+    sin_guion = normalizar_rut(rut)
+    con_guion = f"{sin_guion[:-1]}-{sin_guion[-1:]}"
+    formas = {str(rut).strip(), sin_guion, con_guion, formatear_rut(sin_guion)}
+    return formas | {f.upper() for f in formas} | {f.lower() for f in formas}
+
+
 def formatear_numero(valor):
     """Convierte número a formato chileno: 1.234.567"""
     try:
@@ -16,3 +38,60 @@ def formatear_numero(valor):
     except (TypeError, ValueError):
         return "0"
 
+
+def a_fecha(valor):
+    """Acepta date o 'YYYY-MM-DD' (lo que llega por POST)."""
+    return valor if isinstance(valor, date) else date.fromisoformat(valor or '')
+
+
+def a_hora(valor):
+    """Acepta time o 'HH:MM[:SS]' (lo que llega por POST)."""
+    return valor if isinstance(valor, time) else time.fromisoformat(valor or '')
+
+
+# ============================
+#   BLOQUEO DE FILAS
+# ============================
+
+def bloquear_fila(modelo, pk):
+    """
+    Bloquea la fila `pk` de `modelo` hasta el fin de la transacción en curso,
+    así las operaciones que la toman se validan una tras otra. En SQLite
+    select_for_update no aplica; ahí serializa el modo IMMEDIATE configurado
+    en settings.DATABASES.
+    """
+    list(modelo.objects.select_for_update().filter(pk=pk).values_list('pk'))
+
+
+# ============================
+#   HASH DE CONTRASEÑAS EN PARALELO
+# ============================
+# make_password (PBKDF2) es CPU pura: en cargas masivas se reparte en
+# procesos. Vive aquí porque este módulo no importa modelos, así los
+# procesos hijos lo cargan sin levantar todas las apps.
+
+def _iniciar_django():
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gymofthronesback.settings')
+    django.setup()
+
+
+def _hashear(claves):
+    from django.contrib.auth.hashers import make_password
+    return [make_password(clave) for clave in claves]
+
+
+def hashear_claves(claves, procesos=None, minimo_paralelo=200):
+    """
+    make_password de cada clave, en el mismo orden. Con menos de
+    `minimo_paralelo` claves no vale la pena levantar procesos.
+    """
+    claves = list(claves)
+    if len(claves) < minimo_paralelo or procesos == 1:
+        return _hashear(claves)
+
+    procesos = procesos or os.cpu_count() or 1
+    tramo = -(-len(claves) // (procesos * 4))  # unos 4 tramos por proceso
+    tramos = [claves[i:i + tramo] for i in range(0, len(claves), tramo)]
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_django) as pool:
+        return [h for hashes in pool.map(_hashear, tramos) for h in hashes]
@@ -100,7 +100,7 @@ def eliminar_pago(request, pago_id):
 @user_passes_test(es_socio)
 def pagos_socio(request):
     """Muestra solo los pagos del socio autenticado."""
-    pagos = Pago.objects.filter(socio__rut=request.user.rut).order_by('-fecha_pago')
+    pagos = Pago.objects.filter(socio__usuario=request.user).order_by('-fecha_pago')
 
     # Opcional: cálculo total de lo pagado
     total_pagado = 0
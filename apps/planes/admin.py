@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Plan, PlanBeneficio, SocioPlan
+from .models import Plan, PlanBeneficio, SocioPlan, VencimientoPlan
 
 # 🔹 Beneficios en línea dentro del plan
 class PlanBeneficioInline(admin.TabularInline):
@@ -30,3 +30,11 @@ class SocioPlanAdmin(admin.ModelAdmin):
     search_fields = ('socio__nombre', 'plan__nombre')
     ordering = ('-fecInicio',)
 
+
+
+@admin.register(VencimientoPlan)
+class VencimientoPlanAdmin(admin.ModelAdmin):
+    list_display = ('socio', 'plan', 'fecFin', 'socio_desactivado', 'fec_registro')
+    list_filter = ('socio_desactivado', 'plan')
+    search_fields = ('socio__nombre', 'socio__rut')
+    ordering = ('-id',)
@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.planes.vencimientos import LOTE, vencer_planes
+
+
+class Command(BaseCommand):
+    help = (
+        "Marca como inactivos los planes vencidos y desactiva a los socios que "
+        "quedaron sin plan vigente. Pensado para correr una vez al día (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=LOTE, help="Planes por transacción.")
+        parser.add_argument('--fecha', help="Día de referencia AAAA-MM-DD (por defecto, hoy).")
+
+    def handle(self, *args, **options):
+        hoy = None
+        if options['fecha']:
+            try:
+                hoy = date.fromisoformat(options['fecha'])
+            except ValueError:
+                raise CommandError("Fecha inválida, use AAAA-MM-DD.")
+
+        planes, socios = vencer_planes(hoy=hoy, lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{planes} plan(es) vencidos, {socios} socio(s) quedaron inactivos."
+        ))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planes', '0002_alter_plan_duracion_alter_socioplan_monto_pagado'),
+        ('socios', '0004_directorio_indices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VencimientoPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecFin', models.DateField()),
+                ('socio_desactivado', models.BooleanField(default=False, help_text='El socio quedó sin plan vigente')),
+                ('fec_registro', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Vencimiento de plan',
+                'verbose_name_plural': 'Vencimientos de planes',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='socioplan',
+            index=models.Index(condition=models.Q(('estado', True)), fields=['fecFin', 'id'], name='socioplan_por_vencer_idx'),
+        ),
+        migrations.AddField(
+            model_name='vencimientoplan',
+            name='plan',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='planes.plan'),
+        ),
+        migrations.AddField(
+            model_name='vencimientoplan',
+            name='socio',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vencimientos_plan', to='socios.socio'),
+        ),
+        migrations.AddField(
+            model_name='vencimientoplan',
+            name='socio_plan',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vencimientos', to='planes.socioplan'),
+        ),
+    ]
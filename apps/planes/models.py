@@ -36,5 +36,35 @@ class SocioPlan(models.Model):
     monto_pagado = models.IntegerField("Monto Pagado", default=0)
     estado = models.BooleanField(choices=ESTADO_CHOICES, default=True)
 
+    class Meta:
+        indexes = [
+            # Barrido de vencimientos (vencimientos.py): solo los planes aún activos
+            models.Index(fields=['fecFin', 'id'], condition=models.Q(estado=True), name='socioplan_por_vencer_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.socio.nombre} - {self.plan.nombre} ({'Activo' if self.estado else 'Inactivo'})"
+
+
+# ============================
+#   REGISTRO DE VENCIMIENTOS
+# ============================
+# Una fila por plan que el barrido pasó a inactivo. El id es creciente: quien
+# mantenga un caché derivado del estado de los planes guarda el último id que
+# procesó y lee solo lo nuevo (ver vencimientos.vencimientos_desde).
+
+class VencimientoPlan(models.Model):
+    socio_plan = models.ForeignKey(SocioPlan, on_delete=models.CASCADE, related_name='vencimientos')
+    socio = models.ForeignKey('socios.Socio', on_delete=models.CASCADE, related_name='vencimientos_plan')
+    plan = models.ForeignKey(Plan, on_delete=models.CASCADE)
+    fecFin = models.DateField()
+    socio_desactivado = models.BooleanField(default=False, help_text="El socio quedó sin plan vigente")
+    fec_registro = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Vencimiento de plan"
+        verbose_name_plural = "Vencimientos de planes"
+
     def __str__(self):
-        return f"{self.socio.nombre} - {self.plan.nombre} ({'Activo' if self.estado else 'Inactivo'})"
\ No newline at end of file
+        return f"{self.socio_plan} venció el {self.fecFin:%d/%m/%Y}"
@@ -1,3 +1,59 @@
+from datetime import timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.socios.models import Socio
+from .models import Plan, SocioPlan, VencimientoPlan
+from .vencimientos import planes_vencidos, vencer_planes, vencimientos_desde
+
+
+class VencimientoPlanesTests(TestCase):
+
+    def setUp(self):
+        self.hoy = timezone.localdate()
+        self.mensual = Plan.objects.create(nombre='Mensual', precio=20000, duracion=30)
+        self.vencido, self.renovado, self.al_dia = [
+            Socio.objects.create(rut=f'1000000{i}', nombre=f'Socio {i}', apellido_paterno='S', correo=f's{i}@gym.cl')
+            for i in range(3)
+        ]
+        ayer, manana = self.hoy - timedelta(days=1), self.hoy + timedelta(days=1)
+        self.plan_vencido = self.asignar(self.vencido, ayer)
+        self.plan_anterior = self.asignar(self.renovado, ayer)
+        self.asignar(self.renovado, manana)
+        self.asignar(self.al_dia, self.hoy)  # el último día todavía vale
+
+    def asignar(self, socio, fin):
+        return SocioPlan.objects.create(socio=socio, plan=self.mensual, fecInicio=fin - timedelta(days=30), fecFin=fin)
+
+    def test_vence_y_desactiva_sin_plan_vigente(self):
+        recibidos = []
+        receptor = lambda vencimientos, **kwargs: recibidos.extend(vencimientos)
+        planes_vencidos.connect(receptor)
+        self.addCleanup(planes_vencidos.disconnect, receptor)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(vencer_planes(hoy=self.hoy, lote=1), (2, 1))
+
+        self.assertEqual(
+            set(SocioPlan.objects.filter(estado=False).values_list('id', flat=True)),
+            {self.plan_vencido.id, self.plan_anterior.id},
+        )
+        self.assertEqual(
+            dict(Socio.objects.values_list('id', 'estado')),
+            {self.vencido.id: False, self.renovado.id: True, self.al_dia.id: True},
+        )
+        self.assertEqual(
+            [(v.socio_plan_id, v.socio_desactivado) for v in recibidos],
+            [(self.plan_vencido.id, True), (self.plan_anterior.id, False)],
+        )
+
+        # Una segunda corrida no tiene nada que hacer
+        self.assertEqual(vencer_planes(hoy=self.hoy), (0, 0))
+        self.assertEqual(VencimientoPlan.objects.count(), 2)
 
-# Create your tests here.
+    def test_lectura_incremental(self):
+        vencer_planes(hoy=self.hoy)
+        primero, segundo = vencimientos_desde()
+        self.assertEqual(vencimientos_desde(primero.id), [segundo])
+        self.assertEqual(vencimientos_desde(segundo.id), [])
@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.dispatch import Signal
+from django.utils import timezone
+
+from apps.socios.models import Socio
+from .models import SocioPlan, VencimientoPlan
+
+
+LOTE = 1000  # planes por transacción
+
+# Se envía al confirmar cada lote con `vencimientos` (lista de VencimientoPlan).
+# Para cachés que derivan del estado de los planes o de los socios.
+planes_vencidos = Signal()
+
+
+# ============================
+#   BARRIDO DE VENCIMIENTOS
+# ============================
+# SocioPlan.estado no cambia solo cuando pasa fecFin: este barrido (comando
+# vencer_planes, una vez al día) lo pone al día con UPDATE por lotes, deja
+# inactivos a los socios que se quedaron sin plan vigente y lo registra en
+# VencimientoPlan.
+
+def _vencer_lote(hoy, lote):
+    """Vence hasta `lote` planes en una transacción. Devuelve los registros creados."""
+    with transaction.atomic():
+        # skip_locked: dos barridos a la vez (o asignar_plan tocando el mismo
+        # plan) no se esperan ni registran el mismo vencimiento dos veces
+        planes = list(
+            SocioPlan.objects.select_for_update(skip_locked=True)
+            .filter(estado=True, fecFin__lt=hoy)
+            .order_by('fecFin', 'id')
+            .values_list('id', 'socio_id', 'plan_id', 'fecFin')[:lote]
+        )
+        if not planes:
+            return []
+
+        SocioPlan.objects.filter(id__in=[p[0] for p in planes]).update(estado=False)
+
+        # Socios del lote que quedaron sin ningún plan vigente
+        vigente = SocioPlan.objects.filter(socio=OuterRef('pk'), estado=True, fecFin__gte=hoy)
+        sin_plan = set(
+            Socio.objects.filter(id__in={p[1] for p in planes}, estado=True)
+            .exclude(Exists(vigente))
+            .values_list('id', flat=True)
+        )
+        Socio.objects.filter(id__in=sin_plan).update(estado=False)
+
+        # El socio se marca en un solo registro (su último plan del lote)
+        ultimo = {socio_id: plan_id for plan_id, socio_id, _, _ in planes}
+        vencimientos = VencimientoPlan.objects.bulk_create([
+            VencimientoPlan(
+                socio_plan_id=plan_id, socio_id=socio_id, plan_id=tipo_id, fecFin=fin,
+                socio_desactivado=socio_id in sin_plan and ultimo[socio_id] == plan_id,
+            )
+            for plan_id, socio_id, tipo_id, fin in planes
+        ])
+        transaction.on_commit(
+            lambda: planes_vencidos.send(sender=VencimientoPlan, vencimientos=vencimientos)
+        )
+    return vencimientos
+
+
+def vencer_planes(hoy=None, lote=LOTE):
+    """
+    Pasa a inactivos los planes con fecFin anterior a `hoy` (vence al terminar
+    su último día) y desactiva a sus socios si no les queda otro vigente.
+    Devuelve (planes_vencidos, socios_desactivados).
+    """
+    hoy = hoy or timezone.localdate()
+    total_planes = total_socios = 0
+    while True:
+        vencimientos = _vencer_lote(hoy, lote)
+        total_planes += len(vencimientos)
+        total_socios += sum(v.socio_desactivado for v in vencimientos)
+        if len(vencimientos) < lote:
+            return total_planes, total_socios
+
+
+def vencimientos_desde(ultimo_id=0, limite=LOTE):
+    """Registros posteriores a `ultimo_id`, para invalidar cachés de forma incremental."""
+    return list(
+        VencimientoPlan.objects.filter(id__gt=ultimo_id).order_by('id')[:limite]
+    )
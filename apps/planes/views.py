@@ -104,6 +104,10 @@ def asignar_plan(request, socio_id):
             monto_pagado=monto_pagado,
             estado=True
         )
+        # Si el barrido de vencimientos lo había dejado inactivo, vuelve a estar activo
+        if not socio.estado:
+            socio.estado = True
+            socio.save(update_fields=['estado'])
         return redirect('lista_socios')
 
     return render(request, 'planes/asignar_plan.html', {'socio': socio, 'planes': planes})
@@ -82,17 +82,18 @@ def dashboard_reportes(request):
     # ==========================================================
     # 🔹 GRÁFICO 1: SOCIOS POR PLAN
     # ==========================================================
-    # 🔹 GRÁFICO 1: SOCIOS POR PLAN
+    # Cada socio cuenta una vez, por su plan vigente (no por cada SocioPlan activo)
     socios_por_plan_qs = (
-        SocioPlan.objects.filter(estado=True)
-        .values('plan__nombre')
+        Socio.objects.with_plan_activo(hoy)
+        .filter(plan_activo_nombre__isnull=False)
+        .values('plan_activo_nombre')
         .annotate(cantidad=Count('id'))
-        .order_by('plan__nombre')
+        .order_by('plan_activo_nombre')
     )
 
     socios_por_plan = [
         {
-            "plan": p["plan__nombre"],
+            "plan": p["plan_activo_nombre"],
             "cantidad": p["cantidad"]
         }
         for p in socios_por_plan_qs
@@ -196,7 +197,9 @@ def exportar_excel(request):
     hoy = timezone.localdate().strftime("%Y-%m-%d")
 
     if tipo == 'socios':
-        data = Socio.objects.values('rut', 'nombre', 'apellido_paterno', 'correo', 'estado')
+        data = Socio.objects.with_plan_activo().values(
+            'rut', 'nombre', 'apellido_paterno', 'correo', 'estado', 'plan_activo_nombre', 'plan_activo_fin'
+        )
     elif tipo == 'finanzas':
         data = Pago.objects.values('socio__nombre', 'plan__nombre', 'monto', 'forma_pago', 'fecha_pago')
     else:
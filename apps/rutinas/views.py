@@ -244,12 +244,13 @@ def ver_rutina(request, rutina_id):
 # 🧍‍♂️ RUTINAS DEL SOCIO (HISTORIAL)
 # =======================================================
 from apps.core.decorators import es_socio
+from apps.socios.middleware import socio_actual
 
 @login_required
 @user_passes_test(es_socio)
 def mis_rutinas_socio(request):
     """Muestra todas las rutinas asignadas al socio."""
-    socio = get_object_or_404(Socio, rut=request.user.rut)
+    socio = socio_actual(request)
     rutinas = Rutina.objects.filter(socio=socio).order_by('-fecha_asignacion')
 
     context = {
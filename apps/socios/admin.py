@@ -6,3 +6,4 @@ class SocioAdmin(admin.ModelAdmin):
     list_display = ('rut', 'nombre', 'apellido_paterno', 'correo', 'telefono', 'estado')
     search_fields = ('rut', 'nombre', 'apellido_paterno', 'correo')
     list_filter = ('estado',)
+    raw_id_fields = ('usuario',)
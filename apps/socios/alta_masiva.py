@@ -0,0 +1,303 @@
+import os
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.utils import hashear_claves, normalizar_rut, variantes_rut
+from apps.pagos.models import Pago
+from apps.planes.models import Plan, SocioPlan
+from apps.users.models import Usuario
+from .models import Socio
+
+
+# ============================
+#   ALTA MASIVA DE SOCIOS
+# ============================
+# Lo mismo que crear_socio (Socio + Usuario con el RUT como clave + SocioPlan
+# + Pago inicial) para miles de filas: la validación es vectorizada sobre el
+# DataFrame, los hash de las claves se reparten en procesos (solo desde el
+# comando cargar_socios, nunca dentro de una petición web) y cada tramo se
+# inserta con un bulk_create por modelo dentro de una transacción.
+
+OBLIGATORIAS = ['rut', 'nombre', 'apellido_paterno', 'correo', 'plan']
+OPCIONALES = ['apellido_materno', 'telefono', 'fecNac', 'forma_pago', 'profesor', 'objetivo']
+TRAMO = 1000
+
+# Tope de filas por carga desde la web: cada cuenta nueva es un hash PBKDF2
+# (~0,15 s) dentro de la petición; los lotes grandes van por el comando.
+MAX_FILAS_WEB = 100
+
+_PESOS_DV = np.array([3, 2, 7, 6, 5, 4, 3, 2])  # cuerpo de 8 dígitos, de izquierda a derecha
+
+
+class ArchivoInvalido(Exception):
+    """El archivo no se puede leer o le faltan columnas obligatorias."""
+
+
+def leer_archivo(archivo, nombre=None):
+    """DataFrame (todo texto) desde un CSV o Excel; `archivo` es ruta o archivo abierto."""
+    extension = os.path.splitext(nombre or str(archivo))[1].lower()
+    try:
+        if extension == '.csv':
+            df = pd.read_csv(archivo, dtype=str, keep_default_na=False)
+        else:
+            df = pd.read_excel(archivo, dtype=str, keep_default_na=False)
+    except Exception as e:
+        raise ArchivoInvalido(f"No se pudo leer el archivo: {e}")
+
+    df.columns = [str(c).strip() for c in df.columns]
+    faltan = [c for c in OBLIGATORIAS if c not in df.columns]
+    if faltan:
+        raise ArchivoInvalido(f"Faltan columnas: {', '.join(faltan)}")
+    return df
+
+
+# ============================
+#   VALIDACIÓN (vectorizada)
+# ============================
+
+def _dv_valido(ruts):
+    """Serie booleana: el dígito verificador calza (ruts ya normalizados 'cuerpo-DV')."""
+    cuerpo = ruts.str[:-2].str.zfill(8)
+    digitos = np.frombuffer(''.join(cuerpo).encode(), dtype=np.uint8).reshape(-1, 8) - ord('0')
+    resto = 11 - (digitos @ _PESOS_DV) % 11
+    esperado = pd.Series(resto, index=ruts.index).astype(str).replace({'11': '0', '10': 'K'})
+    return ruts.str[-1] == esperado
+
+
+# ISO primero (lo que exporta Excel / pandas) y luego el formato chileno día/mes
+FORMATOS_FECHA = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y']
+
+
+def _fechas(textos):
+    """
+    Serie de date (o NaT) probando cada formato explícito sobre lo que aún no
+    se pudo leer; nunca se infiere el formato (03/05/1990 es 3 de mayo).
+    """
+    texto = textos.str.split(' ').str[0]  # Excel puede traer '1990-05-03 00:00:00'
+    fechas = pd.Series(pd.NaT, index=textos.index, dtype='datetime64[ns]')
+    for formato in FORMATOS_FECHA:
+        faltan = fechas.isna() & (texto != '')
+        fechas[faltan] = pd.to_datetime(texto[faltan], format=formato, errors='coerce')
+    return fechas.dt.date
+
+
+def _existentes(modelo, campo, valores, tramo=500):
+    """Valores de `campo` que ya existen en la BD (consultas de a `tramo`)."""
+    valores = list(valores)
+    encontrados = set()
+    for i in range(0, len(valores), tramo):
+        encontrados.update(
+            modelo.objects.filter(**{f'{campo}__in': valores[i:i + tramo]}).values_list(campo, flat=True)
+        )
+    return encontrados
+
+
+def _por_rut(consulta, ruts, *campos, tramo=500):
+    """
+    Filas de `consulta` con alguno de `ruts` guardado en cualquier formato
+    (create_user lo deja sin guion, crear_socio tal como se escribió), como
+    {rut normalizado: [(campos...), ...]}.
+    """
+    formas = sorted(set().union(*(variantes_rut(rut) for rut in ruts)))
+    encontrados = defaultdict(list)
+    for i in range(0, len(formas), tramo):
+        for rut, *resto in consulta.filter(rut__in=formas[i:i + tramo]).values_list('rut', *campos):
+            encontrados[normalizar_rut(rut).upper()].append(tuple(resto))
+    return encontrados
+
+
+def validar(df):
+    """
+    Normaliza y valida todas las filas a la vez. Devuelve (validas, errores):
+    `validas` es el DataFrame listo para insertar (con plan_id, duracion,
+    precio y profesor_id) y `errores` una lista de {'fila', 'rut', 'error'}
+    con la fila tal como se ve en la planilla (encabezado = 1).
+    """
+    df = df.copy()
+    for col in OPCIONALES:
+        if col not in df.columns:
+            df[col] = ''
+    for col in OBLIGATORIAS + OPCIONALES:
+        df[col] = df[col].fillna('').astype(str).str.strip()
+
+    df['rut'] = df['rut'].str.replace('.', '', regex=False).str.upper()
+    df['rut_normal'] = df['rut'].str.replace('-', '', regex=False)
+    df['correo'] = df['correo'].str.lower()
+    df['forma_pago'] = df['forma_pago'].str.lower().replace('', 'efectivo')
+    df['objetivo'] = df['objetivo'].replace('', 'mantener')
+    df['fecNac_dt'] = _fechas(df['fecNac'])
+
+    # Planes por id o por nombre; profesores por RUT
+    planes = {str(p.id): p for p in Plan.objects.all()}
+    planes.update({p.nombre.lower(): p for p in list(planes.values())})
+    plan = df['plan'].str.lower().map(planes)
+    df['plan_id'] = plan.map(lambda p: p.id, na_action='ignore')
+    df['duracion'] = plan.map(lambda p: p.duracion, na_action='ignore')
+    df['precio'] = plan.map(lambda p: p.precio, na_action='ignore')
+
+    # create_user guarda el RUT sin guion y el formulario con guion: se comparan sin ninguno
+    profesores = {
+        rut.replace('-', '').upper(): pk
+        for rut, pk in Usuario.objects.filter(rol='profesor').values_list('rut', 'id')
+    }
+    df['profesor_id'] = df['profesor'].str.replace(r'[.\-]', '', regex=True).str.upper().map(profesores)
+
+    formato_rut = df['rut'].str.fullmatch(r'\d{7,8}-[\dK]')
+    rut_ok = formato_rut.copy()
+    rut_ok[formato_rut] = _dv_valido(df.loc[formato_rut, 'rut'])
+
+    socios_rut = set(_por_rut(Socio.objects, df['rut']))
+    socios_correo = _existentes(Socio, 'correo', df['correo'])
+    # El usuario puede existir (se reutiliza, como en crear_socio), pero su correo no puede ser de otro
+    usuarios = {}
+    correos = df['correo'].tolist()
+    for i in range(0, len(correos), 500):
+        usuarios.update(
+            (correo, normalizar_rut(rut).upper())
+            for correo, rut in Usuario.objects.filter(correo__in=correos[i:i + 500]).values_list('correo', 'rut')
+        )
+    correo_de_otro = df['correo'].map(usuarios).fillna(df['rut_normal']) != df['rut_normal']
+
+    formas = {f for f, _ in Pago.FORMA_PAGO_CHOICES}
+    objetivos = {o for o, _ in Socio.objetivos_choices}
+
+    # Primer problema de cada fila (el orden es la prioridad)
+    reglas = [
+        (df[OBLIGATORIAS].eq('').any(axis=1), "Faltan datos obligatorios"),
+        (~rut_ok, "RUT inválido"),
+        (~df['correo'].str.fullmatch(r'[^@\s]+@[^@\s]+\.[^@\s]+'), "Correo inválido"),
+        (df['plan_id'].isna(), "Plan desconocido"),
+        (~df['forma_pago'].isin(formas), "Forma de pago inválida"),
+        (~df['objetivo'].isin(objetivos), "Objetivo inválido"),
+        ((df['fecNac'] != '') & df['fecNac_dt'].isna(), "Fecha de nacimiento inválida"),
+        ((df['profesor'] != '') & df['profesor_id'].isna(), "Profesor desconocido"),
+        (df['rut'].duplicated(keep='first'), "RUT repetido en el archivo"),
+        (df['correo'].duplicated(keep='first'), "Correo repetido en el archivo"),
+        (df['rut_normal'].isin(socios_rut), "Ya existe un socio con ese RUT"),
+        (df['correo'].isin(socios_correo) | correo_de_otro, "El correo ya está registrado"),
+    ]
+    error = pd.Series('', index=df.index)
+    for falla, motivo in reglas:
+        error = error.mask((error == '') & falla.fillna(True), motivo)
+
+    malas = error != ''
+    errores = [
+        {'fila': int(i) + 2, 'rut': rut, 'error': motivo}
+        for i, rut, motivo in zip(df.index[malas], df.loc[malas, 'rut'], error[malas])
+    ]
+    return df[~malas], errores
+
+
+# ============================
+#   INSERCIÓN
+# ============================
+
+def _nulo(valor):
+    return None if valor == '' or pd.isna(valor) else valor
+
+
+def _insertar_tramo(filas, claves, usuarios, hoy):
+    """
+    Un tramo validado → un bulk_create por modelo en una transacción.
+    `claves` = {rut: hash} de los socios que no tienen Usuario y
+    `usuarios` = {rut: id} de los que ya tienen (se enlazan).
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        nuevos = Usuario.objects.bulk_create([
+            Usuario(
+                rut=f.rut,
+                nombre=f.nombre,
+                apellido=f.apellido_paterno,
+                correo=f.correo,
+                rol='socio',
+                especialidad='no_aplica',  # bulk_create no pasa por Usuario.save()
+                password=claves[f.rut],
+                is_active=True,
+            )
+            for f in filas
+            if f.rut in claves
+        ])
+        usuario_id = {**usuarios, **{u.rut: u.pk for u in nuevos}}
+
+        socios = Socio.objects.bulk_create([
+            Socio(
+                rut=f.rut,
+                nombre=f.nombre,
+                apellido_paterno=f.apellido_paterno,
+                apellido_materno=_nulo(f.apellido_materno),
+                correo=f.correo,
+                telefono=_nulo(f.telefono),
+                fecNac=_nulo(f.fecNac_dt),
+                estado=True,
+                fec_registro=ahora,
+                profesor_asignado_id=int(f.profesor_id) if pd.notna(f.profesor_id) else None,
+                objetivo=f.objetivo,
+                usuario_id=usuario_id.get(f.rut),
+            )
+            for f in filas
+        ])
+
+        planes = SocioPlan.objects.bulk_create([
+            SocioPlan(
+                socio=socio,
+                plan_id=int(f.plan_id),
+                fecInicio=hoy,
+                fecFin=hoy + timedelta(days=int(f.duracion)),
+                estado=True,
+            )
+            for socio, f in zip(socios, filas)
+        ])
+
+        Pago.objects.bulk_create([
+            Pago(
+                socio=socio,
+                plan_id=int(f.plan_id),
+                socio_plan=socio_plan,
+                monto=int(f.precio),
+                forma_pago=f.forma_pago,
+                observaciones="Pago inicial del plan",
+                estado='completado',
+            )
+            for socio, socio_plan, f in zip(socios, planes, filas)
+        ])
+    return len(socios)
+
+
+def cargar(df, tramo=TRAMO, procesos=1, simular=False):
+    """
+    Valida e inserta el lote. Las filas con error se saltan (no frenan al
+    resto); cada tramo es atómico. Con `simular` solo valida. `procesos`
+    para los hash: 1 = en este proceso, None = uno por CPU.
+    Devuelve {'creados': n, 'errores': [...]}.
+    """
+    validas, errores = validar(df)
+    if simular or validas.empty:
+        return {'creados': 0, 'errores': errores}
+
+    hoy = timezone.localdate()
+    filas = list(validas.itertuples(index=False))
+
+    # Igual que crear_socio: la clave inicial es el RUT, se reutiliza la cuenta de
+    # socio libre y si el RUT es de otra cuenta el socio queda sin usuario propio
+    # (el RUT se compara normalizado, como con variantes_rut)
+    cuentas = _por_rut(Usuario.objects, [f.rut for f in filas], 'id', 'rol', 'socio')
+    usuarios, sin_usuario = {}, []
+    for f in filas:
+        encontradas = cuentas.get(f.rut_normal, [])
+        libre = next((pk for pk, rol, socio in encontradas if rol == 'socio' and socio is None), None)
+        if libre:
+            usuarios[f.rut] = libre
+        elif not encontradas:
+            sin_usuario.append(f.rut)
+    claves = dict(zip(sin_usuario, hashear_claves(sin_usuario, procesos=procesos)))
+
+    creados = 0
+    for i in range(0, len(filas), tramo):
+        creados += _insertar_tramo(filas[i:i + tramo], claves, usuarios, hoy)
+    return {'creados': creados, 'errores': errores}
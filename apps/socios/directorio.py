@@ -0,0 +1,117 @@
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from apps.core.paginacion import pagina_keyset
+from apps.core.utils import formatear_rut
+from apps.planes.models import SocioPlan
+from .models import Socio
+
+
+# ============================
+#   DIRECTORIO DE SOCIOS (API)
+# ============================
+# Búsqueda, filtros y orden se resuelven en SQL y se entrega de a una página
+# (keyset). La búsqueda es por prefijo y se escribe como rango
+# (col >= 'ab' AND col < 'ab\U0010ffff') sobre lower(col): así usa los índices
+# funcionales de Socio.Meta en cualquier base, cosa que un LIKE no asegura.
+
+TAMANO = 50
+TAMANO_MAX = 100
+
+# orden → campos de la clave (el último único)
+ORDENES = {
+    'nombre': ['nombre_l', 'apellido_l', 'id'],
+    'apellido': ['apellido_l', 'nombre_l', 'id'],
+    'rut': ['rut'],
+    'recientes': ['-fec_registro', '-id'],
+}
+
+_FIN = '\U0010ffff'
+
+
+def _prefijo(campo, texto):
+    return Q(**{f'{campo}__gte': texto, f'{campo}__lt': texto + _FIN})
+
+
+def _busqueda(q):
+    """
+    Cada palabra debe ser prefijo de rut, nombre, apellido o correo
+    ('juan per' encuentra a Juan Pérez).
+    """
+    condicion = Q()
+    for palabra in q.split():
+        rut = palabra.replace('.', '').upper()  # el DV 'K' se guarda en mayúscula
+        texto = palabra.lower()
+        condicion &= (
+            _prefijo('rut', rut) | _prefijo('rut', rut.replace('-', ''))
+            | _prefijo('nombre_l', texto) | _prefijo('apellido_l', texto) | _prefijo('correo_l', texto)
+        )
+    return condicion
+
+
+def filtrar(q='', estado='', profesor='', plan=''):
+    """
+    Socios que cumplen los filtros, con el plan vigente anotado.
+    estado: '1' / '0'. profesor: id o 'ninguno'. plan: id o 'ninguno'
+    (sin plan vigente).
+    """
+    socios = (
+        Socio.objects.with_plan_activo()
+        .select_related('profesor_asignado')
+        .annotate(nombre_l=Lower('nombre'), apellido_l=Lower('apellido_paterno'), correo_l=Lower('correo'))
+    )
+
+    if q.strip():
+        socios = socios.filter(_busqueda(q))
+
+    if estado in ('1', '0'):
+        socios = socios.filter(estado=estado == '1')
+
+    if profesor == 'ninguno':
+        socios = socios.filter(profesor_asignado__isnull=True)
+    elif profesor.isdigit():
+        socios = socios.filter(profesor_asignado_id=profesor)
+
+    if plan:
+        vigentes = SocioPlan.objects.filter(socio=OuterRef('pk'), estado=True, fecFin__gte=timezone.localdate())
+        if plan == 'ninguno':
+            socios = socios.filter(~Exists(vigentes))
+        elif plan.isdigit():
+            socios = socios.filter(Exists(vigentes.filter(plan_id=plan)))
+
+    return socios
+
+
+def socio_a_dict(socio):
+    profesor = socio.profesor_asignado
+    return {
+        'id': socio.id,
+        'rut': formatear_rut(socio.rut),
+        'nombre': " ".join(filter(None, [socio.nombre, socio.apellido_paterno, socio.apellido_materno])),
+        'correo': socio.correo,
+        'telefono': socio.telefono or '',
+        'estado': socio.estado,
+        'plan': socio.plan_activo_nombre,
+        'vigencia': socio.plan_vigencia if socio.plan_activo_fin else None,
+        'profesor': f"{profesor.nombre} {profesor.apellido}" if profesor else None,
+        'especialidad': profesor.get_especialidad_display() if profesor and profesor.especialidad else '',
+    }
+
+
+def pagina_directorio(params):
+    """Una página del directorio según los parámetros GET. Devuelve (socios, cursor_siguiente)."""
+    campos = ORDENES.get(params.get('orden'), ORDENES['nombre'])
+    try:
+        tamano = min(max(int(params.get('tamano', TAMANO)), 1), TAMANO_MAX)
+    except ValueError:
+        tamano = TAMANO
+
+    socios = filtrar(
+        q=params.get('q', ''),
+        estado=params.get('estado', ''),
+        profesor=params.get('profesor', ''),
+        plan=params.get('plan', ''),
+    )
+    pagina = pagina_keyset(socios, campos, despues=params.get('despues'), tamano=tamano)
+    return [socio_a_dict(s) for s in pagina.items], pagina.siguiente
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.socios.alta_masiva import TRAMO, ArchivoInvalido, cargar, leer_archivo
+
+
+class Command(BaseCommand):
+    help = (
+        "Alta masiva de socios desde un CSV o Excel (rut, nombre, apellido_paterno, "
+        "correo, plan; opcionales: apellido_materno, telefono, fecNac, forma_pago, "
+        "profesor, objetivo). Crea Socio, Usuario, SocioPlan y el pago inicial."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument('--tramo', type=int, default=TRAMO, help="Filas por transacción.")
+        parser.add_argument('--procesos', type=int, default=None,
+                            help="Procesos para el hash de claves (por defecto, uno por CPU).")
+        parser.add_argument('--simular', action='store_true', help="Solo valida, no inserta nada.")
+
+    def handle(self, *args, **options):
+        try:
+            df = leer_archivo(options['archivo'])
+        except ArchivoInvalido as e:
+            raise CommandError(str(e))
+
+        resultado = cargar(df, tramo=options['tramo'], procesos=options['procesos'], simular=options['simular'])
+
+        for error in resultado['errores']:
+            self.stderr.write(f"Fila {error['fila']} ({error['rut']}): {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['creados']} socio(s) creados, {len(resultado['errores'])} fila(s) con error."
+        ))
@@ -0,0 +1,35 @@
+from django.http import Http404
+from django.utils.functional import SimpleLazyObject
+
+from .models import Socio
+
+
+# ============================
+#   request.socio
+# ============================
+# El socio del usuario conectado, por la FK Socio.usuario. Es perezoso (como
+# request.user): solo consulta si la vista lo usa, y una sola vez por petición.
+
+def _socio_de(request):
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    return Socio.objects.filter(usuario_id=user.pk).first()
+
+
+class SocioMiddleware:
+    """Va después de AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.socio = SimpleLazyObject(lambda: _socio_de(request))
+        return self.get_response(request)
+
+
+def socio_actual(request):
+    """request.socio o 404 si la cuenta no tiene socio asociado."""
+    if not request.socio:
+        raise Http404("No hay un socio asociado a esta cuenta")
+    return request.socio
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:40
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0003_socio_profesor_asignado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='socio',
+            index=models.Index(django.db.models.functions.text.Lower('nombre'), django.db.models.functions.text.Lower('apellido_paterno'), models.F('id'), name='socio_nombre_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socio',
+            index=models.Index(django.db.models.functions.text.Lower('apellido_paterno'), django.db.models.functions.text.Lower('nombre'), models.F('id'), name='socio_apellido_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socio',
+            index=models.Index(django.db.models.functions.text.Lower('correo'), name='socio_correo_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socio',
+            index=models.Index(models.OrderBy(models.F('fec_registro'), descending=True), models.OrderBy(models.F('id'), descending=True), name='socio_recientes_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def _normalizar(rut):
+    return rut.replace('.', '').replace('-', '').upper()
+
+
+def enlazar_usuarios(apps, schema_editor):
+    """
+    Enlaza cada socio con la cuenta de socio libre de su mismo RUT (nunca una
+    de admin o profesor). Primero el cruce exacto (un solo UPDATE); después
+    los que solo difieren en puntos o guion, porque create_user guarda el RUT
+    sin guion y crear_socio tal como se escribió.
+    """
+    Socio = apps.get_model('socios', 'Socio')
+    Usuario = apps.get_model('users', 'Usuario')
+
+    Socio.objects.filter(usuario__isnull=True).update(
+        usuario=Subquery(
+            Usuario.objects.filter(rut=OuterRef('rut'), rol='socio', socio__isnull=True).values('id')[:1]
+        )
+    )
+
+    pendientes = list(Socio.objects.filter(usuario__isnull=True).only('id', 'rut'))
+    if not pendientes:
+        return
+    libres = {
+        _normalizar(rut): pk
+        for pk, rut in Usuario.objects.filter(rol='socio', socio__isnull=True).values_list('id', 'rut')
+    }
+    enlazados = []
+    for socio in pendientes:
+        usuario_id = libres.pop(_normalizar(socio.rut), None)
+        if usuario_id:
+            socio.usuario_id = usuario_id
+            enlazados.append(socio)
+    Socio.objects.bulk_update(enlazados, ['usuario'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0004_directorio_indices'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='socio',
+            name='usuario',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='socio', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(enlazar_usuarios, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,41 @@
 from django.db import models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Lower
 from django.utils import timezone
 
+
+class SocioQuerySet(models.QuerySet):
+    def with_plan_activo(self, hoy=None):
+        """
+        Anota el plan vigente de cada socio (`plan_activo_nombre` y
+        `plan_activo_fin`) con subconsultas correlacionadas, en la misma
+        consulta del listado. plan_nombre / plan_vigencia las usan si están.
+        """
+        from apps.planes.models import SocioPlan
+
+        vigente = SocioPlan.objects.filter(
+            socio=OuterRef('pk'),
+            estado=True,
+            fecFin__gte=hoy or timezone.localdate()
+        ).order_by('-fecFin', '-id')
+        return self.annotate(
+            plan_activo_nombre=Subquery(vigente.values('plan__nombre')[:1]),
+            plan_activo_fin=Subquery(vigente.values('fecFin')[:1]),
+        )
+
+    def enlazar_usuario(self, usuario):
+        """
+        Enlaza `usuario` con el socio sin cuenta de su mismo RUT (con o sin
+        puntos y guion). Devuelve 1 si lo enlazó, 0 si no había socio.
+        """
+        from apps.core.utils import variantes_rut
+
+        socio_id = self.filter(
+            rut__in=variantes_rut(usuario.rut), usuario__isnull=True
+        ).values_list('id', flat=True).first()
+        return self.filter(id=socio_id).update(usuario=usuario) if socio_id else 0
+
+
 class Socio(models.Model):
     ESTADO_CHOICES = [
         (True, 'Activo'),
@@ -40,6 +75,26 @@ class Socio(models.Model):
         help_text="Profesor asignado a este socio"
     )
 
+    # Cuenta con la que el socio entra al sistema (request.socio, ver middleware.py)
+    usuario = models.OneToOneField(
+        'users.Usuario',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='socio',
+    )
+
+    objects = SocioQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Directorio (directorio.py): búsqueda por prefijo y orden, sin distinguir mayúsculas
+            models.Index(Lower('nombre'), Lower('apellido_paterno'), F('id'), name='socio_nombre_lower_idx'),
+            models.Index(Lower('apellido_paterno'), Lower('nombre'), F('id'), name='socio_apellido_lower_idx'),
+            models.Index(Lower('correo'), name='socio_correo_lower_idx'),
+            models.Index(F('fec_registro').desc(), F('id').desc(), name='socio_recientes_idx'),
+        ]
+
     @property
     def imc(self):
         """Calcula el IMC si hay peso y altura disponibles."""
@@ -47,25 +102,28 @@ class Socio(models.Model):
             return round(self.peso / (self.altura ** 2), 2)
         return None
 
+    def _plan_activo(self):
+        """(nombre, fecFin) del plan vigente, o None. Sin with_plan_activo() cuesta una consulta."""
+        if not hasattr(self, 'plan_activo_fin'):
+            hoy = timezone.localdate()
+            plan_activo = self.planes_asignados.filter(
+                estado=True,
+                fecFin__gte=hoy
+            ).order_by('-fecFin', '-id').values_list('plan__nombre', 'fecFin').first()
+            self.plan_activo_nombre, self.plan_activo_fin = plan_activo or (None, None)
+        return (self.plan_activo_nombre, self.plan_activo_fin) if self.plan_activo_fin else None
+
     @property
     def plan_nombre(self):
         """Devuelve el nombre del plan activo."""
-        hoy = timezone.localdate()
-        plan_activo = self.planes_asignados.filter(
-            estado=True,
-            fecFin__gte=hoy
-        ).order_by('-fecFin').first()
-        return plan_activo.plan.nombre if plan_activo else "Sin plan"
+        plan_activo = self._plan_activo()
+        return plan_activo[0] if plan_activo else "Sin plan"
 
     @property
     def plan_vigencia(self):
         """Devuelve la vigencia del plan activo."""
-        hoy = timezone.localdate()
-        plan_activo = self.planes_asignados.filter(
-            estado=True,
-            fecFin__gte=hoy
-        ).order_by('-fecFin').first()
-        return plan_activo.fecFin.strftime('%d/%m/%Y') if plan_activo else "-"
+        plan_activo = self._plan_activo()
+        return plan_activo[1].strftime('%d/%m/%Y') if plan_activo else "-"
 
     def __str__(self):
         estado = 'Activo' if self.estado else 'Inactivo'
@@ -1,3 +1,356 @@
-from django.test import TestCase
+import io
+from datetime import date, timedelta
+from importlib import import_module
+from unittest.mock import patch
 
-# Create your tests here.
+import pandas as pd
+from django.apps import apps as django_apps
+from django.contrib.auth.hashers import check_password
+from django.contrib.messages import get_messages
+from django.db import connection
+from django.db.models import F
+from django.http import Http404
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.utils import hashear_claves
+from apps.pagos.models import Pago
+from apps.planes.models import Plan, SocioPlan
+from apps.users.models import Usuario
+from .alta_masiva import MAX_FILAS_WEB, cargar, leer_archivo, validar
+from .directorio import pagina_directorio
+from .middleware import SocioMiddleware, socio_actual
+from .models import Socio
+
+
+class PlanActivoTests(TestCase):
+
+    def setUp(self):
+        hoy = timezone.localdate()
+        mensual = Plan.objects.create(nombre='Mensual', precio=20000, duracion=30)
+        anual = Plan.objects.create(nombre='Anual', precio=200000, duracion=365)
+
+        self.con_plan, self.vencido, self.sin_plan = [
+            Socio.objects.create(rut=f'1000000{i}', nombre=f'Socio {i}', apellido_paterno='S', correo=f's{i}@gym.cl')
+            for i in range(3)
+        ]
+        SocioPlan.objects.create(socio=self.con_plan, plan=mensual, fecInicio=hoy, fecFin=hoy + timedelta(days=30))
+        SocioPlan.objects.create(socio=self.con_plan, plan=anual, fecInicio=hoy, fecFin=hoy + timedelta(days=365))
+        SocioPlan.objects.create(socio=self.vencido, plan=anual, fecInicio=hoy - timedelta(days=400),
+                                 fecFin=hoy - timedelta(days=35))
+        self.fin_anual = (hoy + timedelta(days=365)).strftime('%d/%m/%Y')
+
+    def test_anotacion_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            socios = {s.pk: (s.plan_nombre, s.plan_vigencia) for s in Socio.objects.with_plan_activo()}
+
+        self.assertEqual(socios, {
+            self.con_plan.pk: ('Anual', self.fin_anual),
+            self.vencido.pk: ('Sin plan', '-'),
+            self.sin_plan.pk: ('Sin plan', '-'),
+        })
+
+    def test_sin_anotacion_una_consulta_por_socio(self):
+        socio = Socio.objects.get(pk=self.con_plan.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual((socio.plan_nombre, socio.plan_vigencia), ('Anual', self.fin_anual))
+
+
+class DirectorioTests(TestCase):
+
+    def setUp(self):
+        hoy = timezone.localdate()
+        self.admin = Usuario.objects.create_user(
+            rut='99999999-9', password='x', nombre='Admin', apellido='A', correo='admin@gym.cl', rol='admin',
+        )
+        self.profesor = Usuario.objects.create_user(
+            rut='88888888-8', password='x', nombre='Profe', apellido='P', correo='profe@gym.cl', rol='profesor',
+        )
+        self.mensual = Plan.objects.create(nombre='Mensual', precio=20000, duracion=30)
+
+        registro = timezone.now()
+        nombres = [('Juan', 'Pérez'), ('juana', 'Soto'), ('Pedro', 'Juárez'), ('Ana', 'Pérez')]
+        self.socios = []
+        for i, (nombre, apellido) in enumerate(nombres):
+            self.socios.append(Socio.objects.create(
+                rut=f'1{i}.111.111-K'.replace('.', ''), nombre=nombre, apellido_paterno=apellido,
+                correo=f'{nombre.lower()}{i}@gym.cl', estado=i != 3, fec_registro=registro,
+                profesor_asignado=self.profesor if i < 2 else None,
+            ))
+        SocioPlan.objects.create(socio=self.socios[0], plan=self.mensual, fecInicio=hoy, fecFin=hoy + timedelta(days=30))
+
+    def ids(self, **params):
+        socios, _ = pagina_directorio(params)
+        return [s['id'] for s in socios]
+
+    def test_busqueda_por_prefijo(self):
+        juan, juana, pedro, ana = (s.id for s in self.socios)
+        self.assertEqual(self.ids(q='JU'), [juan, juana, pedro])   # nombre o apellido, sin mayúsculas
+        self.assertEqual(self.ids(q='juan pér'), [juan])             # todas las palabras
+        self.assertEqual(self.ids(q='12.111'), [pedro])              # rut con puntos
+        self.assertEqual(self.ids(q='ana3@'), [ana])                 # correo
+        self.assertEqual(self.ids(q='uan'), [])                      # no es prefijo
+
+    def test_filtros(self):
+        juan, juana, pedro, ana = (s.id for s in self.socios)
+        self.assertEqual(self.ids(estado='0'), [ana])
+        self.assertEqual(self.ids(profesor=str(self.profesor.pk)), [juan, juana])
+        self.assertEqual(self.ids(profesor='ninguno', orden='apellido'), [pedro, ana])
+        self.assertEqual(self.ids(plan=str(self.mensual.pk)), [juan])
+        self.assertEqual(self.ids(plan='ninguno'), [ana, juana, pedro])
+
+    def test_paginas_sin_saltos_ni_repetidos(self):
+        for orden, esperado in [
+            ('nombre', ['Ana', 'Juan', 'juana', 'Pedro']),
+            ('rut', ['Juan', 'juana', 'Pedro', 'Ana']),
+            ('recientes', ['Ana', 'Pedro', 'juana', 'Juan']),  # mismo fec_registro: desempata el id
+        ]:
+            vistos, cursor = [], None
+            while True:
+                socios, cursor = pagina_directorio({'orden': orden, 'tamano': '1', 'despues': cursor})
+                vistos += [s['nombre'].split()[0] for s in socios]
+                if not cursor:
+                    break
+            self.assertEqual(vistos, esperado, orden)
+
+    def test_api(self):
+        url = reverse('api_directorio_socios')
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(self.admin)
+        with self.assertNumQueries(3):  # sesión + usuario + página
+            data = self.client.get(url, {'tamano': 2}).json()
+        self.assertEqual([s['nombre'] for s in data['socios']], ['Ana Pérez', 'Juan Pérez'])
+        self.assertEqual(data['socios'][1]['plan'], 'Mensual')
+        self.assertEqual(data['socios'][1]['profesor'], 'Profe P')
+
+        data = self.client.get(url, {'tamano': 2, 'despues': data['siguiente']}).json()
+        self.assertEqual([s['nombre'] for s in data['socios']], ['juana Soto', 'Pedro Juárez'])
+        self.assertIsNone(data['siguiente'])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AltaMasivaTests(TestCase):
+
+    def setUp(self):
+        self.mensual = Plan.objects.create(nombre='Mensual', precio=20000, duracion=30)
+        self.profesor = Usuario.objects.create_user(
+            rut='88888888-8', password='x', nombre='Profe', apellido='P', correo='profe@gym.cl', rol='profesor',
+        )
+
+    def fila(self, rut, correo, **extra):
+        return {'rut': rut, 'nombre': 'Ana', 'apellido_paterno': 'Soto', 'correo': correo, 'plan': 'mensual', **extra}
+
+    def test_valida_todo_el_lote(self):
+        Socio.objects.create(rut='11111111-1', nombre='Ya', apellido_paterno='Existe', correo='ya@gym.cl')
+        df = pd.DataFrame([
+            self.fila('12.345.678-5', 'ok@gym.cl', profesor='88.888.888-8', fecNac='1990-05-01'),
+            self.fila('12345678-9', 'dv@gym.cl'),                   # DV malo
+            self.fila('12345678-5', 'otro@gym.cl'),                 # repetido en el archivo
+            self.fila('11111111-1', 'nuevo@gym.cl'),                # socio existente
+            self.fila('7654321-6', 'profe@gym.cl'),                 # correo de otro usuario
+            self.fila('9999999-3', 'plan@gym.cl', plan='Anual'),    # plan desconocido
+            self.fila('20000000-5', 'sinfecha@gym.cl', fecNac='ayer'),
+            self.fila('', 'vacio@gym.cl'),
+        ], dtype=str)
+
+        validas, errores = validar(df)
+
+        self.assertEqual(list(validas['rut']), ['12345678-5'])
+        self.assertEqual(validas.iloc[0]['profesor_id'], self.profesor.pk)
+        self.assertEqual([(e['fila'], e['error']) for e in errores], [
+            (3, "RUT inválido"),
+            (4, "RUT repetido en el archivo"),
+            (5, "Ya existe un socio con ese RUT"),
+            (6, "El correo ya está registrado"),
+            (7, "Plan desconocido"),
+            (8, "Fecha de nacimiento inválida"),
+            (9, "Faltan datos obligatorios"),
+        ])
+
+    def test_fechas_dia_mes_chilenas(self):
+        archivo = io.StringIO(
+            "rut,nombre,apellido_paterno,correo,plan,fecNac\n"
+            "12345678-5,Ana,Soto,ana@gym.cl,Mensual,03/05/1990\n"
+            "7654321-6,Beto,Paz,beto@gym.cl,Mensual,25-12-1985\n"
+            "9999999-3,Caro,Ríos,caro@gym.cl,Mensual,1990-05-03\n"
+            "5126663-3,Dani,Lira,dani@gym.cl,Mensual,31/02/2000\n"
+        )
+        validas, errores = validar(leer_archivo(archivo, 'socios.csv'))
+
+        self.assertEqual(
+            list(validas['fecNac_dt']), [date(1990, 5, 3), date(1985, 12, 25), date(1990, 5, 3)]
+        )
+        self.assertEqual([(e['fila'], e['error']) for e in errores], [(5, "Fecha de nacimiento inválida")])
+
+    def test_carga_por_tramos(self):
+        # Un socio que ya tenía usuario (p. ej. cargado antes como usuario) lo reutiliza
+        Usuario.objects.create(rut='5126663-3', nombre='Ana', apellido='Soto', correo='s0@gym.cl', rol='socio')
+        ruts = ['5126663-3', '6987543-2', '8765432-K', '10234567-3', '15555555-6']
+        df = pd.DataFrame([self.fila(rut, f's{i}@gym.cl', forma_pago='Tarjeta') for i, rut in enumerate(ruts)])
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = cargar(df, tramo=2)
+
+        # Un INSERT por modelo y tramo, sin importar cuántas filas trae cada uno
+        inserts = [q for q in consultas.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 4 * 3)
+
+        self.assertEqual(resultado, {'creados': 5, 'errores': []})
+        self.assertEqual(Socio.objects.count(), 5)
+        self.assertEqual(SocioPlan.objects.filter(plan=self.mensual, estado=True).count(), 5)
+        self.assertEqual(Pago.objects.filter(monto=20000, forma_pago='tarjeta', estado='completado').count(), 5)
+        self.assertEqual(Usuario.objects.filter(rol='socio').count(), 5)
+        self.assertEqual(Socio.objects.filter(usuario__rut=F('rut')).count(), 5)
+        self.assertTrue(Usuario.objects.get(rut='6987543-2').check_password('6987543-2'))
+        self.assertEqual(Socio.objects.with_plan_activo().get(rut='15555555-6').plan_nombre, 'Mensual')
+
+    def test_cuentas_existentes_con_rut_sin_guion(self):
+        # create_user guarda '123456785': la fila '12.345.678-5' es la misma persona
+        cuenta = Usuario.objects.create_user(
+            rut='12345678-5', password='x', nombre='Ana', apellido='Soto', correo='ana@gym.cl', rol='socio',
+        )
+        Usuario.objects.create_user(
+            rut='7654321-6', password='x', nombre='Beto', apellido='Paz', correo='beto@gym.cl', rol='profesor',
+        )
+        Socio.objects.create(rut='9.999.999-3', nombre='Caro', apellido_paterno='Ríos', correo='caro@gym.cl')
+        df = pd.DataFrame([
+            self.fila('12.345.678-5', 'ana@gym.cl'),
+            self.fila('7654321-6', 'otro@gym.cl'),    # RUT de una cuenta de profesor
+            self.fila('9999999-3', 'caro2@gym.cl'),   # socio guardado con puntos
+        ], dtype=str)
+
+        resultado = cargar(df)
+
+        self.assertEqual([(e['fila'], e['error']) for e in resultado['errores']], [
+            (4, "Ya existe un socio con ese RUT"),
+        ])
+        self.assertEqual(resultado['creados'], 2)
+        self.assertEqual(Socio.objects.get(rut='12345678-5').usuario, cuenta)
+        self.assertIsNone(Socio.objects.get(rut='7654321-6').usuario)
+        self.assertEqual(Usuario.objects.count(), 3)  # no se creó ninguna cuenta de más
+
+    def test_carga_web_sin_pool_de_procesos_y_con_tope(self):
+        def rut(cuerpo):
+            suma = sum(int(d) * (2 + i % 6) for i, d in enumerate(reversed(str(cuerpo))))
+            return f"{cuerpo}-{'0K987654321'[suma % 11]}"
+
+        def archivo(cantidad):
+            filas = "".join(f"{rut(10000000 + i)},Socio,{i},s{i}@gym.cl,Mensual\n" for i in range(cantidad))
+            return SimpleUploadedFile('socios.csv', f"rut,nombre,apellido_paterno,correo,plan\n{filas}".encode())
+
+        admin = Usuario.objects.create_user(
+            rut='99999999-9', password='x', nombre='Admin', apellido='A', correo='admin@gym.cl', rol='admin',
+        )
+        self.client.force_login(admin)
+
+        # Sobre el tope no se carga nada: se indica el comando
+        respuesta = self.client.post(reverse('carga_socios'), {'archivo': archivo(MAX_FILAS_WEB + 1)})
+        self.assertIn('cargar_socios', str(list(get_messages(respuesta.wsgi_request))[0]))
+        self.assertFalse(Socio.objects.exists())
+
+        with patch('apps.core.utils.ProcessPoolExecutor') as pool:
+            self.client.post(reverse('carga_socios'), {'archivo': archivo(MAX_FILAS_WEB)})
+
+        pool.assert_not_called()
+        self.assertEqual(Socio.objects.count(), MAX_FILAS_WEB)
+
+    def test_hash_en_procesos(self):
+        hashes = hashear_claves(['a', 'b', 'c'], procesos=2, minimo_paralelo=0)
+        self.assertEqual([check_password(c, h) for c, h in zip('abc', hashes)], [True] * 3)
+
+
+class SocioUsuarioTests(TestCase):
+
+    def setUp(self):
+        # create_user guarda el RUT sin guion; el socio lo tiene con guion
+        self.usuario = Usuario.objects.create_user(
+            rut='12345678-5', password='x', nombre='Ana', apellido='Soto', correo='ana@gym.cl', rol='socio',
+        )
+        self.socio = Socio.objects.create(
+            rut='12345678-5', nombre='Ana', apellido_paterno='Soto', correo='ana@gym.cl', usuario=self.usuario,
+        )
+        plan = Plan.objects.create(nombre='Mensual', precio=20000, duracion=30)
+        otro = Socio.objects.create(rut='7654321-6', nombre='Otro', apellido_paterno='S', correo='otro@gym.cl')
+        for socio in (self.socio, otro):
+            Pago.objects.create(socio=socio, plan=plan, monto=20000, forma_pago='efectivo', estado='completado')
+        self.client.force_login(self.usuario)
+
+    def test_request_socio_perezoso_y_cacheado(self):
+        request = RequestFactory().get('/')
+        request.user = self.usuario
+        SocioMiddleware(lambda r: None)(request)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(request.socio.pk, self.socio.pk)
+            self.assertEqual(socio_actual(request).rut, '12345678-5')
+
+        request.user = Usuario.objects.create_user(rut='1-9', password='x', nombre='S', apellido='S', correo='s@gym.cl')
+        SocioMiddleware(lambda r: None)(request)
+        self.assertFalse(request.socio)
+        with self.assertRaises(Http404):
+            socio_actual(request)
+
+    def test_pagos_por_el_enlace(self):
+        respuesta = self.client.get(reverse('pagos_socio'))
+        self.assertEqual([p.socio_id for p in respuesta.context['pagos']], [self.socio.pk])
+
+    def editar(self, rut):
+        admin = Usuario.objects.create_user(
+            rut=f'9999999{rut[-1]}', password='x', nombre='Admin', apellido='A', correo=f'admin{rut}@gym.cl', rol='admin',
+        )
+        self.client.force_login(admin)
+        self.client.post(reverse('editar_socio', args=[self.socio.pk]), {
+            'rut': rut, 'nombre': 'Ana', 'apellido_paterno': 'Soto', 'correo': 'ana@gym.cl', 'estado': 'on',
+        })
+        self.usuario.refresh_from_db()
+
+    def test_editar_no_cambia_el_rut_de_ingreso(self):
+        self.editar('12345678-5')
+        self.assertEqual(self.usuario.rut, '123456785')
+        self.assertTrue(self.client.login(rut='123456785', password='x'))
+
+        # Un RUT distinto sí se traspasa, en el formato de create_user
+        self.editar('7777777-7')
+        self.assertEqual(self.usuario.rut, '77777777')
+
+    def test_crear_socio_reutiliza_solo_cuentas_de_socio_libres(self):
+        profesor = Usuario.objects.create_user(
+            rut='5126663-3', password='x', nombre='Profe', apellido='P', correo='profe@gym.cl', rol='profesor',
+        )
+        libre = Usuario.objects.create_user(
+            rut='6987543-2', password='x', nombre='Luis', apellido='L', correo='luis@gym.cl', rol='socio',
+        )
+        self.editar('12345678-5')  # deja la sesión como admin
+        for rut in ('5126663-3', '6987543-2'):
+            respuesta = self.client.post(reverse('crear_socio'), {
+                'rut': rut, 'nombre': 'N', 'apellido_paterno': 'A', 'correo': f'{rut}@gym.cl',
+                'plan': Plan.objects.get().pk, 'forma_pago': 'efectivo',
+            })
+            self.assertEqual(respuesta.status_code, 302)
+
+        self.assertEqual(
+            dict(Socio.objects.filter(rut__in=['5126663-3', '6987543-2']).values_list('rut', 'usuario_id')),
+            {'5126663-3': None, '6987543-2': libre.pk},
+        )
+        self.assertFalse(hasattr(profesor, 'socio'))
+
+    def test_backfill_por_rut(self):
+        Socio.objects.update(usuario=None)
+        otro = Usuario.objects.create(rut='7654321-6', nombre='Otro', apellido='S', correo='otro@gym.cl')
+        # Cuentas de staff con el RUT de un socio: ni en el cruce exacto ni normalizado
+        Socio.objects.create(rut='9999999-3', nombre='Caro', apellido_paterno='R', correo='caro@gym.cl')
+        Socio.objects.create(rut='5.126.663-3', nombre='Dani', apellido_paterno='L', correo='dani@gym.cl')
+        Usuario.objects.create(rut='9999999-3', nombre='Caro', apellido='R', correo='c@gym.cl', rol='profesor')
+        Usuario.objects.create(rut='51266633', nombre='Dani', apellido='L', correo='d@gym.cl', rol='admin')
+
+        migracion = import_module('apps.socios.migrations.0005_socio_usuario')
+        migracion.enlazar_usuarios(django_apps, None)
+
+        self.assertEqual(
+            dict(Socio.objects.values_list('rut', 'usuario_id')),
+            {'12345678-5': self.usuario.pk, '7654321-6': otro.pk, '9999999-3': None, '5.126.663-3': None},
+        )
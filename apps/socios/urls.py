@@ -5,7 +5,9 @@ from . import views
 urlpatterns = [
     path('', views.lista_socios, name='lista_socios'),
     path('nuevo/', views.crear_socio, name='crear_socio'),
+    path('cargar/', views.carga_socios, name='carga_socios'),
     path('editar/<int:socio_id>/', views.editar_socio, name='editar_socio'),
     path('eliminar/<int:id>/', views.eliminar_socio, name='eliminar_socio'),
+    path('api/directorio/', views.api_directorio_socios, name='api_directorio_socios'),
 
 ]
@@ -1,12 +1,18 @@
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
+from django.views.decorators.http import require_POST
 from datetime import timedelta
 
-from apps.core.utils import formatear_rut
+from apps.core.utils import normalizar_rut, variantes_rut
 from apps.pagos.models import Pago
 from apps.planes.models import Plan, SocioPlan
+from apps.socios.alta_masiva import MAX_FILAS_WEB, ArchivoInvalido, cargar, leer_archivo
+from apps.socios.directorio import TAMANO, pagina_directorio
 from apps.socios.models import Socio
 from apps.users.models import Usuario
 from apps.users.views import es_admin, es_superadmin
@@ -47,56 +53,70 @@ def crear_socio(request):
         if profesor_id:
             profesor_asignado = Usuario.objects.filter(id=profesor_id, rol='profesor').first()
 
-        # ✅ Crear socio completo
-        socio = Socio.objects.create(
-            rut=rut,
-            nombre=nombre,
-            apellido_paterno=apellido_paterno,
-            apellido_materno=apellido_materno,
-            correo=correo,
-            telefono=telefono,
-            fecNac=fecNac,
-            estado=True,
-            profesor_asignado=profesor_asignado,
-            peso=peso,
-            altura=altura,
-            objetivo=objetivo,
-        )
+        plan = Plan.objects.get(id=plan_id)
+
+        # Se reutiliza la cuenta de socio libre con ese RUT. Si el RUT es de otra
+        # cuenta (admin, profesor o ya enlazada) el socio queda sin usuario propio.
+        usuario = Usuario.objects.filter(
+            rut__in=variantes_rut(rut), rol='socio', socio__isnull=True
+        ).first()
+        rut_ocupado = usuario is None and Usuario.objects.filter(rut__in=variantes_rut(rut)).exists()
+
+        # El hash (lento) fuera de la transacción, para no tener la BD bloqueada
+        clave = None if usuario or rut_ocupado else make_password(rut)
 
-        # 🔐 Crear usuario si no existe
-        if not Usuario.objects.filter(rut=rut).exists():
-            Usuario.objects.create(
+        # Todo o nada: usuario, socio, plan y pago
+        with transaction.atomic():
+            # 🔐 Crear usuario si no existe
+            if clave:
+                usuario = Usuario.objects.create(
+                    rut=rut,
+                    nombre=nombre,
+                    apellido=apellido_paterno,
+                    correo=correo,
+                    rol='socio',
+                    password=clave,
+                    is_active=True
+                )
+
+            # ✅ Crear socio completo
+            socio = Socio.objects.create(
                 rut=rut,
                 nombre=nombre,
-                apellido=apellido_paterno,
+                apellido_paterno=apellido_paterno,
+                apellido_materno=apellido_materno,
                 correo=correo,
-                rol='socio',
-                password=make_password(rut),
-                is_active=True
+                telefono=telefono,
+                fecNac=fecNac,
+                estado=True,
+                profesor_asignado=profesor_asignado,
+                peso=peso,
+                altura=altura,
+                objetivo=objetivo,
+                usuario=usuario,
             )
 
-        # 🧾 Asignar plan y pago
-        plan = Plan.objects.get(id=plan_id)
-        fec_inicio = timezone.localdate()
-        fec_fin = fec_inicio + timedelta(days=plan.duracion)
-
-        socio_plan = SocioPlan.objects.create(
-            socio=socio,
-            plan=plan,
-            fecInicio=fec_inicio,
-            fecFin=fec_fin,
-            estado=True
-        )
+            # 🧾 Asignar plan y pago
+            fec_inicio = timezone.localdate()
+            fec_fin = fec_inicio + timedelta(days=plan.duracion)
 
-        Pago.objects.create(
-            socio=socio,
-            plan=plan,
-            socio_plan=socio_plan,
-            monto=plan.precio,
-            forma_pago=forma_pago,
-            observaciones="Pago inicial del plan",
-            estado='completado'
-        )
+            socio_plan = SocioPlan.objects.create(
+                socio=socio,
+                plan=plan,
+                fecInicio=fec_inicio,
+                fecFin=fec_fin,
+                estado=True
+            )
+
+            Pago.objects.create(
+                socio=socio,
+                plan=plan,
+                socio_plan=socio_plan,
+                monto=plan.precio,
+                forma_pago=forma_pago,
+                observaciones="Pago inicial del plan",
+                estado='completado'
+            )
 
         return redirect('/socios/?success=created')
 
@@ -111,17 +131,69 @@ def crear_socio(request):
 @login_required
 @user_passes_test(lambda u: es_admin(u) or es_superadmin(u))
 def lista_socios(request):
-    socios = Socio.objects.select_related('profesor_asignado').order_by('nombre')
-    for s in socios:
-        s.rut_formateado = formatear_rut(s.rut)
-    return render(request, 'socios/lista_socios.html', {'socios': socios})
+    """Solo la página: la tabla se llena de a poco desde api_directorio_socios."""
+    return render(request, 'socios/lista_socios.html', {
+        'profesores': Usuario.objects.filter(rol='profesor').order_by('nombre', 'apellido'),
+        'planes': Plan.objects.order_by('nombre'),
+        'tamano': TAMANO,
+    })
+
+
+@login_required
+@user_passes_test(lambda u: es_admin(u) or es_superadmin(u))
+def api_directorio_socios(request):
+    """
+    Directorio paginado por keyset.
+    GET: q (prefijo de rut / nombre / apellido / correo), estado, profesor,
+    plan, orden (nombre | apellido | rut | recientes), tamano, despues (cursor).
+    """
+    socios, siguiente = pagina_directorio(request.GET)
+    return JsonResponse({'ok': True, 'socios': socios, 'siguiente': siguiente})
+
+
+# --- Carga masiva ---
+@login_required
+@user_passes_test(lambda u: es_admin(u) or es_superadmin(u))
+@require_POST
+def carga_socios(request):
+    """Alta masiva desde CSV / Excel (ver alta_masiva.py)."""
+    archivo = request.FILES.get('archivo')
+    if not archivo:
+        messages.error(request, "Selecciona un archivo.")
+        return redirect('lista_socios')
+
+    try:
+        df = leer_archivo(archivo, nombre=archivo.name)
+    except ArchivoInvalido as e:
+        messages.error(request, f"❌ {e}")
+        return redirect('lista_socios')
+
+    # Los hash de las claves corren dentro de la petición: los lotes grandes
+    # van por el comando cargar_socios (con un proceso por CPU)
+    if len(df) > MAX_FILAS_WEB:
+        messages.error(
+            request,
+            f"❌ El archivo tiene {len(df)} filas; desde aquí se cargan hasta {MAX_FILAS_WEB}. "
+            f"Para lotes más grandes usa: python manage.py cargar_socios <archivo>",
+        )
+        return redirect('lista_socios')
+
+    resultado = cargar(df, procesos=1)
+
+    messages.success(request, f"✅ {resultado['creados']} socios creados correctamente.")
+    errores = resultado['errores']
+    if errores:
+        detalle = "; ".join(f"fila {e['fila']}: {e['error']}" for e in errores[:10])
+        resto = f" (y {len(errores) - 10} más)" if len(errores) > 10 else ""
+        messages.warning(request, f"⚠️ {len(errores)} filas no se cargaron — {detalle}{resto}")
+    return redirect('lista_socios')
 
 
 # --- Editar socio ---
 @login_required
 @user_passes_test(lambda u: es_admin(u) or es_superadmin(u))
 def editar_socio(request, socio_id):
-    socio = get_object_or_404(Socio, id=socio_id)
+    socio = get_object_or_404(Socio.objects.select_related('usuario'), id=socio_id)
     planes = Plan.objects.all()
     profesores = Usuario.objects.filter(rol='profesor', is_active=True).order_by('nombre')
     hoy = timezone.localdate()
@@ -149,7 +221,8 @@ def editar_socio(request, socio_id):
 
         # ⚠️ Validar duplicado de RUT si cambió
         if nuevo_rut != socio.rut:
-            if Socio.objects.filter(rut=nuevo_rut).exclude(id=socio.id).exists():
+            if (Socio.objects.filter(rut=nuevo_rut).exclude(id=socio.id).exists()
+                    or Usuario.objects.filter(rut__in=variantes_rut(nuevo_rut)).exclude(id=socio.usuario_id).exists()):
                 return redirect(f'/socios/editar/{socio.id}/?error=exists')
             socio.rut = nuevo_rut
 
@@ -173,18 +246,25 @@ def editar_socio(request, socio_id):
                     estado=True
                 )
 
-        socio.save()
-
-        # 🔁 Sincronizar usuario asociado
-        try:
-            usuario = Usuario.objects.get(rut=socio.rut)
+        # 🔁 Sincronizar usuario asociado (también el RUT, si cambió); si aún
+        # no tiene, se enlaza el de su RUT o se crea
+        usuario = socio.usuario or Usuario.objects.filter(
+            rut__in=variantes_rut(socio.rut), rol='socio', socio__isnull=True
+        ).first()
+        if usuario:
+            # El RUT del usuario es con el que entra al sistema: solo se toca si
+            # de verdad cambió (no por venir con o sin guion), y como create_user
+            if normalizar_rut(usuario.rut).upper() != normalizar_rut(socio.rut).upper():
+                usuario.rut = normalizar_rut(socio.rut)
             usuario.nombre = socio.nombre
             usuario.apellido = socio.apellido_paterno
             usuario.correo = socio.correo
             usuario.is_active = socio.estado
             usuario.save()
-        except Usuario.DoesNotExist:
-            Usuario.objects.create(
+            socio.usuario = usuario
+        elif not Usuario.objects.filter(rut__in=variantes_rut(socio.rut)).exists():
+            # Si el RUT es de otra cuenta (admin, profesor) queda sin usuario propio
+            socio.usuario = Usuario.objects.create(
                 rut=socio.rut,
                 nombre=socio.nombre,
                 apellido=socio.apellido_paterno,
@@ -194,6 +274,8 @@ def editar_socio(request, socio_id):
                 is_active=socio.estado
             )
 
+        socio.save()
+
         return redirect('/socios/?success=updated')
 
     return render(request, 'socios/editar_socio.html', {
@@ -208,7 +290,7 @@ def editar_socio(request, socio_id):
 @user_passes_test(lambda u: es_admin(u) or es_superadmin(u))
 def eliminar_socio(request, id):
     socio = get_object_or_404(Socio, id=id)
-    from apps.users.models import Usuario
-    Usuario.objects.filter(rut=socio.rut).delete()
+    if socio.usuario_id:
+        Usuario.objects.filter(id=socio.usuario_id).delete()
     socio.delete()
     return redirect('/socios/?success=deleted')
@@ -1,16 +1,48 @@
 from django.contrib import admin
-from .models import Taller, InscripcionTaller
+from django.utils import timezone
+from .horarios import materializar_horarios
+from .models import HorarioTaller, Taller, InscripcionTaller, ListaEspera, NotificacionTaller, SesionCancelada
 
 
 # ============ Talleres ============
 
 @admin.register(Taller)
 class TallerAdmin(admin.ModelAdmin):
-    list_display = ('nombre', 'profesor', 'fecha', 'hora_inicio', 'hora_fin', 'cupos', 'activo')
+    list_display = ('nombre', 'profesor', 'fecha', 'hora_inicio', 'hora_fin', 'cupos', 'inscritos', 'activo')
     list_filter = ('activo', 'profesor', 'fecha')
     search_fields = ('nombre', 'profesor__nombre')
     ordering = ('fecha', 'hora_inicio')
     list_per_page = 20
+    actions = ['recalcular_inscritos']
+
+    @admin.action(description="Recalcular inscritos desde las inscripciones")
+    def recalcular_inscritos(self, request, queryset):
+        # Para corregir el contador si se editaron inscripciones a mano aquí
+        self.message_user(request, f"{queryset.recalcular_inscritos()} taller(es) recalculados.")
+
+
+# ============ Horarios semanales ============
+
+@admin.register(HorarioTaller)
+class HorarioTallerAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'profesor', 'dia_semana', 'hora_inicio', 'hora_fin', 'cupos', 'fecha_desde', 'fecha_hasta', 'activo')
+    list_filter = ('activo', 'dia_semana', 'profesor')
+    search_fields = ('nombre', 'profesor__nombre')
+    list_per_page = 20
+    actions = ['generar_sesiones']
+
+    @admin.action(description="Generar sesiones de las próximas semanas")
+    def generar_sesiones(self, request, queryset):
+        talleres = materializar_horarios(horarios=queryset)
+        self.message_user(request, f"{len(talleres)} sesión(es) creadas.")
+
+
+@admin.register(SesionCancelada)
+class SesionCanceladaAdmin(admin.ModelAdmin):
+    # Borrar una fila deja que el generador vuelva a crear esa sesión
+    list_display = ('horario', 'fecha')
+    list_filter = ('horario',)
+    date_hierarchy = 'fecha'
 
 
 # ============ Inscripciones ============
@@ -22,3 +54,38 @@ class InscripcionTallerAdmin(admin.ModelAdmin):
     search_fields = ('socio__nombre', 'taller__nombre')
     date_hierarchy = 'fec_registro'
     list_per_page = 20
+
+
+# ============ Lista de espera ============
+
+@admin.register(ListaEspera)
+class ListaEsperaAdmin(admin.ModelAdmin):
+    list_display = ('taller', 'posicion', 'socio', 'fec_registro')
+    list_filter = ('taller',)
+    search_fields = ('socio__nombre', 'taller__nombre')
+    # La posición la mantiene inscripciones.py; editarla a mano rompería la cola
+    readonly_fields = ('taller', 'socio', 'posicion')
+    list_per_page = 20
+
+    def has_add_permission(self, request):
+        return False
+
+
+# ============ Notificaciones ============
+
+@admin.register(NotificacionTaller)
+class NotificacionTallerAdmin(admin.ModelAdmin):
+    list_display = ('tipo', 'destinatario', 'asunto', 'estado', 'intentos', 'fec_creacion', 'fec_envio')
+    list_filter = ('estado', 'tipo')
+    search_fields = ('destinatario', 'asunto')
+    readonly_fields = [f.name for f in NotificacionTaller._meta.fields]
+    list_per_page = 20
+    actions = ['reintentar']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Reintentar envío")
+    def reintentar(self, request, queryset):
+        n = queryset.exclude(estado='enviada').update(estado='pendiente', intentos=0, proximo_intento=timezone.now())
+        self.message_user(request, f"{n} aviso(s) vuelven a la cola.")
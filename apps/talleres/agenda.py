@@ -0,0 +1,148 @@
+from calendar import monthrange
+from datetime import date
+from itertools import groupby
+
+from django.db import transaction
+
+from apps.core.utils import a_fecha, a_hora, bloquear_fila
+from apps.users.models import Usuario
+from .models import SesionCancelada, Taller
+from .notificaciones import encolar_cambio, encolar_cancelacion
+
+
+class ChoqueProfesor(Exception):
+    """El profesor ya tiene otro taller que se solapa con ese horario."""
+
+    def __init__(self, talleres):
+        self.talleres = talleres
+        detalle = ", ".join(
+            f"{t.nombre} {t.hora_inicio:%H:%M}-{t.hora_fin:%H:%M}" for t in talleres
+        )
+        super().__init__(f"El profesor ya tiene un taller en ese horario: {detalle}")
+
+
+# ============================
+#   CHOQUE PUNTUAL
+# ============================
+
+def choques_profesor(profesor_id, fecha, hora_inicio, hora_fin, excluir_id=None):
+    """
+    Talleres activos del profesor que se solapan con [hora_inicio, hora_fin)
+    en `fecha`. Resuelve con el índice (profesor, fecha, hora_inicio, hora_fin).
+    """
+    return list(
+        Taller.objects.filter(
+            profesor_id=profesor_id,
+            fecha=fecha,
+            activo=True,
+            hora_inicio__lt=hora_fin,
+            hora_fin__gt=hora_inicio,
+        ).exclude(pk=excluir_id)
+    )
+
+
+def guardar_taller(*, profesor, nombre, cupos, fecha, hora_inicio, hora_fin, taller=None):
+    """
+    Crea (o actualiza si se pasa `taller`) un taller verificando que el
+    profesor no quede en dos sesiones a la vez.
+
+    La verificación y el guardado ocurren en la misma transacción, con la fila
+    del profesor bloqueada (bloquear_fila). Lanza ChoqueProfesor si hay
+    solapamiento y ValueError si la fecha u horas son inválidas.
+
+    Si un taller existente cambia de fecha u horario, encola el aviso a los
+    inscritos en la misma transacción (notificaciones.py).
+    """
+    fecha = a_fecha(fecha)
+    hora_inicio = a_hora(hora_inicio)
+    hora_fin = a_hora(hora_fin)
+    if hora_fin <= hora_inicio:
+        raise ValueError("La hora de término debe ser posterior a la de inicio.")
+
+    with transaction.atomic():
+        bloquear_fila(Usuario, profesor.pk)
+
+        choques = choques_profesor(
+            profesor.pk, fecha, hora_inicio, hora_fin, excluir_id=taller.pk if taller else None
+        )
+        if choques:
+            raise ChoqueProfesor(choques)
+
+        if taller is None:
+            taller = Taller(activo=True)
+            antes = None
+        else:
+            # El horario previo se lee de la fila bloqueada, no de la instancia:
+            # un doble envío del formulario ya no ve cambio y no avisa dos veces
+            fila = (
+                Taller.objects.select_for_update().filter(pk=taller.pk)
+                .values_list('fecha', 'hora_inicio', 'hora_fin', 'cambios_horario').first()
+            )
+            antes = fila[:3] if fila else None
+            if antes and antes != (fecha, hora_inicio, hora_fin):
+                taller.cambios_horario = fila[3] + 1  # número del cambio: identifica su aviso
+
+        taller.nombre = nombre
+        taller.profesor = profesor
+        taller.cupos = int(cupos)
+        taller.fecha = fecha
+        taller.hora_inicio = hora_inicio
+        taller.hora_fin = hora_fin
+        taller.save()
+
+        if antes:
+            encolar_cambio(taller, antes)
+
+    return taller
+
+
+def eliminar_taller(taller):
+    """
+    Elimina el taller encolando el aviso de cancelación a sus inscritos. Si es
+    una sesión de un horario semanal, la fecha queda como cancelada para que
+    materializar_horarios no la vuelva a crear.
+    """
+    with transaction.atomic():
+        # Si otra petición ya lo eliminó no hay nada que avisar
+        if not Taller.objects.select_for_update().filter(pk=taller.pk).exists():
+            return
+        encolar_cancelacion(taller)
+        if taller.horario_id:
+            SesionCancelada.objects.get_or_create(horario_id=taller.horario_id, fecha=taller.fecha)
+        taller.delete()
+
+
+# ============================
+#   VALIDACIÓN DEL MES
+# ============================
+
+def choques_del_mes(anio, mes, profesor_id=None):
+    """
+    Revisa todos los talleres activos del mes en una pasada: una consulta
+    ordenada por (profesor, fecha, hora_inicio) y un barrido por grupo que
+    lleva el taller con el mayor fin visto. Si el siguiente empieza antes de
+    ese fin, chocan. Incluye las sesiones creadas por horarios.py, que no
+    pasan por guardar_taller.
+
+    Devuelve pares [(taller_a, taller_b), ...]; todo taller que choca aparece
+    al menos en uno.
+    """
+    inicio = date(anio, mes, 1)
+    fin = date(anio, mes, monthrange(anio, mes)[1])
+
+    talleres = Taller.objects.filter(activo=True, fecha__range=(inicio, fin))
+    if profesor_id:
+        talleres = talleres.filter(profesor_id=profesor_id)
+    talleres = talleres.order_by('profesor_id', 'fecha', 'hora_inicio').only(
+        'id_taller', 'nombre', 'profesor_id', 'fecha', 'hora_inicio', 'hora_fin'
+    )
+
+    choques = []
+    for _, grupo in groupby(talleres.iterator(), key=lambda t: (t.profesor_id, t.fecha)):
+        abierto = None  # taller con el mayor hora_fin hasta ahora
+        for taller in grupo:
+            if abierto and taller.hora_inicio < abierto.hora_fin:
+                choques.append((abierto, taller))
+            if abierto is None or taller.hora_fin > abierto.hora_fin:
+                abierto = taller
+    return choques
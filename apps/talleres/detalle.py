@@ -0,0 +1,92 @@
+from django.core.cache import cache
+from django.db.models import Max, OuterRef, Subquery
+
+from .models import InscripcionTaller, ListaEspera, Taller
+
+
+# ============================
+#   DETALLE DEL TALLER (modal)
+# ============================
+# La parte común a todos los usuarios (taller, profesor e inscripciones) se
+# arma con dos consultas y se guarda unos segundos en caché; lo propio de
+# quien consulta (su inscripción, si puede gestionar) se resuelve en memoria.
+# signals.py borra la entrada al confirmar cualquier cambio de inscripciones,
+# lista de espera o del taller.
+
+DETALLE_TTL = 30  # segundos
+
+
+def clave_detalle(taller_id):
+    return f"talleres:detalle:v2:{taller_id}"  # v2: inscripciones con socio__usuario_id
+
+
+def invalidar_detalle(taller_id):
+    cache.delete(clave_detalle(taller_id))
+
+
+def _armar_detalle(taller_id):
+    """Consulta 1: taller + profesor + largo de la cola. Consulta 2: inscripciones."""
+    ultima_posicion = ListaEspera.objects.filter(
+        taller=OuterRef('pk')
+    ).values('taller').annotate(m=Max('posicion')).values('m')
+
+    taller = (
+        Taller.objects.con_inscritos()
+        .annotate(en_espera=Subquery(ultima_posicion))
+        .filter(id_taller=taller_id)
+        .first()
+    )
+    if taller is None:
+        return None
+
+    inscripciones = list(
+        InscripcionTaller.objects.filter(taller_id=taller_id).values(
+            'id', 'socio_id', 'socio__nombre', 'socio__apellido_paterno', 'socio__usuario_id',
+            'estado', 'asistencia',
+        )
+    )
+
+    return {
+        'id': taller.id_taller,
+        'nombre': taller.nombre,
+        'profesor_id': taller.profesor_id,
+        'profesor': f"{taller.profesor.nombre} {getattr(taller.profesor, 'apellido', '')}",
+        'cupos': taller.cupos,
+        'inscritos': taller.inscritos,
+        'cupos_disponibles': taller.cupos_disponibles,
+        'en_espera': taller.en_espera or 0,
+        'fecha': taller.fecha.strftime('%Y-%m-%d'),
+        'hora_inicio': taller.hora_inicio.strftime('%H:%M'),
+        'hora_fin': taller.hora_fin.strftime('%H:%M'),
+        'inscripciones': inscripciones,
+    }
+
+
+def detalle_taller(taller_id):
+    """Payload común del taller (desde caché si está). None si no existe."""
+    clave = clave_detalle(taller_id)
+    datos = cache.get(clave)
+    if datos is None:
+        datos = _armar_detalle(taller_id)
+        if datos is not None:
+            cache.set(clave, datos, DETALLE_TTL)
+    return datos
+
+
+def detalle_para(datos, usuario_id=None):
+    """
+    Completa el payload común con lo del usuario que consulta: `alumnos`
+    (solo inscritos, sin su usuario) y su inscripción si `usuario_id` es de un socio.
+    """
+    datos = dict(datos)
+    inscripciones = datos.pop('inscripciones')
+
+    datos['alumnos'] = [
+        {k: v for k, v in insc.items() if k not in ('socio__usuario_id', 'estado')}
+        for insc in inscripciones
+        if insc['estado'] == 'inscrito'
+    ]
+    datos['mi_inscripcion_id'] = next(
+        (insc['id'] for insc in inscripciones if usuario_id and insc['socio__usuario_id'] == usuario_id), None
+    )
+    return datos
@@ -0,0 +1,157 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import (
+    EstadisticaAsistenciaGlobal, EstadisticaAsistenciaProfesor, EstadisticaAsistenciaSocio,
+    EstadisticaAsistenciaTaller, InscripcionTaller, Taller,
+)
+
+
+# asistencia → columna del conteo
+CAMPOS = {'presente': 'presentes', 'ausente': 'ausentes', 'pendiente': 'pendientes'}
+
+
+# ============================
+#   MANTENCIÓN INCREMENTAL
+# ============================
+# Solo cuentan las inscripciones activas: una inscripción "aporta" +1 a la
+# columna de su asistencia mientras esté en estado 'inscrito'. Cada cambio se
+# traduce en un delta (-1 al estado anterior, +1 al nuevo) que se aplica con
+# UPDATE ... SET col = col + n, agrupando las filas que reciben el mismo delta.
+# Los deltas por taller se suman también en la fila de su profesor y en la fila
+# global, así los paneles leen una sola fila en vez de sumar todos los talleres.
+
+def delta(antes, despues):
+    """
+    Delta de conteos entre dos estados (estado, asistencia) de una inscripción;
+    None = no existía / ya no existe.
+    """
+    cambio = Counter()
+    if antes and antes[0] == 'inscrito':
+        cambio[CAMPOS[antes[1]]] -= 1
+    if despues and despues[0] == 'inscrito':
+        cambio[CAMPOS[despues[1]]] += 1
+    return Counter({col: n for col, n in cambio.items() if n})  # pendiente → pendiente no cambia nada
+
+
+def _aplicar(modelo, deltas, crear):
+    por_firma = defaultdict(list)
+    for pk, cambio in deltas.items():
+        firma = tuple(sorted((col, n) for col, n in cambio.items() if n))
+        if firma:
+            por_firma[firma].append(pk)
+    if not por_firma:
+        return
+
+    if crear:
+        # Filas que aún no existen (primera inscripción del taller / socio)
+        campo_pk = modelo._meta.pk.attname
+        modelo.objects.bulk_create(
+            [modelo(**{campo_pk: pk}) for pks in por_firma.values() for pk in pks],
+            ignore_conflicts=True,
+        )
+    for firma, pks in por_firma.items():
+        modelo.objects.filter(pk__in=pks).update(**{col: F(col) + n for col, n in firma})
+
+
+def _sumar(cambios):
+    total = Counter()
+    for cambio in cambios:
+        total.update(cambio)  # update suma también los negativos
+    return total
+
+
+def aplicar_deltas(por_taller, por_socio, crear=True):
+    """
+    Aplica {taller_id: Counter} y {socio_id: Counter} en la transacción en curso,
+    más sus sumas por profesor y global. `crear=False` en borrados: no recrea
+    filas de un taller / socio / profesor que se está eliminando en cascada.
+    """
+    por_taller = {pk: cambio for pk, cambio in por_taller.items() if cambio}
+    with transaction.atomic():
+        _aplicar(EstadisticaAsistenciaTaller, por_taller, crear)
+        _aplicar(EstadisticaAsistenciaSocio, por_socio, crear)
+        if not por_taller:
+            return
+
+        # En una cascada el taller se borra después de sus inscripciones: aquí sigue
+        profesores = dict(Taller.objects.filter(pk__in=por_taller).values_list('pk', 'profesor_id'))
+        por_profesor = defaultdict(list)
+        for taller_id, cambio in por_taller.items():
+            por_profesor[profesores.get(taller_id)].append(cambio)
+        por_profesor.pop(None, None)
+        _aplicar(EstadisticaAsistenciaProfesor, {pk: _sumar(c) for pk, c in por_profesor.items()}, crear)
+        _aplicar(EstadisticaAsistenciaGlobal, {EstadisticaAsistenciaGlobal.GLOBAL: _sumar(por_taller.values())}, True)
+
+
+def registrar_cambio(taller_id, socio_id, antes, despues):
+    """Atajo para una sola inscripción (lo usan las señales)."""
+    cambio = delta(antes, despues)
+    if cambio:
+        aplicar_deltas({taller_id: cambio}, {socio_id: cambio}, crear=despues is not None)
+
+
+def cambiar_profesor(taller_id, antes, despues):
+    """El taller cambió de profesor: sus conteos pasan de la fila de uno a la del otro."""
+    fila = EstadisticaAsistenciaTaller.objects.filter(pk=taller_id).values(*CAMPOS.values()).first()
+    if not fila or not any(fila.values()):
+        return
+    with transaction.atomic():
+        _aplicar(EstadisticaAsistenciaProfesor, {
+            antes: Counter({col: -n for col, n in fila.items()}),
+            despues: Counter(fila),
+        }, crear=True)
+
+
+# ============================
+#   RECONSTRUCCIÓN
+# ============================
+
+def _conteos():
+    return {
+        columna: Count('id', filter=Q(asistencia=valor))
+        for valor, columna in CAMPOS.items()
+    }
+
+
+def reconstruir():
+    """Recalcula todas las tablas desde cero. Devuelve (talleres, socios)."""
+    activas = InscripcionTaller.objects.filter(estado='inscrito').order_by()
+    with transaction.atomic():
+        for modelo in (EstadisticaAsistenciaTaller, EstadisticaAsistenciaSocio,
+                       EstadisticaAsistenciaProfesor, EstadisticaAsistenciaGlobal):
+            modelo.objects.all().delete()
+        talleres = EstadisticaAsistenciaTaller.objects.bulk_create(
+            EstadisticaAsistenciaTaller(**fila) for fila in activas.values('taller_id').annotate(**_conteos())
+        )
+        socios = EstadisticaAsistenciaSocio.objects.bulk_create(
+            EstadisticaAsistenciaSocio(**fila) for fila in activas.values('socio_id').annotate(**_conteos())
+        )
+        EstadisticaAsistenciaProfesor.objects.bulk_create(
+            EstadisticaAsistenciaProfesor(**fila)
+            for fila in activas.values(profesor_id=F('taller__profesor_id')).annotate(**_conteos())
+        )
+        EstadisticaAsistenciaGlobal.objects.create(
+            pk=EstadisticaAsistenciaGlobal.GLOBAL, **activas.aggregate(**_conteos())
+        )
+    return len(talleres), len(socios)
+
+
+# ============================
+#   KPIs
+# ============================
+
+def totales_globales():
+    """Fila de totales de todos los talleres (en cero si aún no hay)."""
+    GLOBAL = EstadisticaAsistenciaGlobal.GLOBAL
+    return EstadisticaAsistenciaGlobal.objects.filter(pk=GLOBAL).first() or EstadisticaAsistenciaGlobal(pk=GLOBAL)
+
+
+def totales_profesor(profesor_id):
+    """Fila de totales de los talleres de un profesor (en cero si aún no hay)."""
+    return (
+        EstadisticaAsistenciaProfesor.objects.filter(pk=profesor_id).first()
+        or EstadisticaAsistenciaProfesor(profesor_id=profesor_id)
+    )
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import HorarioTaller, SesionCancelada, Taller
+from .signals import talleres_creados_en_lote
+
+
+# Cuántas semanas hacia adelante se materializan por defecto
+SEMANAS_ADELANTE = 4
+
+
+def fechas_horario(horario, desde, hasta):
+    """Fechas del día de semana del horario entre `desde` y `hasta` (inclusive), dentro de su vigencia."""
+    desde = max(desde, horario.fecha_desde)
+    if horario.fecha_hasta:
+        hasta = min(hasta, horario.fecha_hasta)
+
+    fecha = desde + timedelta(days=(horario.dia_semana - desde.weekday()) % 7)
+    fechas = []
+    while fecha <= hasta:
+        fechas.append(fecha)
+        fecha += timedelta(weeks=1)
+    return fechas
+
+
+def materializar_horarios(semanas=SEMANAS_ADELANTE, horarios=None, hoy=None):
+    """
+    Crea las sesiones (Taller) de `horarios` (queryset; por defecto los
+    activos) desde hoy hasta `semanas` semanas adelante. Las fechas que ya
+    tienen sesión se saltan, así se puede correr todos los días y solo agrega
+    la semana que entra; también las canceladas (SesionCancelada), para no
+    deshacer una cancelación.
+
+    Una consulta para las fechas ocupadas y un bulk_create para las nuevas.
+    Devuelve la lista de talleres creados.
+    """
+    hoy = hoy or timezone.localdate()
+    hasta = hoy + timedelta(weeks=semanas)
+
+    if horarios is None:
+        horarios = HorarioTaller.objects.filter(activo=True)
+    horarios = list(horarios.select_related('profesor'))
+    if not horarios:
+        return []
+
+    with transaction.atomic():
+        existentes = set(
+            Taller.objects.filter(
+                horario__in=horarios, fecha__range=(hoy, hasta)
+            ).order_by().values_list('horario_id', 'fecha').union(
+                SesionCancelada.objects.filter(
+                    horario__in=horarios, fecha__range=(hoy, hasta)
+                ).order_by().values_list('horario_id', 'fecha')
+            )
+        )
+
+        nuevos = [
+            Taller(
+                nombre=h.nombre,
+                descripcion=h.descripcion,
+                profesor=h.profesor,
+                cupos=h.cupos,
+                fecha=fecha,
+                hora_inicio=h.hora_inicio,
+                hora_fin=h.hora_fin,
+                horario=h,
+                activo=True,
+            )
+            for h in horarios
+            for fecha in fechas_horario(h, hoy, hasta)
+            if (h.pk, fecha) not in existentes
+        ]
+
+        talleres = Taller.objects.bulk_create(nuevos)
+        if talleres:
+            talleres_creados_en_lote.send(sender=Taller, talleres=talleres)
+
+    return talleres
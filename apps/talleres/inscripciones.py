@@ -0,0 +1,215 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F, Max
+
+from apps.core.utils import bloquear_fila
+
+from .detalle import invalidar_detalle
+from .estadisticas import aplicar_deltas, delta
+from .models import InscripcionTaller, ListaEspera, Taller
+
+
+class SinCupos(Exception):
+    """El taller ya no tiene cupos disponibles."""
+
+
+class AsistenciaInvalida(ValueError):
+    """Valores o inscripciones que no corresponden al taller."""
+
+
+# ============================
+#   CONTADOR DE CUPOS
+# ============================
+# Taller.inscritos se mueve solo con UPDATE condicionales: la condición y el
+# incremento los evalúa la BD en una sola sentencia, así dos inscripciones
+# simultáneas nunca ven el mismo cupo libre.
+
+def ocupar_cupo(taller_id):
+    """Toma un cupo si queda alguno. Devuelve False si el taller está lleno."""
+    return bool(
+        Taller.objects
+        .filter(pk=taller_id, inscritos__lt=F('cupos'))
+        .update(inscritos=F('inscritos') + 1)
+    )
+
+
+def liberar_cupo(taller_id):
+    """Devuelve un cupo al taller (nunca baja de cero)."""
+    Taller.objects.filter(pk=taller_id, inscritos__gt=0).update(inscritos=F('inscritos') - 1)
+
+
+# ============================
+#   INSCRIBIR / ELIMINAR
+# ============================
+
+def inscribir(socio, taller):
+    """
+    Inscribe al socio en el taller, o reactiva su inscripción cancelada.
+
+    Tomar el cupo y guardar la inscripción ocurren en la misma transacción:
+    si el insert falla (p. ej. unique socio+taller por una carrera) el cupo se
+    revierte con él. Si el socio ya estaba inscrito no consume otro cupo.
+    Lanza SinCupos si el taller está lleno.
+    """
+    with transaction.atomic():
+        insc = (
+            InscripcionTaller.objects.select_for_update()
+            .filter(socio=socio, taller=taller)
+            .first()
+        )
+        if insc and insc.estado == 'inscrito':
+            return insc
+
+        if not ocupar_cupo(taller.pk):
+            raise SinCupos("No hay cupos disponibles")
+
+        if insc:
+            insc.estado = 'inscrito'
+            insc.save(update_fields=['estado'])
+        else:
+            insc = InscripcionTaller.objects.create(socio=socio, taller=taller, estado='inscrito')
+
+    return insc
+
+
+def eliminar_inscripcion(insc):
+    """
+    Borra la inscripción y, en la misma transacción, promueve a la cabeza de
+    la lista de espera. El cupo lo libera la señal post_delete (signals.py),
+    que también cubre el borrado en cascada al eliminar un socio.
+    Devuelve las inscripciones promovidas.
+    """
+    with transaction.atomic():
+        insc.delete()
+        return promover(insc.taller_id)
+
+
+# ============================
+#   LISTA DE ESPERA
+# ============================
+# Invariante: si hay cola, el taller está lleno. Todo lo que libera cupos
+# (eliminar, subir cupos) llama a promover(), así nadie se salta la
+# cola inscribiéndose directo. La cola y los cupos se mueven con la fila del
+# taller bloqueada (bloquear_fila), de a una operación por taller.
+
+def inscribir_o_encolar(socio, taller):
+    """
+    Inscribe al socio o, si el taller está lleno, lo pone al final de la cola.
+    Devuelve (inscripción, None) o (None, entrada de ListaEspera).
+    """
+    with transaction.atomic():
+        bloquear_fila(Taller, taller.pk)
+        try:
+            return inscribir(socio, taller), None
+        except SinCupos:
+            return None, encolar(socio, taller)
+
+
+def encolar(socio, taller):
+    """Agrega al socio al final de la cola (idempotente: si ya está, no se mueve)."""
+    with transaction.atomic():
+        bloquear_fila(Taller, taller.pk)
+        espera = ListaEspera.objects.filter(taller=taller, socio=socio).first()
+        if espera:
+            return espera
+        ultima = ListaEspera.objects.filter(taller=taller).aggregate(m=Max('posicion'))['m'] or 0
+        return ListaEspera.objects.create(taller=taller, socio=socio, posicion=ultima + 1)
+
+
+def salir_de_espera(socio, taller):
+    """Quita al socio de la cola; los de atrás avanzan (señal post_delete)."""
+    with transaction.atomic():
+        bloquear_fila(Taller, taller.pk)
+        borradas, _ = ListaEspera.objects.filter(taller=taller, socio=socio).delete()
+    return bool(borradas)
+
+
+def promover(taller_id):
+    """Mientras queden cupos y cola, inscribe a la cabeza. Devuelve las inscripciones creadas."""
+    promovidos = []
+    with transaction.atomic():
+        bloquear_fila(Taller, taller_id)
+        while True:
+            cabeza = (
+                ListaEspera.objects.filter(taller_id=taller_id)
+                .select_related('socio', 'taller')
+                .order_by('posicion')
+                .first()
+            )
+            if cabeza is None:
+                break
+            try:
+                promovidos.append(inscribir(cabeza.socio, cabeza.taller))
+            except SinCupos:
+                break
+            cabeza.delete()
+    return promovidos
+
+
+def posicion_en_espera(socio, taller_id):
+    """Posición del socio en la cola (None si no está). Lectura directa por índice."""
+    return (
+        ListaEspera.objects.filter(taller_id=taller_id, socio=socio)
+        .values_list('posicion', flat=True)
+        .first()
+    )
+
+
+def largo_espera(taller_id):
+    """Cantidad de socios en cola: la última posición (las posiciones son densas)."""
+    return ListaEspera.objects.filter(taller_id=taller_id).aggregate(m=Max('posicion'))['m'] or 0
+
+
+# ============================
+#   ASISTENCIA EN LOTE
+# ============================
+
+def marcar_asistencia(taller, cambios):
+    """
+    Aplica {inscripcion_id: asistencia} a las inscripciones del taller con un
+    UPDATE por valor distinto (a lo más tres), todo en una transacción.
+
+    Lanza AsistenciaInvalida (sin tocar nada) si algún valor no es válido o
+    alguna inscripción no es del taller. Devuelve la cantidad actualizada.
+    """
+    validos = dict(InscripcionTaller.ASISTENCIA)
+    por_valor = defaultdict(set)
+    for insc_id, valor in cambios.items():
+        if valor not in validos:
+            raise AsistenciaInvalida(f"Valor inválido: {valor}")
+        try:
+            por_valor[valor].add(int(insc_id))
+        except (TypeError, ValueError):
+            raise AsistenciaInvalida(f"Inscripción inválida: {insc_id}")
+
+    ids = set().union(*por_valor.values())
+    with transaction.atomic():
+        filas = {
+            insc_id: (socio_id, estado, asistencia)
+            for insc_id, socio_id, estado, asistencia in InscripcionTaller.objects.filter(
+                taller=taller, id__in=ids
+            ).values_list('id', 'socio_id', 'estado', 'asistencia')
+        }
+        if ids - filas.keys():
+            raise AsistenciaInvalida(
+                "Inscripciones que no son de este taller: " + ", ".join(map(str, sorted(ids - filas.keys())))
+            )
+
+        actualizadas = sum(
+            InscripcionTaller.objects.filter(taller=taller, id__in=grupo).update(asistencia=valor)
+            for valor, grupo in por_valor.items()
+        )
+
+        # update() no emite señales: estadísticas y detalle cacheado se actualizan aquí
+        del_taller, por_socio = Counter(), defaultdict(Counter)
+        for valor, grupo in por_valor.items():
+            for insc_id in grupo:
+                socio_id, estado, anterior = filas[insc_id]
+                cambio = delta((estado, anterior), (estado, valor))
+                del_taller.update(cambio)
+                por_socio[socio_id].update(cambio)
+        aplicar_deltas({taller.pk: del_taller}, por_socio)
+        transaction.on_commit(lambda: invalidar_detalle(taller.pk))
+
+    return actualizadas
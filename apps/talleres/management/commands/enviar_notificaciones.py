@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from apps.talleres.notificaciones import LOTE, enviar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los avisos pendientes de cambios y cancelaciones de talleres, en "
+        "lotes de una conexión cada uno. Pensado para correr cada minuto (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=LOTE)
+
+    def handle(self, *args, **options):
+        total_enviados = total_fallidos = 0
+        while True:
+            enviados, fallidos = enviar_pendientes(lote=options['lote'])
+            total_enviados += enviados
+            total_fallidos += fallidos
+            # Los fallidos quedan para más adelante: no se reintentan en esta corrida
+            if enviados + fallidos < options['lote']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{total_enviados} aviso(s) enviados, {total_fallidos} con error (se reintentarán)."
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from apps.talleres.horarios import SEMANAS_ADELANTE, materializar_horarios
+from apps.talleres.models import HorarioTaller
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea las sesiones (Taller) de los horarios semanales activos para las "
+        "próximas N semanas. Es incremental: pensado para correr a diario (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semanas', type=int, default=SEMANAS_ADELANTE)
+        parser.add_argument('--horario', type=int, action='append', dest='horarios',
+                            help="Solo estos horarios (id); se puede repetir.")
+
+    def handle(self, *args, **options):
+        horarios = HorarioTaller.objects.filter(activo=True)
+        if options['horarios']:
+            horarios = horarios.filter(pk__in=options['horarios'])
+
+        talleres = materializar_horarios(semanas=options['semanas'], horarios=horarios)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(talleres)} sesión(es) creadas para las próximas {options['semanas']} semanas."
+        ))
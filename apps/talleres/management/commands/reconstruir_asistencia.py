@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.talleres.estadisticas import reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula desde cero las estadísticas de asistencia por taller y por "
+        "socio (backfill o reparación; en régimen normal se mantienen solas)."
+    )
+
+    def handle(self, *args, **options):
+        talleres, socios = reconstruir()
+        self.stdout.write(self.style.SUCCESS(
+            f"Estadísticas reconstruidas: {talleres} taller(es), {socios} socio(s)."
+        ))
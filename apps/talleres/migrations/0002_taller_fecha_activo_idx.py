@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talleres', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taller',
+            index=models.Index(fields=['fecha', 'activo'], name='taller_fecha_activo_idx'),
+        ),
+    ]
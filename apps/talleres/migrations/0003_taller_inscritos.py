@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def contar_inscritos(apps, schema_editor):
+    """Carga el contador con las inscripciones activas que ya existían."""
+    Taller = apps.get_model('talleres', 'Taller')
+    InscripcionTaller = apps.get_model('talleres', 'InscripcionTaller')
+    activos = InscripcionTaller.objects.filter(
+        taller=OuterRef('pk'), estado='inscrito'
+    ).values('taller').annotate(total=Count('id')).values('total')
+    Taller.objects.update(inscritos=Coalesce(Subquery(activos), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talleres', '0002_taller_fecha_activo_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taller',
+            name='inscritos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(contar_inscritos, migrations.RunPython.noop),
+    ]
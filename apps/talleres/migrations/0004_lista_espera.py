@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0003_socio_profesor_asignado'),
+        ('talleres', '0003_taller_inscritos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListaEspera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicion', models.PositiveIntegerField()),
+                ('fec_registro', models.DateTimeField(auto_now_add=True)),
+                ('socio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='esperas_taller', to='socios.socio')),
+                ('taller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lista_espera', to='talleres.taller')),
+            ],
+            options={
+                'verbose_name': 'Lista de espera',
+                'verbose_name_plural': 'Listas de espera',
+                'ordering': ['taller', 'posicion'],
+                'indexes': [models.Index(fields=['taller', 'posicion'], name='espera_taller_posicion_idx')],
+                'unique_together': {('taller', 'socio')},
+            },
+        ),
+    ]
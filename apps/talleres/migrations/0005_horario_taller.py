@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talleres', '0004_lista_espera'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HorarioTaller',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('descripcion', models.TextField(blank=True, null=True)),
+                ('cupos', models.PositiveIntegerField(default=10)),
+                ('dia_semana', models.PositiveSmallIntegerField(choices=[(0, 'Lunes'), (1, 'Martes'), (2, 'Miércoles'), (3, 'Jueves'), (4, 'Viernes'), (5, 'Sábado'), (6, 'Domingo')])),
+                ('hora_inicio', models.TimeField()),
+                ('hora_fin', models.TimeField()),
+                ('fecha_desde', models.DateField()),
+                ('fecha_hasta', models.DateField(blank=True, null=True)),
+                ('activo', models.BooleanField(default=True)),
+                ('profesor', models.ForeignKey(limit_choices_to={'rol': 'profesor'}, on_delete=django.db.models.deletion.PROTECT, related_name='horarios_taller', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Horario de taller',
+                'verbose_name_plural': 'Horarios de talleres',
+                'ordering': ['dia_semana', 'hora_inicio'],
+            },
+        ),
+        migrations.AddField(
+            model_name='taller',
+            name='horario',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='talleres', to='talleres.horariotaller'),
+        ),
+        migrations.AddConstraint(
+            model_name='taller',
+            constraint=models.UniqueConstraint(fields=('horario', 'fecha'), name='taller_horario_fecha_uniq'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talleres', '0005_horario_taller'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taller',
+            index=models.Index(fields=['profesor', 'fecha', 'hora_inicio', 'hora_fin'], name='taller_profesor_horario_idx'),
+        ),
+    ]
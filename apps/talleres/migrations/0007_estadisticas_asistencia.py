@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def cargar_estadisticas(apps, schema_editor):
+    """Conteos iniciales desde las inscripciones activas existentes."""
+    InscripcionTaller = apps.get_model('talleres', 'InscripcionTaller')
+    conteos = {
+        'presentes': Count('id', filter=Q(asistencia='presente')),
+        'ausentes': Count('id', filter=Q(asistencia='ausente')),
+        'pendientes': Count('id', filter=Q(asistencia='pendiente')),
+    }
+    activas = InscripcionTaller.objects.filter(estado='inscrito').order_by()
+    for modelo, clave in (('EstadisticaAsistenciaTaller', 'taller_id'), ('EstadisticaAsistenciaSocio', 'socio_id')):
+        Modelo = apps.get_model('talleres', modelo)
+        Modelo.objects.bulk_create(
+            Modelo(**fila) for fila in activas.values(clave).annotate(**conteos)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0003_socio_profesor_asignado'),
+        ('talleres', '0006_taller_profesor_horario_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaAsistenciaTaller',
+            fields=[
+                ('presentes', models.PositiveIntegerField(default=0)),
+                ('ausentes', models.PositiveIntegerField(default=0)),
+                ('pendientes', models.PositiveIntegerField(default=0)),
+                ('taller', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='estadistica_asistencia', serialize=False, to='talleres.taller')),
+            ],
+            options={
+                'verbose_name': 'Asistencia por taller',
+                'verbose_name_plural': 'Asistencia por taller',
+            },
+        ),
+        migrations.CreateModel(
+            name='EstadisticaAsistenciaSocio',
+            fields=[
+                ('presentes', models.PositiveIntegerField(default=0)),
+                ('ausentes', models.PositiveIntegerField(default=0)),
+                ('pendientes', models.PositiveIntegerField(default=0)),
+                ('socio', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='estadistica_asistencia', serialize=False, to='socios.socio')),
+            ],
+            options={
+                'verbose_name': 'Asistencia por socio',
+                'verbose_name_plural': 'Asistencia por socio',
+                'indexes': [models.Index(fields=['-ausentes'], name='asistencia_socio_ausentes_idx')],
+            },
+        ),
+        migrations.RunPython(cargar_estadisticas, migrations.RunPython.noop),
+    ]
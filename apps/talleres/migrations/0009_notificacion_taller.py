@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0003_socio_profesor_asignado'),
+        ('talleres', '0008_taller_orden_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificacionTaller',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taller_id', models.PositiveIntegerField()),
+                ('tipo', models.CharField(choices=[('cambio', 'Cambio de horario'), ('cancelacion', 'Cancelación')], max_length=15)),
+                ('destinatario', models.EmailField(max_length=254)),
+                ('asunto', models.CharField(max_length=200)),
+                ('cuerpo', models.TextField()),
+                ('clave', models.CharField(max_length=150, unique=True)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviada', 'Enviada'), ('fallida', 'Fallida')], default='pendiente', max_length=15)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ultimo_error', models.TextField(blank=True)),
+                ('fec_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fec_envio', models.DateTimeField(blank=True, null=True)),
+                ('socio', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notificaciones_taller', to='socios.socio')),
+            ],
+            options={
+                'verbose_name': 'Notificación de taller',
+                'verbose_name_plural': 'Notificaciones de talleres',
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='notif_taller_cola_idx')],
+            },
+        ),
+    ]
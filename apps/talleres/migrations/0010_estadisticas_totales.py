@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Q
+
+
+def cargar_totales(apps, schema_editor):
+    """Totales iniciales por profesor y global desde las inscripciones activas."""
+    InscripcionTaller = apps.get_model('talleres', 'InscripcionTaller')
+    Profesor = apps.get_model('talleres', 'EstadisticaAsistenciaProfesor')
+    Global = apps.get_model('talleres', 'EstadisticaAsistenciaGlobal')
+    conteos = {
+        'presentes': Count('id', filter=Q(asistencia='presente')),
+        'ausentes': Count('id', filter=Q(asistencia='ausente')),
+        'pendientes': Count('id', filter=Q(asistencia='pendiente')),
+    }
+    activas = InscripcionTaller.objects.filter(estado='inscrito').order_by()
+    Profesor.objects.bulk_create(
+        Profesor(**fila) for fila in activas.values(profesor_id=F('taller__profesor_id')).annotate(**conteos)
+    )
+    Global.objects.create(pk=1, **activas.aggregate(**conteos))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talleres', '0009_notificacion_taller'),
+        ('users', '0004_alter_usuario_especialidad'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaAsistenciaGlobal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('presentes', models.PositiveIntegerField(default=0)),
+                ('ausentes', models.PositiveIntegerField(default=0)),
+                ('pendientes', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Asistencia total',
+                'verbose_name_plural': 'Asistencia total',
+            },
+        ),
+        migrations.CreateModel(
+            name='EstadisticaAsistenciaProfesor',
+            fields=[
+                ('presentes', models.PositiveIntegerField(default=0)),
+                ('ausentes', models.PositiveIntegerField(default=0)),
+                ('pendientes', models.PositiveIntegerField(default=0)),
+                ('profesor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='estadistica_asistencia', serialize=False, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Asistencia por profesor',
+                'verbose_name_plural': 'Asistencia por profesor',
+            },
+        ),
+        migrations.RunPython(cargar_totales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talleres', '0010_estadisticas_totales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SesionCancelada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('horario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cancelaciones', to='talleres.horariotaller')),
+            ],
+            options={
+                'verbose_name': 'Sesión cancelada',
+                'verbose_name_plural': 'Sesiones canceladas',
+                'constraints': [models.UniqueConstraint(fields=('horario', 'fecha'), name='sesion_cancelada_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:30
+
+import uuid
+
+from django.db import migrations, models
+
+
+def asignar_uid(apps, schema_editor):
+    """Un uid distinto por taller existente (el default se evalúa una sola vez en AddField)."""
+    Taller = apps.get_model('talleres', 'Taller')
+    talleres = list(Taller.objects.only('pk'))
+    for taller in talleres:
+        taller.uid = uuid.uuid4()
+    Taller.objects.bulk_update(talleres, ['uid'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talleres', '0011_sesion_cancelada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taller',
+            name='cambios_horario',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='taller',
+            name='uid',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.RunPython(asignar_uid, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='taller',
+            name='uid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
@@ -1,9 +1,88 @@
+import uuid
+
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 # =========================================
 #   TALLERES
 # =========================================
 
+class TallerQuerySet(models.QuerySet):
+    def con_inscritos(self):
+        """Carga el profesor junto al taller; los inscritos ya vienen en el contador."""
+        return self.select_related('profesor')
+
+    def recalcular_inscritos(self):
+        """Reconstruye el contador `inscritos` desde las inscripciones (reparación)."""
+        activos = InscripcionTaller.objects.filter(
+            taller=OuterRef('pk'), estado='inscrito'
+        ).values('taller').annotate(total=Count('id')).values('total')
+        return self.update(inscritos=Coalesce(Subquery(activos), 0))
+
+
+class HorarioTaller(models.Model):
+    """
+    Plantilla de un taller que se repite cada semana (p. ej. Zumba, lunes 19:00).
+    horarios.py materializa sus sesiones como filas de Taller unas semanas hacia
+    adelante; cada sesión queda enlazada a su horario por Taller.horario.
+    """
+
+    DIAS = (
+        (0, 'Lunes'),
+        (1, 'Martes'),
+        (2, 'Miércoles'),
+        (3, 'Jueves'),
+        (4, 'Viernes'),
+        (5, 'Sábado'),
+        (6, 'Domingo'),
+    )
+
+    nombre = models.CharField(max_length=100)
+    descripcion = models.TextField(blank=True, null=True)
+    profesor = models.ForeignKey(
+        'users.Usuario',
+        on_delete=models.PROTECT,
+        limit_choices_to={'rol': 'profesor'},
+        related_name='horarios_taller'
+    )
+    cupos = models.PositiveIntegerField(default=10)
+    dia_semana = models.PositiveSmallIntegerField(choices=DIAS)
+    hora_inicio = models.TimeField()
+    hora_fin = models.TimeField()
+    fecha_desde = models.DateField()
+    fecha_hasta = models.DateField(blank=True, null=True)  # None = sin término
+    activo = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['dia_semana', 'hora_inicio']
+        verbose_name = "Horario de taller"
+        verbose_name_plural = "Horarios de talleres"
+
+    def __str__(self):
+        return f"{self.nombre} - {self.get_dia_semana_display()} {self.hora_inicio}-{self.hora_fin}"
+
+
+class SesionCancelada(models.Model):
+    """
+    Fecha de un horario cuya sesión se eliminó a mano: el generador
+    (horarios.py) la salta para no volver a crearla en la próxima corrida.
+    """
+    horario = models.ForeignKey(HorarioTaller, on_delete=models.CASCADE, related_name='cancelaciones')
+    fecha = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['horario', 'fecha'], name='sesion_cancelada_uniq'),
+        ]
+        verbose_name = "Sesión cancelada"
+        verbose_name_plural = "Sesiones canceladas"
+
+    def __str__(self):
+        return f"{self.horario} - {self.fecha:%d/%m/%Y}"
+
+
 class Taller(models.Model):
     id_taller = models.AutoField(primary_key=True)
     nombre = models.CharField(max_length=100)
@@ -19,18 +98,60 @@ class Taller(models.Model):
     hora_inicio = models.TimeField()
     hora_fin = models.TimeField()
     activo = models.BooleanField(default=True)
+    horario = models.ForeignKey(
+        HorarioTaller,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='talleres'
+    )
+    # Inscripciones con estado 'inscrito'. Solo lo mueven los UPDATE con F()
+    # de inscripciones.py (y la señal de borrado), nunca un save() del taller.
+    inscritos = models.PositiveIntegerField(default=0, editable=False)
+    # Identidad de los avisos (notificaciones.py): el id puede reutilizarse en
+    # SQLite y el contador distingue cada cambio de horario (A→B→A→B)
+    uid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    cambios_horario = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = TallerQuerySet.as_manager()
 
     class Meta:
         ordering = ['fecha', 'hora_inicio']
+        indexes = [
+            # Feed del calendario: filtra por rango de fechas + activo
+            models.Index(fields=['fecha', 'activo'], name='taller_fecha_activo_idx'),
+            # Orden del listado paginado por keyset (taller_list)
+            models.Index(fields=['fecha', 'hora_inicio', 'id_taller'], name='taller_orden_idx'),
+            # Choques de horario del profesor (agenda.py)
+            models.Index(fields=['profesor', 'fecha', 'hora_inicio', 'hora_fin'], name='taller_profesor_horario_idx'),
+        ]
+        constraints = [
+            # Una sesión por fecha y horario: el generador puede correr varias veces
+            models.UniqueConstraint(fields=['horario', 'fecha'], name='taller_horario_fecha_uniq'),
+        ]
         verbose_name = "Taller"
         verbose_name_plural = "Talleres"
 
     def __str__(self):
         return f"{self.nombre} - {self.fecha} {self.hora_inicio}-{self.hora_fin}"
 
+    def save(self, *args, **kwargs):
+        # Un save() completo escribiría el contador leído al cargar el taller y
+        # pisaría las inscripciones que entraron entretanto.
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'inscritos'
+            ]
+        super().save(*args, **kwargs)
+
     def inscritos_count(self):
         """Devuelve la cantidad de socios inscritos con estado activo."""
-        return self.inscripciones.filter(estado='inscrito').count()
+        return self.inscritos
+
+    @property
+    def cupos_disponibles(self):
+        return max(self.cupos - self.inscritos, 0)
 
 
 class InscripcionTaller(models.Model):
@@ -67,3 +188,184 @@ class InscripcionTaller(models.Model):
 
     def __str__(self):
         return f"{self.socio} → {self.taller} ({self.estado})"
+
+
+# =========================================
+#   LISTA DE ESPERA
+# =========================================
+
+class ListaEspera(models.Model):
+    """
+    Cola FIFO de socios esperando cupo en un taller.
+
+    `posicion` es densa (1..n): al salir alguien, los de atrás bajan uno con un
+    UPDATE F('posicion') - 1, así la posición de un socio es una lectura directa
+    por índice en vez de contar la cola.
+    """
+
+    taller = models.ForeignKey(
+        Taller,
+        on_delete=models.CASCADE,
+        related_name='lista_espera'
+    )
+    socio = models.ForeignKey(
+        'socios.Socio',
+        on_delete=models.CASCADE,
+        related_name='esperas_taller'
+    )
+    posicion = models.PositiveIntegerField()
+    fec_registro = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('taller', 'socio')
+        ordering = ['taller', 'posicion']
+        indexes = [
+            # Cabeza de la cola y corrimiento de posiciones
+            models.Index(fields=['taller', 'posicion'], name='espera_taller_posicion_idx'),
+        ]
+        verbose_name = "Lista de espera"
+        verbose_name_plural = "Listas de espera"
+
+    def __str__(self):
+        return f"{self.socio} → {self.taller} (#{self.posicion})"
+
+
+# =========================================
+#   ESTADÍSTICAS DE ASISTENCIA
+# =========================================
+# Conteos de las inscripciones activas ('inscrito') por asistencia, mantenidos
+# de forma incremental por estadisticas.py. Se reconstruyen con el comando
+# reconstruir_asistencia.
+
+class EstadisticaAsistencia(models.Model):
+    presentes = models.PositiveIntegerField(default=0)
+    ausentes = models.PositiveIntegerField(default=0)
+    pendientes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def tasa_asistencia(self):
+        """% de presentes sobre las clases ya marcadas (None si no hay ninguna)."""
+        marcadas = self.presentes + self.ausentes
+        return round(100 * self.presentes / marcadas, 1) if marcadas else None
+
+
+class EstadisticaAsistenciaTaller(EstadisticaAsistencia):
+    taller = models.OneToOneField(
+        Taller,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='estadistica_asistencia'
+    )
+
+    class Meta:
+        verbose_name = "Asistencia por taller"
+        verbose_name_plural = "Asistencia por taller"
+
+    def __str__(self):
+        return f"{self.taller}: {self.presentes}P / {self.ausentes}A / {self.pendientes}?"
+
+
+class EstadisticaAsistenciaSocio(EstadisticaAsistencia):
+    socio = models.OneToOneField(
+        'socios.Socio',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='estadistica_asistencia'
+    )
+
+    class Meta:
+        indexes = [
+            # "Socios que más faltan" del panel
+            models.Index(fields=['-ausentes'], name='asistencia_socio_ausentes_idx'),
+        ]
+        verbose_name = "Asistencia por socio"
+        verbose_name_plural = "Asistencia por socio"
+
+    def __str__(self):
+        return f"{self.socio}: {self.presentes}P / {self.ausentes}A / {self.pendientes}?"
+
+
+class EstadisticaAsistenciaProfesor(EstadisticaAsistencia):
+    """Suma de los talleres del profesor (panel del profesor)."""
+    profesor = models.OneToOneField(
+        'users.Usuario',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='estadistica_asistencia'
+    )
+
+    class Meta:
+        verbose_name = "Asistencia por profesor"
+        verbose_name_plural = "Asistencia por profesor"
+
+    def __str__(self):
+        return f"{self.profesor}: {self.presentes}P / {self.ausentes}A / {self.pendientes}?"
+
+
+class EstadisticaAsistenciaGlobal(EstadisticaAsistencia):
+    """Una sola fila (pk=GLOBAL) con la suma de todos los talleres (panel admin)."""
+    GLOBAL = 1
+
+    class Meta:
+        verbose_name = "Asistencia total"
+        verbose_name_plural = "Asistencia total"
+
+    def __str__(self):
+        return f"Total: {self.presentes}P / {self.ausentes}A / {self.pendientes}?"
+
+
+# =========================================
+#   NOTIFICACIONES (OUTBOX)
+# =========================================
+# Avisos por correo a los inscritos cuando un taller se mueve o se elimina.
+# Se insertan en la misma transacción del cambio (notificaciones.py) y los
+# envía después el comando enviar_notificaciones, así la petición no espera
+# al servidor de correo y no se pierde un aviso de un cambio confirmado.
+
+class NotificacionTaller(models.Model):
+    TIPOS = [
+        ('cambio', 'Cambio de horario'),
+        ('cancelacion', 'Cancelación'),
+    ]
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('enviada', 'Enviada'),
+        ('fallida', 'Fallida'),
+    ]
+
+    # Sin FK al taller: el aviso de cancelación sobrevive al taller borrado
+    taller_id = models.PositiveIntegerField()
+    socio = models.ForeignKey(
+        'socios.Socio',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notificaciones_taller'
+    )
+    tipo = models.CharField(max_length=15, choices=TIPOS)
+    destinatario = models.EmailField()
+    asunto = models.CharField(max_length=200)
+    cuerpo = models.TextField()
+    # Evento + socio (Taller.uid y cambios_horario): el mismo aviso no se encola dos veces
+    clave = models.CharField(max_length=150, unique=True)
+
+    estado = models.CharField(max_length=15, choices=ESTADOS, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+    fec_creacion = models.DateTimeField(auto_now_add=True)
+    fec_envio = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Lote siguiente del worker
+            models.Index(fields=['estado', 'proximo_intento'], name='notif_taller_cola_idx'),
+        ]
+        verbose_name = "Notificación de taller"
+        verbose_name_plural = "Notificaciones de talleres"
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} → {self.destinatario} ({self.estado})"
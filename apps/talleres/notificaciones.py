@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import InscripcionTaller, NotificacionTaller
+
+
+LOTE = 50                            # correos por conexión
+MAX_INTENTOS = 5                     # después queda 'fallida'
+ESPERA_BASE = timedelta(minutes=1)   # reintentos: 1, 2, 4, 8... minutos
+RESERVA = timedelta(minutes=10)      # lote tomado por un worker que murió vuelve a la cola
+
+
+# ============================
+#   ENCOLAR (dentro de la transacción del cambio)
+# ============================
+
+def _horario(fecha, hora_inicio, hora_fin):
+    return f"{fecha:%d/%m/%Y} de {hora_inicio:%H:%M} a {hora_fin:%H:%M}"
+
+
+def _encolar(taller, tipo, asunto, cuerpo, clave):
+    """
+    Un aviso por socio inscrito con correo. `cuerpo(nombre)` arma el texto y
+    `clave` identifica el evento (Taller.uid, y en un cambio su número): si el
+    mismo evento se encola otra vez, la clave única lo descarta; un cambio que
+    se repite más tarde (A→B→A→B) o un id de taller reutilizado es otro evento.
+    """
+    inscritos = InscripcionTaller.objects.filter(
+        taller=taller, estado='inscrito'
+    ).exclude(socio__correo='').values_list('socio_id', 'socio__correo', 'socio__nombre')
+
+    NotificacionTaller.objects.bulk_create(
+        [
+            NotificacionTaller(
+                taller_id=taller.pk, socio_id=socio_id, tipo=tipo, destinatario=correo,
+                asunto=asunto, cuerpo=cuerpo(nombre), clave=f"{clave}:{socio_id}",
+            )
+            for socio_id, correo, nombre in inscritos
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def encolar_cambio(taller, antes):
+    """
+    Avisa que el taller se movió. `antes` = (fecha, hora_inicio, hora_fin)
+    previos; no hace nada si no cambió el horario. El taller ya trae
+    cambios_horario incrementado (agenda.guardar_taller).
+    """
+    despues = (taller.fecha, taller.hora_inicio, taller.hora_fin)
+    if tuple(antes) == despues:
+        return
+
+    def cuerpo(nombre):
+        return (
+            f"Hola {nombre},\n\n"
+            f"El taller «{taller.nombre}» del {_horario(*antes)} se cambió al {_horario(*despues)}.\n"
+            f"Tu inscripción se mantiene. Si no puedes asistir, cancélala desde el calendario.\n\n"
+            f"Gym of Thrones"
+        )
+
+    clave = f"taller:{taller.uid.hex}:cambio:{taller.cambios_horario}"
+    _encolar(taller, 'cambio', f"Cambio de horario: {taller.nombre}", cuerpo, clave)
+
+
+def encolar_cancelacion(taller):
+    """Avisa que el taller se eliminó. Llamar antes del delete (necesita las inscripciones)."""
+    horario = _horario(taller.fecha, taller.hora_inicio, taller.hora_fin)
+
+    def cuerpo(nombre):
+        return (
+            f"Hola {nombre},\n\n"
+            f"El taller «{taller.nombre}» del {horario} fue cancelado.\n\n"
+            f"Gym of Thrones"
+        )
+
+    _encolar(taller, 'cancelacion', f"Taller cancelado: {taller.nombre}", cuerpo,
+             f"taller:{taller.uid.hex}:cancelacion")
+
+
+# ============================
+#   ENVÍO (comando enviar_notificaciones)
+# ============================
+
+def _tomar_lote(lote, ahora):
+    """
+    Reserva el siguiente lote corriendo su próximo intento a ahora + RESERVA,
+    así otro worker no lo toma. En SQLite la transacción IMMEDIATE serializa;
+    en otras bases skip_locked evita esperar filas que otro worker tiene.
+    """
+    with transaction.atomic():
+        avisos = list(
+            NotificacionTaller.objects.select_for_update(skip_locked=True)
+            .filter(estado='pendiente', proximo_intento__lte=ahora)
+            .order_by('proximo_intento', 'id')[:lote]
+        )
+        NotificacionTaller.objects.filter(pk__in=[a.pk for a in avisos]).update(
+            proximo_intento=ahora + RESERVA
+        )
+    return avisos
+
+
+def _registrar_fallo(aviso, error, ahora):
+    intentos = aviso.intentos + 1
+    NotificacionTaller.objects.filter(pk=aviso.pk).update(
+        intentos=intentos,
+        estado='fallida' if intentos >= MAX_INTENTOS else 'pendiente',
+        proximo_intento=ahora + ESPERA_BASE * 2 ** (intentos - 1),
+        ultimo_error=str(error)[:1000],
+    )
+
+
+def enviar_pendientes(lote=LOTE, ahora=None):
+    """
+    Envía un lote de avisos pendientes por una sola conexión del backend de
+    correo (EMAIL_BACKEND). Los que fallan se reintentan con espera
+    exponencial hasta MAX_INTENTOS. Devuelve (enviados, fallidos).
+    """
+    ahora = ahora or timezone.now()
+    avisos = _tomar_lote(lote, ahora)
+    if not avisos:
+        return 0, 0
+
+    enviados, fallidos = [], []
+    try:
+        with get_connection() as conexion:
+            for aviso in avisos:
+                mensaje = EmailMessage(aviso.asunto, aviso.cuerpo, to=[aviso.destinatario], connection=conexion)
+                try:
+                    mensaje.send()
+                    enviados.append(aviso.pk)
+                except Exception as e:
+                    fallidos.append((aviso, e))
+    except Exception as e:
+        # No se pudo abrir (o cerrar) la conexión: reintentan los no enviados
+        fallidos = [(a, e) for a in avisos if a.pk not in enviados]
+
+    NotificacionTaller.objects.filter(pk__in=enviados).update(
+        estado='enviada', fec_envio=timezone.now(), intentos=F('intentos') + 1, ultimo_error=''
+    )
+    for aviso, error in fallidos:
+        _registrar_fallo(aviso, error, ahora)
+
+    return len(enviados), len(fallidos)
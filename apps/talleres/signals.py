@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+
+from .detalle import invalidar_detalle
+from .estadisticas import cambiar_profesor, registrar_cambio
+from .inscripciones import liberar_cupo, promover
+from .models import InscripcionTaller, ListaEspera, Taller
+
+
+# bulk_create no emite post_save: quien cree talleres en lote (horarios.py)
+# envía esta señal con `talleres` (lista de Taller) para el calendario.
+talleres_creados_en_lote = Signal()
+
+
+@receiver(post_delete, sender=InscripcionTaller)
+def inscripcion_eliminada(sender, instance, **kwargs):
+    # Cubre también el borrado en cascada (socio o taller eliminado); corre
+    # dentro de la misma transacción del delete.
+    if instance.estado == 'inscrito':
+        liberar_cupo(instance.taller_id)
+        # En una cascada no se puede promover dentro del delete (el taller
+        # podría estar borrándose también): se hace al confirmar. Si ya se
+        # promovió (eliminar_inscripcion) no encuentra cupo o cola y no hace nada.
+        taller_id = instance.taller_id
+        transaction.on_commit(lambda: promover(taller_id))
+
+
+@receiver(post_delete, sender=ListaEspera)
+def espera_eliminada(sender, instance, **kwargs):
+    # Los de atrás avanzan un lugar: las posiciones siguen densas (1..n)
+    ListaEspera.objects.filter(
+        taller_id=instance.taller_id, posicion__gt=instance.posicion
+    ).update(posicion=F('posicion') - 1)
+
+
+@receiver([post_save, post_delete], sender=Taller)
+@receiver([post_save, post_delete], sender=InscripcionTaller)
+@receiver([post_save, post_delete], sender=ListaEspera)
+def cambio_detalle(sender, instance, **kwargs):
+    # Al confirmar: así nadie vuelve a cachear el detalle con datos sin confirmar
+    taller_id = instance.pk if sender is Taller else instance.taller_id
+    transaction.on_commit(lambda: invalidar_detalle(taller_id))
+
+
+# ============================
+#   ESTADÍSTICAS DE ASISTENCIA
+# ============================
+# Se recuerda el (estado, asistencia) con que se cargó la inscripción para
+# saber qué conteo restar al guardarla o borrarla. Se lee del __dict__ para no
+# cargar campos diferidos.
+
+def _estado(instance):
+    estado, asistencia = instance.__dict__.get('estado'), instance.__dict__.get('asistencia')
+    return (estado, asistencia) if estado and asistencia else None
+
+
+@receiver(post_init, sender=InscripcionTaller)
+def recordar_asistencia(sender, instance, **kwargs):
+    instance._asistencia_original = _estado(instance)
+
+
+@receiver(post_save, sender=InscripcionTaller)
+def asistencia_guardada(sender, instance, created, **kwargs):
+    antes = None if created else instance._asistencia_original
+    despues = _estado(instance)
+    registrar_cambio(instance.taller_id, instance.socio_id, antes, despues)
+    instance._asistencia_original = despues
+
+
+@receiver(post_delete, sender=InscripcionTaller)
+def asistencia_eliminada(sender, instance, **kwargs):
+    registrar_cambio(instance.taller_id, instance.socio_id, instance._asistencia_original, None)
+
+
+@receiver(post_init, sender=Taller)
+def recordar_profesor(sender, instance, **kwargs):
+    instance._profesor_original = instance.__dict__.get('profesor_id')
+
+
+@receiver(post_save, sender=Taller)
+def profesor_cambiado(sender, instance, created, **kwargs):
+    antes, despues = instance._profesor_original, instance.profesor_id
+    instance._profesor_original = despues
+    if not created and antes and antes != despues:
+        cambiar_profesor(instance.pk, antes, despues)
@@ -1,3 +1,657 @@
-from django.test import TestCase
+import threading
+import time as reloj
+from datetime import date, time, timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.paginacion import codificar_cursor
+from apps.socios.models import Socio
+from apps.users.models import Usuario
+from .inscripciones import (
+    SinCupos, eliminar_inscripcion, inscribir, inscribir_o_encolar, marcar_asistencia,
+    posicion_en_espera, salir_de_espera,
+)
+from .agenda import ChoqueProfesor, choques_del_mes, eliminar_taller, guardar_taller
+from .estadisticas import reconstruir, totales_globales, totales_profesor
+from .horarios import materializar_horarios
+from .notificaciones import MAX_INTENTOS, encolar_cambio, encolar_cancelacion, enviar_pendientes
+from .models import (
+    EstadisticaAsistenciaGlobal, EstadisticaAsistenciaProfesor, EstadisticaAsistenciaSocio,
+    EstadisticaAsistenciaTaller, HorarioTaller, InscripcionTaller,
+    ListaEspera, NotificacionTaller, Taller,
+)
+
+
+def crear_taller(cupos):
+    profesor = Usuario.objects.create_user(
+        rut='30000000-0', password='x', nombre='Profe', apellido='P',
+        correo='profe@gym.cl', rol='profesor',
+    )
+    return Taller.objects.create(
+        nombre='Yoga', profesor=profesor, cupos=cupos,
+        fecha=date(2025, 11, 3), hora_inicio=time(9), hora_fin=time(10),
+    )
+
+
+def crear_socios(cantidad):
+    return [
+        Socio.objects.create(
+            rut=f'2000000{i}-{i}', nombre=f'Socio {i}', apellido_paterno='S', correo=f'socio{i}@gym.cl',
+        )
+        for i in range(cantidad)
+    ]
+
+
+class ContadorInscritosTests(TestCase):
+    """Taller.inscritos sigue a las inscripciones activas."""
+
+    def test_inscribir_y_eliminar(self):
+        taller = crear_taller(cupos=2)
+        ana, beto, carla = crear_socios(3)
+
+        insc_ana = inscribir(ana, taller)
+        inscribir(ana, taller)  # repetir no consume otro cupo
+        inscribir(beto, taller)
+        taller.refresh_from_db()
+        self.assertEqual(taller.inscritos, 2)
+
+        with self.assertRaises(SinCupos):
+            inscribir(carla, taller)
+
+        eliminar_inscripcion(insc_ana)
+        taller.refresh_from_db()
+        self.assertEqual(taller.inscritos, 1)
+
+        inscribir(carla, taller)
+        beto.delete()  # cascada → post_delete
+        taller.refresh_from_db()
+        self.assertEqual(taller.inscritos, 1)
+        self.assertEqual(taller.inscritos, InscripcionTaller.objects.filter(estado='inscrito').count())
+
+    def test_save_del_taller_no_pisa_el_contador(self):
+        taller = crear_taller(cupos=5)
+        copia = Taller.objects.get(pk=taller.pk)  # leída antes de la inscripción
+        inscribir(crear_socios(1)[0], taller)
+
+        copia.nombre = 'Yoga avanzado'
+        copia.save()
+
+        copia.refresh_from_db()
+        self.assertEqual(copia.inscritos, 1)
+
+
+class ListaEsperaTests(TestCase):
+    """Cola FIFO con posiciones densas y promoción automática."""
+
+    def setUp(self):
+        self.taller = crear_taller(cupos=1)
+        self.socios = crear_socios(4)
+        self.inscrito, _ = inscribir_o_encolar(self.socios[0], self.taller)
+        for socio in self.socios[1:]:
+            inscribir_o_encolar(socio, self.taller)
+
+    def posiciones(self):
+        return list(ListaEspera.objects.filter(taller=self.taller).values_list('socio', 'posicion'))
+
+    def test_taller_lleno_encola_en_orden(self):
+        self.assertEqual(self.posiciones(), [(s.id, i) for i, s in enumerate(self.socios[1:], start=1)])
+        _, espera = inscribir_o_encolar(self.socios[2], self.taller)  # repetir no lo mueve
+        self.assertEqual(espera.posicion, 2)
+
+    def test_salir_corre_las_posiciones(self):
+        salir_de_espera(self.socios[1], self.taller)
+        self.assertEqual(posicion_en_espera(self.socios[2], self.taller.pk), 1)
+        self.assertEqual(posicion_en_espera(self.socios[3], self.taller.pk), 2)
+
+    def test_eliminar_inscripcion_promueve_la_cabeza(self):
+        promovidos = eliminar_inscripcion(self.inscrito)
+
+        self.assertEqual([i.socio_id for i in promovidos], [self.socios[1].id])
+        self.taller.refresh_from_db()
+        self.assertEqual(self.taller.inscritos, 1)
+        self.assertEqual(self.posiciones(), [(self.socios[2].id, 1), (self.socios[3].id, 2)])
+
+    def test_borrar_socio_inscrito_promueve_al_confirmar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.socios[0].delete()
+
+        self.assertTrue(InscripcionTaller.objects.filter(socio=self.socios[1], estado='inscrito').exists())
+        self.assertEqual(self.posiciones(), [(self.socios[2].id, 1), (self.socios[3].id, 2)])
+
+    def test_subir_cupos_desde_la_api_promueve(self):
+        admin = Usuario.objects.create_user(
+            rut='11111111-1', password='x', nombre='Ana', apellido='Admin',
+            correo='admin@gym.cl', rol='admin',
+        )
+        self.client.force_login(admin)
+        self.client.post(f'/talleres/api/{self.taller.pk}/editar/', {
+            'nombre': 'Yoga', 'cupos': 3, 'fecha': '2025-11-03',
+            'hora_inicio': '09:00', 'hora_fin': '10:00', 'profesor_id': self.taller.profesor_id,
+        })
+
+        self.taller.refresh_from_db()
+        self.assertEqual(self.taller.inscritos, 3)
+        self.assertEqual(self.posiciones(), [(self.socios[3].id, 1)])
+
+
+class DetalleTallerTests(TestCase):
+    """api_detalle_taller: dos consultas en frío, ninguna con la caché tibia."""
+
+    def setUp(self):
+        cache.clear()
+        self.taller = crear_taller(cupos=5)
+        self.socios = crear_socios(3)
+        for socio in self.socios[:2]:
+            inscribir(socio, self.taller)
+        self.usuario = Usuario.objects.create_user(
+            rut=self.socios[0].rut, password='x', nombre='Socio', apellido='S',
+            correo='socio0@gym.cl', rol='socio',
+        )
+        Socio.objects.filter(pk=self.socios[0].pk).update(usuario=self.usuario)
+        self.client.force_login(self.usuario)
+        self.url = f'/talleres/api/{self.taller.pk}/'
+
+    def consultas_detalle(self):
+        with CaptureQueriesContext(connection) as ctx:
+            respuesta = self.client.get(self.url)
+        consultas = [q['sql'] for q in ctx.captured_queries if 'django_session' not in q['sql']
+                     and 'FROM "users_usuario"' not in q['sql']]
+        return consultas, respuesta.json()['taller']
+
+    def test_payload_en_dos_consultas_y_cacheado(self):
+        consultas, datos = self.consultas_detalle()
+        self.assertEqual(len(consultas), 2)
+        self.assertEqual(datos['inscritos'], 2)
+        self.assertEqual(len(datos['alumnos']), 2)
+        self.assertNotIn('socio__usuario_id', datos['alumnos'][0])
+        self.assertEqual(datos['mi_inscripcion_id'],
+                         InscripcionTaller.objects.get(socio=self.socios[0]).id)
+
+        consultas, _ = self.consultas_detalle()
+        self.assertEqual(consultas, [])
+
+    def test_inscribir_invalida_el_detalle(self):
+        self.consultas_detalle()
+        with self.captureOnCommitCallbacks(execute=True):
+            inscribir(self.socios[2], self.taller)
+
+        _, datos = self.consultas_detalle()
+        self.assertEqual(datos['inscritos'], 3)
+
+
+class AsistenciaEnLoteTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.taller = crear_taller(cupos=5)
+        self.inscripciones = [inscribir(s, self.taller) for s in crear_socios(3)]
+        self.client.force_login(self.taller.profesor)
+        self.url = f'/talleres/api/{self.taller.pk}/asistencia/'
+
+    def enviar(self, cambios):
+        return self.client.post(self.url, {'asistencia': cambios}, content_type='application/json')
+
+    def test_marca_toda_la_clase(self):
+        a, b, c = self.inscripciones
+        with CaptureQueriesContext(connection) as ctx:
+            respuesta = self.enviar({a.id: 'presente', b.id: 'presente', c.id: 'ausente'})
+
+        datos = respuesta.json()
+        self.assertEqual(datos['actualizadas'], 3)
+        self.assertEqual({al['id']: al['asistencia'] for al in datos['alumnos']},
+                         {a.id: 'presente', b.id: 'presente', c.id: 'ausente'})
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "talleres_inscripciontaller"')]
+        self.assertEqual(len(updates), 2)  # uno por valor distinto
+
+    def test_inscripcion_ajena_no_aplica_nada(self):
+        otro = Taller.objects.create(
+            nombre='Pilates', profesor=self.taller.profesor, cupos=5,
+            fecha=date(2025, 11, 4), hora_inicio=time(9), hora_fin=time(10),
+        )
+        ajena = InscripcionTaller.objects.create(socio=self.inscripciones[0].socio, taller=otro)
+
+        respuesta = self.enviar({self.inscripciones[0].id: 'presente', ajena.id: 'presente'})
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(InscripcionTaller.objects.filter(asistencia='presente').exists())
+
+
+class HorariosTests(TestCase):
+    """Sesiones semanales materializadas de forma incremental."""
+
+    def setUp(self):
+        self.profesor = crear_taller(cupos=1).profesor
+        self.zumba = HorarioTaller.objects.create(
+            nombre='Zumba', profesor=self.profesor, cupos=20, dia_semana=0,  # lunes
+            hora_inicio=time(19), hora_fin=time(20), fecha_desde=date(2025, 11, 1),
+        )
+        self.hoy = date(2025, 11, 5)  # miércoles
+
+    def sesiones(self):
+        return list(self.zumba.talleres.order_by('fecha').values_list('fecha', flat=True))
+
+    def test_materializa_las_proximas_semanas(self):
+        creados = materializar_horarios(semanas=3, hoy=self.hoy)
+
+        self.assertEqual(len(creados), 3)
+        self.assertEqual(self.sesiones(), [date(2025, 11, 10), date(2025, 11, 17), date(2025, 11, 24)])
+        self.assertTrue(all(t.cupos == 20 and t.profesor_id == self.profesor.id for t in creados))
+
+    def test_es_incremental_y_salta_fechas_existentes(self):
+        materializar_horarios(semanas=2, hoy=self.hoy)
+
+        with self.assertNumQueries(5):  # horarios, existentes, un insert (+ savepoint)
+            creados = materializar_horarios(semanas=3, hoy=self.hoy + timedelta(days=1))
+
+        self.assertEqual([t.fecha for t in creados], [date(2025, 11, 24)])
+        self.assertEqual(len(self.sesiones()), 3)
+
+    def test_no_recrea_sesiones_canceladas(self):
+        materializar_horarios(semanas=3, hoy=self.hoy)
+        eliminar_taller(self.zumba.talleres.get(fecha=date(2025, 11, 17)))
+
+        self.assertEqual(materializar_horarios(semanas=3, hoy=self.hoy), [])
+        self.assertEqual(self.sesiones(), [date(2025, 11, 10), date(2025, 11, 24)])
+
+    def test_respeta_la_vigencia(self):
+        self.zumba.fecha_hasta = date(2025, 11, 12)
+        self.zumba.save()
+
+        materializar_horarios(semanas=4, hoy=self.hoy)
+
+        self.assertEqual(self.sesiones(), [date(2025, 11, 10)])
+
+
+class ChoquesProfesorTests(TestCase):
+
+    def setUp(self):
+        self.yoga = crear_taller(cupos=5)  # 2025-11-03 09:00-10:00
+        self.profesor = self.yoga.profesor
+
+    def guardar(self, hora_inicio, hora_fin, fecha='2025-11-03', **kwargs):
+        return guardar_taller(profesor=self.profesor, nombre='Otro', cupos=5, fecha=fecha,
+                              hora_inicio=hora_inicio, hora_fin=hora_fin, **kwargs)
+
+    def test_rechaza_solapamiento_y_acepta_bordes(self):
+        with self.assertRaises(ChoqueProfesor) as ctx:
+            self.guardar('09:30', '10:30')
+        self.assertEqual(ctx.exception.talleres, [self.yoga])
+
+        self.guardar('10:00', '11:00')  # empieza justo cuando termina
+        self.guardar('09:30', '10:30', fecha='2025-11-04')
+
+    def test_editar_no_choca_consigo_mismo(self):
+        guardar_taller(taller=self.yoga, profesor=self.profesor, nombre='Yoga', cupos=8,
+                       fecha='2025-11-03', hora_inicio='09:15', hora_fin='10:15')
+        self.yoga.refresh_from_db()
+        self.assertEqual((self.yoga.cupos, self.yoga.hora_inicio), (8, time(9, 15)))
+
+    def test_api_crear_devuelve_el_choque(self):
+        self.client.force_login(self.profesor)
+        respuesta = self.client.post('/talleres/api/crear/', {
+            'nombre': 'Pilates', 'cupos': 5, 'fecha': '2025-11-03',
+            'hora_inicio': '09:45', 'hora_fin': '10:30',
+        })
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json()['choques'], [self.yoga.id_taller])
+
+    def test_barrido_del_mes(self):
+        # Sesiones que no pasan por guardar_taller (p. ej. generadas por horarios)
+        crear = lambda inicio, fin, dia=3: Taller.objects.create(
+            nombre='X', profesor=self.profesor, cupos=5, fecha=date(2025, 11, dia),
+            hora_inicio=time(*inicio), hora_fin=time(*fin),
+        )
+        largo = crear((8, 0), (12, 0))
+        crear((12, 0), (13, 0))   # no choca: empieza cuando termina el largo
+        crear((9, 0), (10, 0), dia=4)
+        crear((9, 30), (9, 45), dia=4)
+        crear((9, 0), (10, 0), dia=5)
+
+        with self.assertNumQueries(1):
+            choques = choques_del_mes(2025, 11)
+
+        pares = {(a.fecha.day, a.hora_inicio, b.hora_inicio) for a, b in choques}
+        self.assertEqual(pares, {
+            (3, time(8), time(9)),      # largo vs yoga
+            (4, time(9), time(9, 30)),
+        })
+        self.assertIn(largo, choques[0])
+
+
+class EstadisticasAsistenciaTests(TestCase):
+    """Los conteos incrementales coinciden con una reconstrucción desde cero."""
+
+    def conteos(self):
+        def filas(modelo):
+            # una fila en cero (p. ej. tras cancelar) equivale a no tener fila
+            return sorted(f for f in modelo.objects.values_list('pk', 'presentes', 'ausentes', 'pendientes') if any(f[1:]))
+        return [filas(modelo) for modelo in (
+            EstadisticaAsistenciaTaller, EstadisticaAsistenciaSocio,
+            EstadisticaAsistenciaProfesor, EstadisticaAsistenciaGlobal,
+        )]
+
+    def test_incremental_igual_a_reconstruir(self):
+        taller = crear_taller(cupos=10)
+        socios = crear_socios(4)
+        a, b, c, d = [inscribir(s, taller) for s in socios]
+        self.client.force_login(taller.profesor)
+
+        # una a una, en lote, eliminación desde la API y borrado en cascada
+        self.client.post(f'/talleres/api/inscripciones/{a.id}/asistencia/', {'asistencia': 'ausente'})
+        self.client.post(f'/talleres/api/{taller.pk}/asistencia/',
+                         {'asistencia': {b.id: 'presente', c.id: 'presente', a.id: 'presente'}},
+                         content_type='application/json')
+        self.client.post(reverse('api_eliminar_inscripcion', args=[c.id]))
+        socios[1].delete()
+
+        stats = EstadisticaAsistenciaTaller.objects.get(taller=taller)
+        self.assertEqual((stats.presentes, stats.ausentes, stats.pendientes), (1, 0, 1))
+        self.assertEqual(stats.tasa_asistencia, 100.0)
+
+        incremental = self.conteos()
+        reconstruir()
+        self.assertEqual(self.conteos(), incremental)
+
+    def test_totales_por_profesor_y_globales(self):
+        taller = crear_taller(cupos=10)
+        otro_profe = Usuario.objects.create_user(
+            rut='30000001-9', password='x', nombre='Otro', apellido='P', correo='otro@gym.cl', rol='profesor',
+        )
+        otro = Taller.objects.create(
+            nombre='Pilates', profesor=otro_profe, cupos=10,
+            fecha=date(2025, 11, 4), hora_inicio=time(9), hora_fin=time(10),
+        )
+        ana, beto, carla = crear_socios(3)
+        marcar_asistencia(taller, {inscribir(ana, taller).id: 'presente', inscribir(beto, taller).id: 'ausente'})
+        inscribir(carla, otro)
+        profe = taller.profesor_id
+
+        self.assertEqual(totales_profesor(profe).tasa_asistencia, 50.0)
+        self.assertEqual(totales_profesor(otro_profe.pk).pendientes, 1)
+        total = totales_globales()
+        self.assertEqual((total.presentes, total.ausentes, total.pendientes), (1, 1, 1))
+
+        # Si el taller cambia de profesor, sus conteos se van con él
+        taller.profesor = otro_profe
+        taller.save()
+        nuevo = totales_profesor(otro_profe.pk)
+        self.assertEqual((nuevo.presentes, nuevo.ausentes, nuevo.pendientes), (1, 1, 1))
+        self.assertIsNone(totales_profesor(profe).tasa_asistencia)
+
+        # El borrado en cascada descuenta de las filas de totales
+        otro.delete()
+        self.assertEqual(totales_globales().pendientes, 0)
+
+        incremental = self.conteos()
+        reconstruir()
+        self.assertEqual(self.conteos(), incremental)
+
+    def test_paneles_leen_una_fila(self):
+        taller = crear_taller(cupos=10)
+        marcar_asistencia(taller, {inscribir(crear_socios(1)[0], taller).id: 'presente'})
+        admin = Usuario.objects.create_user(
+            rut='11111111-1', password='x', nombre='Ana', apellido='Admin', correo='admin@gym.cl', rol='admin',
+        )
+        for usuario, vista in ((admin, 'dashboard_admin'), (taller.profesor, 'dashboard_profesor')):
+            self.client.force_login(usuario)
+            respuesta = self.client.get(reverse(vista))
+            self.assertEqual(respuesta.context['asistencia'].presentes, 1)
+            self.assertEqual(respuesta.context['asistencia'].tasa_asistencia, 100.0)
+
+
+class NotificacionesTests(TestCase):
+
+    def setUp(self):
+        self.taller = crear_taller(cupos=5)
+        self.socios = crear_socios(3)
+        for socio in self.socios:
+            inscribir(socio, self.taller)
+        # Inscripción cancelada (el estado se cambia desde el admin)
+        self.taller.inscripciones.filter(socio=self.socios[2]).update(estado='cancelado')
+
+    def mover(self, hora_inicio='11:00', hora_fin='12:00'):
+        return guardar_taller(profesor=self.taller.profesor, nombre='Yoga', cupos=5, fecha='2025-11-03',
+                              hora_inicio=hora_inicio, hora_fin=hora_fin, taller=self.taller)
+
+    def test_encola_solo_inscritos_y_sin_duplicar(self):
+        guardar_taller(profesor=self.taller.profesor, nombre='Yoga avanzado', cupos=8, fecha='2025-11-03',
+                       hora_inicio='09:00', hora_fin='10:00', taller=self.taller)  # mismo horario
+        self.assertFalse(NotificacionTaller.objects.exists())
+
+        self.mover()
+        self.taller.refresh_from_db()
+        self.taller.fecha, self.taller.hora_inicio, self.taller.hora_fin = date(2025, 11, 3), time(9), time(10)
+        self.mover()  # el mismo cambio otra vez (doble envío)
+        self.assertEqual(
+            sorted(NotificacionTaller.objects.filter(tipo='cambio').values_list('destinatario', flat=True)),
+            ['socio0@gym.cl', 'socio1@gym.cl'],
+        )
+
+        taller_id = self.taller.pk
+        eliminar_taller(self.taller)
+        self.assertEqual(NotificacionTaller.objects.filter(tipo='cancelacion', taller_id=taller_id).count(), 2)
+
+    def test_el_mismo_evento_se_encola_una_vez(self):
+        self.mover()
+        self.taller.refresh_from_db()
+        encolar_cambio(self.taller, (date(2025, 11, 3), time(9), time(10)))  # reintento del mismo cambio
+        encolar_cancelacion(self.taller)
+        encolar_cancelacion(self.taller)
+        self.assertEqual(
+            sorted(NotificacionTaller.objects.values_list('tipo', 'clave')),
+            sorted(
+                (tipo, f"taller:{self.taller.uid.hex}:{evento}:{socio.pk}")
+                for tipo, evento in (('cambio', 'cambio:1'), ('cancelacion', 'cancelacion'))
+                for socio in self.socios[:2]
+            ),
+        )
+
+    def test_el_mismo_cambio_repetido_avisa_cada_vez(self):
+        self.mover('11:00', '12:00')  # A→B
+        self.mover('09:00', '10:00')  # B→A
+        self.mover('11:00', '12:00')  # A→B otra vez
+        self.assertEqual(NotificacionTaller.objects.filter(tipo='cambio').count(), 3 * 2)
+
+    def test_cancelacion_con_id_reutilizado(self):
+        taller_id = self.taller.pk
+        eliminar_taller(self.taller)
+        eliminar_taller(self.taller)  # doble envío: ya no existe, no avisa de nuevo
+        self.assertEqual(NotificacionTaller.objects.filter(tipo='cancelacion').count(), 2)
+
+        # SQLite puede reutilizar el id: el nuevo taller avisa su propia cancelación
+        otro = Taller.objects.create(
+            id_taller=taller_id, nombre='Pilates', profesor=self.taller.profesor, cupos=5,
+            fecha=date(2025, 11, 4), hora_inicio=time(9), hora_fin=time(10),
+        )
+        inscribir(self.socios[0], otro)
+        eliminar_taller(otro)
+        self.assertEqual(
+            NotificacionTaller.objects.filter(tipo='cancelacion', taller_id=taller_id).count(), 3
+        )
+
+    def test_envio_en_lotes_con_una_conexion(self):
+        eliminar_taller(self.taller)
+        with patch('apps.talleres.notificaciones.get_connection', wraps=get_connection) as conexiones:
+            self.assertEqual(enviar_pendientes(lote=1), (1, 0))
+            self.assertEqual(enviar_pendientes(lote=10), (1, 0))
+            self.assertEqual(enviar_pendientes(lote=10), (0, 0))
+        self.assertEqual(conexiones.call_count, 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn('cancelado', mail.outbox[0].body)
+        self.assertEqual(NotificacionTaller.objects.filter(estado='enviada').count(), 2)
+
+    def test_reintento_con_espera_y_tope(self):
+        self.mover()
+        ahora = timezone.now()
+        with patch.object(EmailMessage, 'send', side_effect=OSError('SMTP caído')):
+            self.assertEqual(enviar_pendientes(ahora=ahora), (0, 2))
+        aviso = NotificacionTaller.objects.first()
+        self.assertEqual((aviso.estado, aviso.intentos, aviso.ultimo_error), ('pendiente', 1, 'SMTP caído'))
+        self.assertEqual(enviar_pendientes(ahora=ahora), (0, 0))  # todavía no toca
+
+        with patch.object(EmailMessage, 'send', side_effect=OSError('SMTP caído')):
+            for _ in range(MAX_INTENTOS - 1):
+                ahora += timedelta(days=1)
+                enviar_pendientes(ahora=ahora)
+        self.assertEqual(NotificacionTaller.objects.filter(estado='fallida').count(), 2)
+        self.assertEqual(enviar_pendientes(ahora=ahora + timedelta(days=1)), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+
+class MisTalleresTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.profesor = crear_taller(cupos=5).profesor  # sesión pasada: no aparece
+        self.client.force_login(self.profesor)
+        self.socios = crear_socios(4)
+        manana = timezone.localdate() + timedelta(days=1)
+        self.clases = [
+            Taller.objects.create(
+                nombre=f'Spinning {i}', profesor=self.profesor, cupos=5,
+                fecha=manana, hora_inicio=time(8 + i), hora_fin=time(9 + i),
+            )
+            for i in range(3)
+        ]
+
+    def test_consultas_fijas_y_conteos(self):
+        for clase in self.clases:
+            for socio in self.socios:
+                inscribir(socio, clase)
+        primera = self.clases[0].inscripciones.order_by('id')
+        marcar_asistencia(self.clases[0], {primera[0].id: 'presente', primera[1].id: 'ausente'})
+
+        # sesión + usuario + talleres + inscripciones (con socio)
+        with self.assertNumQueries(4):
+            respuesta = self.client.get(reverse('mis_talleres'))
+            clases = list(respuesta.context['clases'])
+            html = respuesta.content.decode()
+
+        self.assertEqual(clases, self.clases)
+        stats = clases[0].estadistica_asistencia
+        self.assertEqual((stats.presentes, stats.ausentes, stats.pendientes), (1, 1, 2))
+        self.assertIn('<strong>Presentes:</strong> 1 |', html)
+        self.assertEqual(len(clases[2].inscripciones.all()), 4)
+        self.assertNotIn('value="asistio"', html)
+
+    def test_marcar_desde_la_tabla(self):
+        insc = inscribir(self.socios[0], self.clases[0])
+        respuesta = self.client.post(reverse('mis_talleres'), {'inscripcion_id': insc.id, 'asistencia': 'presente'})
+        self.assertRedirects(respuesta, reverse('mis_talleres'))
+        insc.refresh_from_db()
+        self.assertEqual(insc.asistencia, 'presente')
+
+        otro = Usuario.objects.create_user(
+            rut='30000001-0', password='x', nombre='Otro', apellido='P', correo='otro@gym.cl', rol='profesor',
+        )
+        self.client.force_login(otro)
+        respuesta = self.client.post(reverse('mis_talleres'), {'inscripcion_id': insc.id, 'asistencia': 'ausente'})
+        self.assertEqual(respuesta.status_code, 404)
+
+
+class ListadoPaginadoTests(TestCase):
+
+    def setUp(self):
+        self.yoga = crear_taller(cupos=5)  # 2025-11-03, ya pasado
+        self.profesor = self.yoga.profesor
+        self.client.force_login(self.profesor)
+        hoy = timezone.localdate()
+        # 7 sesiones futuras: dos por día, mismo horario en uno para probar el desempate por id
+        self.futuros = [
+            Taller.objects.create(
+                nombre=f'Pilates {i}', profesor=self.profesor, cupos=5, activo=i != 6,
+                fecha=hoy + timedelta(days=1 + i // 2), hora_inicio=time(9), hora_fin=time(10),
+            )
+            for i in range(7)
+        ]
+
+    def pagina(self, **params):
+        respuesta = self.client.get(reverse('taller_list'), params)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.context
+
+    def test_recorre_todas_las_paginas_en_orden(self):
+        vistos, params = [], {}
+        with patch('apps.talleres.views.TALLERES_POR_PAGINA', 3):
+            while True:
+                ctx = self.pagina(**params)
+                vistos += ctx['talleres']
+                if not ctx['siguiente']:
+                    break
+                params = {'despues': ctx['siguiente']}
+            # y de vuelta a la primera
+            atras = self.pagina(antes=ctx['anterior'])
+
+        self.assertEqual(vistos, self.futuros)  # por defecto solo desde hoy
+        self.assertEqual(atras['talleres'], self.futuros[3:6])
+        self.assertIsNotNone(atras['siguiente'])
+
+    def test_cursor_alterado_vuelve_a_la_primera_pagina(self):
+        with patch('apps.talleres.views.TALLERES_POR_PAGINA', 3):
+            primera = self.pagina()['talleres']
+            for valores in (['ayer', '09:00', 1], ['2025-11-03', 'x', 1], ['2025-11-03', '09:00', 'x'], [[], {}, 1]):
+                with self.subTest(valores=valores):
+                    cursor = codificar_cursor(valores)
+                    self.assertEqual(self.pagina(despues=cursor)['talleres'], primera)
+                    self.assertEqual(self.pagina(antes=cursor)['talleres'], primera)
+
+    def test_filtros(self):
+        ctx = self.pagina(desde='2025-01-01', hasta='2025-12-31')
+        self.assertEqual(ctx['talleres'], [self.yoga])
+
+        ctx = self.pagina(activo='0')
+        self.assertEqual(ctx['talleres'], [self.futuros[6]])
+
+        otro = Usuario.objects.create_user(
+            rut='30000001-0', password='x', nombre='Otro', apellido='P', correo='otro@gym.cl', rol='profesor',
+        )
+        self.assertEqual(self.pagina(profesor=otro.pk)['talleres'], [])
+
+
+class InscripcionConcurrenteTests(TransactionTestCase):
+    """Muchos socios compitiendo por el último cupo: solo uno lo obtiene."""
+
+    HILOS = 12
+
+    def test_ultimo_cupo(self):
+        taller = crear_taller(cupos=1)
+        socios = crear_socios(self.HILOS)
+        barrera = threading.Barrier(self.HILOS)
+        resultados = []
+
+        def intentar(socio):
+            try:
+                barrera.wait()
+                for _ in range(50):
+                    try:
+                        inscribir(socio, taller)
+                        resultados.append('ok')
+                        return
+                    except SinCupos:
+                        resultados.append('lleno')
+                        return
+                    except OperationalError:  # SQLite: base bloqueada, reintenta
+                        reloj.sleep(0.01)
+                resultados.append('bloqueado')
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=intentar, args=(s,)) for s in socios]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        taller.refresh_from_db()
+        self.assertEqual(resultados.count('ok'), 1)
+        self.assertEqual(resultados.count('lleno'), self.HILOS - 1)
+        self.assertEqual(taller.inscritos, 1)
+        self.assertEqual(InscripcionTaller.objects.filter(taller=taller).count(), 1)
@@ -9,12 +9,14 @@ urlpatterns = [
     path('nuevo/', views.taller_form, name='taller_crear'),
     path('editar/<int:taller_id>/', views.taller_form, name='taller_editar'),
     path('eliminar/<int:taller_id>/', views.taller_eliminar, name='taller_eliminar'),
+    path('mis-talleres/', views.mis_talleres, name='mis_talleres'),
 
 
     # ============================================================
     # ⚙️ API AJAX - TALLERES
     # ============================================================
     path('api/crear/', views.api_crear_taller, name='api_crear_taller'),
+    path('api/choques/', views.api_choques_mes, name='api_choques_mes'),
     path('api/<int:taller_id>/', views.api_detalle_taller, name='api_detalle_taller'),
     path('api/<int:taller_id>/editar/', views.api_editar_taller, name='api_editar_taller'),
     path('api/<int:taller_id>/eliminar/', views.api_eliminar_taller, name='api_eliminar_taller'),
@@ -23,7 +25,13 @@ urlpatterns = [
     # ⚙️ API AJAX - INSCRIPCIONES
     # ============================================================
     path('api/<int:taller_id>/inscribir/', views.api_inscribir_socio, name='api_inscribir_taller'),
+    path('api/<int:taller_id>/asistencia/', views.api_asistencia_taller, name='api_asistencia_taller'),
     path('api/inscripciones/<int:insc_id>/asistencia/', views.api_cambiar_asistencia, name='api_cambiar_asistencia'),
     path('api/inscripciones/<int:insc_id>/eliminar/', views.api_eliminar_inscripcion, name='api_eliminar_inscripcion'),
-    
+
+    # ============================================================
+    # ⚙️ API AJAX - LISTA DE ESPERA
+    # ============================================================
+    path('api/<int:taller_id>/espera/', views.api_posicion_espera, name='api_posicion_espera'),
+    path('api/<int:taller_id>/espera/salir/', views.api_salir_espera, name='api_salir_espera'),
 ]
@@ -1,14 +1,27 @@
+import json
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db import IntegrityError
-from django.http import JsonResponse
+from django.db.models import Prefetch
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.views.decorators.http import require_POST
 
 from apps.users.models import Usuario
+from apps.socios.middleware import socio_actual
 from apps.socios.models import Socio
 from apps.planes.models import SocioPlan
-from .models import Taller, InscripcionTaller
+from apps.core.paginacion import pagina_keyset
+from .agenda import ChoqueProfesor, choques_del_mes, eliminar_taller, guardar_taller
+from .detalle import detalle_para, detalle_taller
+from .inscripciones import (
+    AsistenciaInvalida, eliminar_inscripcion, marcar_asistencia, inscribir_o_encolar, largo_espera, posicion_en_espera,
+    promover, salir_de_espera,
+)
+from .models import Taller, InscripcionTaller, ListaEspera
 
 
 # ======================================================
@@ -32,9 +45,13 @@ def es_admin_o_superadmin(user):
 
 def puede_gestionar_taller(user, taller):
     """Admin/Superadmin gestionan todos; profesor solo sus talleres."""
+    return puede_gestionar_profesor(user, taller.profesor_id)
+
+def puede_gestionar_profesor(user, profesor_id):
+    """Igual que puede_gestionar_taller, con solo el profesor del taller."""
     if es_admin_o_superadmin(user):
         return True
-    if es_profesor(user) and taller.profesor_id == user.id:
+    if es_profesor(user) and profesor_id == user.id:
         return True
     return False
 
@@ -43,17 +60,57 @@ def puede_gestionar_taller(user, taller):
 #                CRUD DE TALLERES (Panel)
 # ======================================================
 
+TALLERES_POR_PAGINA = 25
+
+
 @login_required
 def taller_list(request):
     """
     Listado general solo visible para admin, superadmin y profesor.
     El socio debe usar el calendario.
+
+    Paginado por keyset sobre (fecha, hora_inicio, id_taller): cada página
+    cuesta lo mismo aunque se acumulen años de sesiones. Filtros por GET:
+    desde / hasta (por defecto desde hoy), profesor y activo ('1' / '0').
     """
     if es_socio(request.user):
         return redirect('calendario_talleres')
 
-    talleres = Taller.objects.all().order_by('fecha', 'hora_inicio')
-    return render(request, 'talleres/talleres_list.html', {'talleres': talleres})
+    desde = parse_date(request.GET.get('desde') or '') or timezone.localdate()
+    hasta = parse_date(request.GET.get('hasta') or '')
+    profesor_id = request.GET.get('profesor') or ''
+    activo = request.GET.get('activo') or ''
+
+    talleres = Taller.objects.select_related('profesor').filter(fecha__gte=desde)
+    if hasta:
+        talleres = talleres.filter(fecha__lte=hasta)
+    if profesor_id.isdigit():
+        talleres = talleres.filter(profesor_id=profesor_id)
+    if activo in ('1', '0'):
+        talleres = talleres.filter(activo=activo == '1')
+
+    pagina = pagina_keyset(
+        talleres, ['fecha', 'hora_inicio', 'id_taller'],
+        despues=request.GET.get('despues'), antes=request.GET.get('antes'),
+        tamano=TALLERES_POR_PAGINA,
+    )
+
+    # Los enlaces de página conservan los filtros
+    filtros = request.GET.copy()
+    for param in ('despues', 'antes'):
+        filtros.pop(param, None)
+
+    return render(request, 'talleres/talleres_list.html', {
+        'talleres': pagina.items,
+        'siguiente': pagina.siguiente,
+        'anterior': pagina.anterior,
+        'filtros': filtros.urlencode(),
+        'desde': desde,
+        'hasta': hasta,
+        'profesor_id': profesor_id,
+        'activo': activo,
+        'profesores': Usuario.objects.filter(rol='profesor').order_by('nombre', 'apellido'),
+    })
 
 
 @login_required
@@ -69,12 +126,7 @@ def taller_form(request, taller_id=None):
 
     if request.method == "POST":
 
-        nombre = request.POST.get("nombre")
         profesor_id = request.POST.get("profesor")
-        cupos = int(request.POST.get("cupos"))
-        fecha = request.POST.get("fecha")
-        hora_inicio = request.POST.get("hora_inicio")
-        hora_fin = request.POST.get("hora_fin")
 
         # Asigna profesor
         if es_profesor(request.user):
@@ -82,27 +134,27 @@ def taller_form(request, taller_id=None):
         else:
             profesor = get_object_or_404(Usuario, id=profesor_id, rol="profesor")
 
+        try:
+            guardado = guardar_taller(
+                taller=taller,
+                profesor=profesor,
+                nombre=request.POST.get("nombre"),
+                cupos=request.POST.get("cupos"),
+                fecha=request.POST.get("fecha"),
+                hora_inicio=request.POST.get("hora_inicio"),
+                hora_fin=request.POST.get("hora_fin"),
+            )
+        except (ChoqueProfesor, ValueError) as e:
+            messages.error(request, str(e))
+            return render(request, 'talleres/taller_form.html', {
+                'taller': taller,
+                'profesores': profesores
+            })
+
         if taller:
-            # EDITAR
-            taller.nombre = nombre
-            taller.profesor = profesor
-            taller.cupos = cupos
-            taller.fecha = fecha
-            taller.hora_inicio = hora_inicio
-            taller.hora_fin = hora_fin
-            taller.save()
+            promover(guardado.pk)  # si subieron los cupos, entra la lista de espera
             messages.success(request, "Taller actualizado.")
         else:
-            # CREAR
-            Taller.objects.create(
-                nombre=nombre,
-                profesor=profesor,
-                cupos=cupos,
-                fecha=fecha,
-                hora_inicio=hora_inicio,
-                hora_fin=hora_fin,
-                activo=True
-            )
             messages.success(request, "Taller creado.")
 
         return redirect('taller_list')
@@ -122,11 +174,54 @@ def taller_eliminar(request, taller_id):
         messages.error(request, "No puedes eliminar este taller.")
         return redirect('taller_list')
 
-    taller.delete()
+    eliminar_taller(taller)
     messages.success(request, "Taller eliminado.")
     return redirect('taller_list')
 
 
+# ======================================================
+#                MIS TALLERES (PROFESOR)
+# ======================================================
+
+@login_required
+@user_passes_test(es_profesor)
+def mis_talleres(request):
+    """
+    Próximas sesiones del profesor con su lista de alumnos.
+
+    Consultas fijas sin importar cuántas clases haya: una para los talleres
+    (con su fila de estadísticas de asistencia, la misma que usan los paneles;
+    los inscritos ya vienen en la columna) y una para todas las inscripciones
+    con su socio.
+    POST marca la asistencia de una inscripción (botones de la tabla).
+    """
+    if request.method == 'POST':
+        insc = get_object_or_404(
+            InscripcionTaller.objects.select_related('taller'),
+            id=request.POST.get('inscripcion_id'), taller__profesor=request.user,
+        )
+        try:
+            marcar_asistencia(insc.taller, {insc.id: request.POST.get('asistencia')})
+            messages.success(request, "Asistencia registrada.")
+        except AsistenciaInvalida as e:
+            messages.error(request, str(e))
+        return redirect('mis_talleres')
+
+    clases = (
+        Taller.objects.filter(profesor=request.user, fecha__gte=timezone.localdate())
+        .select_related('estadistica_asistencia')
+        .prefetch_related(Prefetch(
+            'inscripciones',
+            queryset=InscripcionTaller.objects.select_related('socio').order_by(
+                'estado', 'socio__apellido_paterno', 'socio__nombre'
+            ),
+        ))
+        .order_by('fecha', 'hora_inicio', 'id_taller')
+    )
+
+    return render(request, 'talleres/talleres_profesor.html', {'clases': clases})
+
+
 # ======================================================
 #                API CALENDARIO (AJAX)
 # ======================================================
@@ -141,11 +236,6 @@ def api_crear_taller(request):
         return JsonResponse({'ok': False, 'msg': 'Los socios no pueden crear talleres.'}, status=403)
 
     try:
-        nombre = request.POST.get('nombre')
-        cupos = int(request.POST.get('cupos'))
-        fecha = request.POST.get('fecha')
-        hora_inicio = request.POST.get('hora_inicio')
-        hora_fin = request.POST.get('hora_fin')
         profesor_id = request.POST.get('profesor_id')
 
         if es_profesor(user):
@@ -153,60 +243,44 @@ def api_crear_taller(request):
         else:
             profesor = get_object_or_404(Usuario, id=profesor_id, rol='profesor')
 
-        nuevo = Taller.objects.create(
-            nombre=nombre,
+        nuevo = guardar_taller(
             profesor=profesor,
-            cupos=cupos,
-            fecha=fecha,
-            hora_inicio=hora_inicio,
-            hora_fin=hora_fin,
-            activo=True
+            nombre=request.POST.get('nombre'),
+            cupos=request.POST.get('cupos'),
+            fecha=request.POST.get('fecha'),
+            hora_inicio=request.POST.get('hora_inicio'),
+            hora_fin=request.POST.get('hora_fin'),
         )
 
         return JsonResponse({'ok': True, 'id': nuevo.id_taller})
 
+    except ChoqueProfesor as e:
+        return JsonResponse({'ok': False, 'msg': str(e), 'choques': [t.id_taller for t in e.talleres]}, status=400)
     except Exception as e:
         return JsonResponse({'ok': False, 'msg': str(e)})
 
 
 @login_required
 def api_detalle_taller(request, taller_id):
-    """Datos del taller para el modal de detalle."""
-    taller = get_object_or_404(Taller, id_taller=taller_id)
+    """
+    Datos del taller para el modal de detalle. También es la respuesta de
+    inscribir / quitar inscripción, así que sale de la caché de detalle.py.
+    """
+    datos = detalle_taller(taller_id)
+    if datos is None:
+        raise Http404("Taller no encontrado")
     user = request.user
 
-    inscritos = taller.inscripciones.filter(
-        estado='inscrito'
-    ).select_related('socio').values(
-        'id', 'socio_id', 'socio__nombre', 'socio__apellido_paterno', 'asistencia'
-    )
+    data = detalle_para(datos, usuario_id=user.pk if es_socio(user) else None)
 
-    cupos_disp = taller.cupos - taller.inscritos_count()
+    # socio no inscrito: ¿está en la lista de espera? (solo si hay cola)
+    data['mi_posicion_espera'] = None
+    if es_socio(user) and not data['mi_inscripcion_id'] and data['en_espera']:
+        data['mi_posicion_espera'] = ListaEspera.objects.filter(
+            taller_id=taller_id, socio__usuario=user
+        ).values_list('posicion', flat=True).first()
 
-    # socio: ¿está inscrito?
-    mi_inscripcion = None
-    if es_socio(user):
-        mi = taller.inscripciones.filter(socio__rut=user.rut).first()
-        if mi:
-            mi_inscripcion = mi.id
-
-    puede_gestionar = puede_gestionar_taller(user, taller)
-
-    data = {
-        'id': taller.id_taller,
-        'nombre': taller.nombre,
-        'profesor_id': taller.profesor.id,
-        'profesor': f"{taller.profesor.nombre} {getattr(taller.profesor, 'apellido', '')}",
-        'cupos': taller.cupos,
-        'inscritos': taller.inscritos_count(),
-        'cupos_disponibles': cupos_disp,
-        'fecha': taller.fecha.strftime('%Y-%m-%d'),
-        'hora_inicio': taller.hora_inicio.strftime('%H:%M'),
-        'hora_fin': taller.hora_fin.strftime('%H:%M'),
-        'alumnos': list(inscritos),
-        'mi_inscripcion_id': mi_inscripcion,
-        'puede_gestionar': puede_gestionar,
-    }
+    data['puede_gestionar'] = puede_gestionar_profesor(user, data['profesor_id'])
 
     return JsonResponse({'ok': True, 'taller': data})
 
@@ -221,22 +295,27 @@ def api_editar_taller(request, taller_id):
         return JsonResponse({'ok': False, 'msg': 'No puedes editar este taller'}, status=403)
 
     try:
-        taller.nombre = request.POST.get('nombre')
-        taller.cupos = int(request.POST.get('cupos'))
-        taller.fecha = request.POST.get('fecha')
-        taller.hora_inicio = request.POST.get('hora_inicio')
-        taller.hora_fin = request.POST.get('hora_fin')
-
         profesor_id = request.POST.get('profesor_id')
 
         if es_profesor(request.user):
-            taller.profesor = request.user
+            profesor = request.user
         else:
-            taller.profesor = get_object_or_404(Usuario, id=profesor_id, rol='profesor')
+            profesor = get_object_or_404(Usuario, id=profesor_id, rol='profesor')
 
-        taller.save()
+        guardar_taller(
+            taller=taller,
+            profesor=profesor,
+            nombre=request.POST.get('nombre'),
+            cupos=request.POST.get('cupos'),
+            fecha=request.POST.get('fecha'),
+            hora_inicio=request.POST.get('hora_inicio'),
+            hora_fin=request.POST.get('hora_fin'),
+        )
+        promover(taller.pk)  # si subieron los cupos, entra la lista de espera
         return JsonResponse({'ok': True})
 
+    except ChoqueProfesor as e:
+        return JsonResponse({'ok': False, 'msg': str(e), 'choques': [t.id_taller for t in e.talleres]}, status=400)
     except Exception as e:
         return JsonResponse({'ok': False, 'msg': str(e)})
 
@@ -250,10 +329,43 @@ def api_eliminar_taller(request, taller_id):
     if not puede_gestionar_taller(request.user, taller):
         return JsonResponse({'ok': False, 'msg': 'No tienes permiso'}, status=403)
 
-    taller.delete()
+    eliminar_taller(taller)
     return JsonResponse({'ok': True})
 
 
+@login_required
+@user_passes_test(lambda u: es_admin_o_superadmin(u) or es_profesor(u))
+def api_choques_mes(request):
+    """
+    Choques de horario de profesores en un mes (?mes=YYYY-MM[&profesor_id=]).
+    El profesor solo revisa su propia agenda.
+    """
+    try:
+        anio, mes = map(int, (request.GET.get('mes') or '').split('-'))
+        choques = choques_del_mes(
+            anio, mes,
+            profesor_id=request.user.id if es_profesor(request.user) else request.GET.get('profesor_id'),
+        )
+    except ValueError:
+        return JsonResponse({'ok': False, 'msg': 'Mes inválido (YYYY-MM)'}, status=400)
+
+    def resumen(t):
+        return {
+            'id': t.id_taller,
+            'nombre': t.nombre,
+            'hora_inicio': t.hora_inicio.strftime('%H:%M'),
+            'hora_fin': t.hora_fin.strftime('%H:%M'),
+        }
+
+    return JsonResponse({
+        'ok': True,
+        'choques': [
+            {'profesor_id': a.profesor_id, 'fecha': a.fecha.isoformat(), 'talleres': [resumen(a), resumen(b)]}
+            for a, b in choques
+        ],
+    })
+
+
 # ======================================================
 #      INSCRIPCIÓN (ADMIN / PROFESOR / SOCIO)
 # ======================================================
@@ -267,7 +379,7 @@ def api_inscribir_socio(request, taller_id):
 
     # SOCIO → solo él mismo
     if es_socio(user):
-        socio = get_object_or_404(Socio, rut=user.rut)
+        socio = socio_actual(request)
 
     else:
         # PROFESOR O ADMIN
@@ -278,27 +390,21 @@ def api_inscribir_socio(request, taller_id):
         socio_id = request.POST.get("socio_id")
         socio = get_object_or_404(Socio, id=socio_id)
 
-    # Validar cupos
-    if taller.inscritos_count() >= taller.cupos:
-        return JsonResponse({'ok': False, 'msg': 'No hay cupos disponibles'}, status=400)
-
     # Validar que el socio tenga plan válido
     socio_plan = SocioPlan.objects.filter(socio=socio, estado=True).first()
     if not socio_plan or not socio_plan.plan.puede_reservar_talleres:
         return JsonResponse({'ok': False, 'msg': 'El socio no tiene derecho a talleres'}, status=400)
 
-    # Crear inscripción
-    insc, creada = InscripcionTaller.objects.get_or_create(
-        socio=socio,
-        taller=taller,
-        defaults={'estado': 'inscrito'}
-    )
-
-    if not creada:
-        insc.estado = 'inscrito'
-        insc.save()
+    # Toma el cupo (o el lugar en la lista de espera) en un solo paso atómico
+    _, espera = inscribir_o_encolar(socio, taller)
+    if espera:
+        return JsonResponse({
+            'ok': True,
+            'en_espera': True,
+            'posicion': espera.posicion,
+            'msg': f'Taller lleno: quedó en lista de espera (posición {espera.posicion}).',
+        })
 
-    
     return api_detalle_taller(request, taller.id_taller)
 
 
@@ -324,6 +430,35 @@ def api_cambiar_asistencia(request, insc_id):
     return JsonResponse({'ok': True})
 
 
+@login_required
+@require_POST
+def api_asistencia_taller(request, taller_id):
+    """
+    Asistencia de toda la clase en una sola petición.
+    Body JSON: {"asistencia": {"<inscripcion_id>": "presente" | "ausente" | "pendiente", ...}}
+    Devuelve la lista de alumnos actualizada.
+    """
+    taller = get_object_or_404(Taller, id_taller=taller_id)
+
+    if not puede_gestionar_taller(request.user, taller):
+        return JsonResponse({'ok': False, 'msg': 'No tienes permiso'}, status=403)
+
+    try:
+        cambios = json.loads(request.body or b'{}').get('asistencia')
+    except (ValueError, AttributeError):
+        cambios = None
+    if not isinstance(cambios, dict) or not cambios:
+        return JsonResponse({'ok': False, 'msg': 'Sin cambios de asistencia'}, status=400)
+
+    try:
+        actualizadas = marcar_asistencia(taller, cambios)
+    except AsistenciaInvalida as e:
+        return JsonResponse({'ok': False, 'msg': str(e)}, status=400)
+
+    alumnos = detalle_para(detalle_taller(taller.id_taller))['alumnos']
+    return JsonResponse({'ok': True, 'actualizadas': actualizadas, 'alumnos': alumnos})
+
+
 @login_required
 @require_POST
 def api_eliminar_inscripcion(request, insc_id):
@@ -333,7 +468,7 @@ def api_eliminar_inscripcion(request, insc_id):
 
     # Socio elimina SOLO su inscripción
     if es_socio(user):
-        if insc.socio.rut != user.rut:
+        if insc.socio_id != socio_actual(request).id:
             return JsonResponse({'ok': False, 'msg': 'No puedes eliminar otros'}, status=403)
 
     # admin / profesor / superadmin
@@ -341,6 +476,51 @@ def api_eliminar_inscripcion(request, insc_id):
         if not puede_gestionar_taller(user, taller):
             return JsonResponse({'ok': False, 'msg': 'No tienes permiso'}, status=403)
 
-    insc.delete()
-    return api_detalle_taller(request, insc.taller.id_taller)
+    # Libera el cupo y promueve a la cabeza de la lista de espera
+    eliminar_inscripcion(insc)
+    return api_detalle_taller(request, taller.id_taller)
+
+
+# ======================================================
+#      LISTA DE ESPERA
+# ======================================================
+
+def _socio_de_la_peticion(request, taller):
+    """Socio sobre el que actúa la petición: el propio o ?socio_id si gestiona el taller."""
+    user = request.user
+    if es_socio(user):
+        return socio_actual(request)
+    if not puede_gestionar_taller(user, taller):
+        return None
+    return get_object_or_404(Socio, id=request.POST.get('socio_id') or request.GET.get('socio_id'))
+
+
+@login_required
+def api_posicion_espera(request, taller_id):
+    """Posición del socio en la lista de espera y largo de la cola."""
+    taller = get_object_or_404(Taller, id_taller=taller_id)
+    socio = _socio_de_la_peticion(request, taller)
+    if socio is None:
+        return JsonResponse({'ok': False, 'msg': 'No tienes permiso'}, status=403)
+
+    return JsonResponse({
+        'ok': True,
+        'posicion': posicion_en_espera(socio, taller.id_taller),
+        'en_espera': largo_espera(taller.id_taller),
+    })
+
+
+@login_required
+@require_POST
+def api_salir_espera(request, taller_id):
+    """Quita al socio de la lista de espera."""
+    taller = get_object_or_404(Taller, id_taller=taller_id)
+    socio = _socio_de_la_peticion(request, taller)
+    if socio is None:
+        return JsonResponse({'ok': False, 'msg': 'No tienes permiso'}, status=403)
+
+    if not salir_de_espera(socio, taller):
+        return JsonResponse({'ok': False, 'msg': 'El socio no está en la lista de espera'}, status=400)
+
+    return api_detalle_taller(request, taller.id_taller)
 
@@ -1,3 +1,48 @@
-from django.test import TestCase
+import tempfile
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.socios.models import Socio
+from .models import Usuario
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CuentaDeSocioTests(TestCase):
+    """Las cuentas de socio creadas desde Usuarios quedan enlazadas a su socio."""
+
+    def setUp(self):
+        self.superadmin = Usuario.objects.create_user(
+            rut='99999999-9', password='x', nombre='Super', apellido='S', correo='super@gym.cl', rol='superadmin',
+        )
+        self.client.force_login(self.superadmin)
+        self.ana = Socio.objects.create(rut='12.345.678-5', nombre='Ana', apellido_paterno='Soto', correo='ana@gym.cl')
+        self.beto = Socio.objects.create(rut='7654321-6', nombre='Beto', apellido_paterno='Paz', correo='beto@gym.cl')
+
+    def test_crear_usuario_enlaza_al_socio(self):
+        self.client.post(reverse('crear_usuario'), {
+            'rut': '12345678-5', 'nombre': 'Ana', 'apellido': 'Soto', 'correo': 'ana.soto@gym.cl', 'rol': 'socio',
+        })
+        usuario = Usuario.objects.get(correo='ana.soto@gym.cl')
+        self.ana.refresh_from_db()
+        self.assertEqual(self.ana.usuario, usuario)
+
+        # Ya entra a sus páginas de socio
+        self.client.force_login(usuario)
+        respuesta = self.client.get(reverse('dashboard_socio'))
+        self.assertEqual(respuesta.context['socio'].pk, self.ana.pk)
+
+    def test_carga_usuarios_enlaza_solo_socios(self):
+        archivo = SimpleUploadedFile('usuarios.csv', (
+            "rut,nombre,apellido,correo,rol\n"
+            "7.654.321-6,Beto,Paz,beto.paz@gym.cl,socio\n"
+            "12345678-5,Profe,P,profe@gym.cl,profesor\n"
+        ).encode())
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            self.client.post(reverse('carga_usuarios'), {'archivo': archivo})
+
+        self.assertEqual(
+            dict(Socio.objects.values_list('rut', 'usuario__correo')),
+            {'12.345.678-5': None, '7654321-6': 'beto.paz@gym.cl'},
+        )
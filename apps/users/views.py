@@ -15,7 +15,8 @@ import os
 
 from apps.socios.models import Socio
 from apps.rutinas.models import Rutina
-from apps.talleres.models import Taller
+from apps.talleres.estadisticas import totales_globales, totales_profesor
+from apps.talleres.models import EstadisticaAsistenciaSocio, Taller
 
 # ===============================
 # DASHBOARDS POR ROL
@@ -96,6 +97,13 @@ def dashboard_admin(request):
     ultimos_socios = Socio.objects.order_by('-fec_registro')[:5]
     ultimas_rutinas = Rutina.objects.order_by('-fecha_asignacion')[:5]
 
+    # 🎯 Asistencia a talleres (fila de totales, sin recorrer inscripciones)
+    asistencia = totales_globales()
+    socios_que_faltan = (
+        EstadisticaAsistenciaSocio.objects.filter(ausentes__gt=0)
+        .select_related('socio').order_by('-ausentes')[:5]
+    )
+
     context = {
         'total_admins': total_admins,
         'total_profesores': total_profesores,
@@ -108,6 +116,8 @@ def dashboard_admin(request):
         'planes_vencidos': planes_vencidos,
         'ultimos_socios': ultimos_socios,
         'ultimas_rutinas': ultimas_rutinas,
+        'asistencia': asistencia,
+        'socios_que_faltan': socios_que_faltan,
     }
 
     return render(request, 'dashboards/dashboard_admin.html', context)
@@ -133,10 +143,14 @@ def dashboard_profesor(request):
     except Exception:
         talleres_asignados = 0
 
+    # 🔹 Asistencia a sus talleres (fila de totales del profesor)
+    asistencia = totales_profesor(profesor.pk)
+
     context = {
         'total_alumnos': total_alumnos,
         'rutinas_activas': rutinas_activas,
         'talleres_asignados': talleres_asignados,
+        'asistencia': asistencia,
     }
 
     return render(request, 'dashboards/dashboard_profesor.html', context)
@@ -146,7 +160,7 @@ def dashboard_profesor(request):
 @user_passes_test(es_socio)
 def dashboard_socio(request):
     """Panel principal del socio: muestra su información, plan, profesor y estado físico."""
-    socio = Socio.objects.filter(rut=request.user.rut).select_related('profesor_asignado').first()
+    socio = Socio.objects.with_plan_activo().filter(usuario=request.user).select_related('profesor_asignado').first()
 
     if not socio:
         messages.warning(request, "No se encontró información de socio asociada a tu cuenta.")
@@ -231,6 +245,10 @@ def crear_usuario(request):
         else:
             user.especialidad = 'no_aplica'
         user.save()
+
+        # 🔗 Si ya hay un socio con ese RUT, la cuenta es la suya (request.socio)
+        if rol == 'socio':
+            Socio.objects.enlazar_usuario(user)
         return redirect(f"{reverse('lista_usuarios')}?success=created")
 
     especialidades = Usuario.ESPECIALIDAD_CHOICES
@@ -340,7 +358,7 @@ def carga_usuarios(request):
                     else 'no_aplica'
                 )
 
-                Usuario.objects.create(
+                usuario = Usuario.objects.create(
                     rut=rut,
                     nombre=row['nombre'],
                     apellido=row['apellido'],
@@ -350,6 +368,8 @@ def carga_usuarios(request):
                     password=make_password(str(row['rut'])),
                     is_active=True,
                 )
+                if rol == 'socio':
+                    Socio.objects.enlazar_usuario(usuario)
                 creados += 1
 
             messages.success(request, f"✅ {creados} usuarios creados correctamente.")
@@ -400,7 +420,7 @@ def perfil_usuario(request):
         elif action == 'eliminar':
             if user.rol in ['socio', 'profesor']:
                 from apps.socios.models import Socio
-                Socio.objects.filter(rut=user.rut).delete()
+                Socio.objects.filter(usuario=user).delete()
                 user.delete()
                 messages.success(request, "Tu cuenta ha sido eliminada.")
                 return redirect('login')
@@ -7,8 +7,11 @@ from datetime import datetime, timedelta
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gymofthronesback.settings')  # ← reemplaza con el nombre real de tu settings
 django.setup()
 
+import pandas as pd
+
+from apps.socios.alta_masiva import cargar
 from apps.socios.models import Socio
-from apps.planes.models import Plan, SocioPlan
+from apps.planes.models import Plan
 
 # --- Funciones auxiliares ---
 def calcular_dv(rut_sin_dv):
@@ -43,7 +46,7 @@ apellidos = [
     "González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva",
     "Martínez", "Sepúlveda", "Morales", "Rodríguez", "Fuentes", "Hernández", "Torres"
 ]
-formas_pago = ["Efectivo", "Tarjeta", "Transferencia"]
+formas_pago = ["efectivo", "tarjeta", "transferencia"]
 
 # --- Planes reales desde BD ---
 planes = list(Plan.objects.all())
@@ -53,49 +56,41 @@ if not planes:
 
 # --- Parámetros ---
 TOTAL_SOCIOS = 100
-ruts_generados = set()
+ruts_generados = set(Socio.objects.values_list('rut', flat=True))
 
-# --- Generación ---
-for _ in range(TOTAL_SOCIOS):
+# --- Generación (en memoria) ---
+filas = []
+for i in range(TOTAL_SOCIOS):
     rut = generar_rut_chileno()
-    while rut in ruts_generados or Socio.objects.filter(rut=rut).exists():
+    while rut in ruts_generados:
         rut = generar_rut_chileno()
     ruts_generados.add(rut)
 
     nombre = random.choice(nombres)
     apellido_paterno = random.choice(apellidos)
     apellido_materno = random.choice(apellidos) if random.random() > 0.2 else ""
-    correo = f"{nombre.lower()}.{apellido_paterno.lower()}{random.randint(1, 99)}@correo.cl"
-    telefono = f"+569{random.randint(40000000, 99999999)}"
+    # el RUT en el correo lo hace único
+    correo = f"{nombre.lower()}.{apellido_paterno.lower()}{rut.split('-')[0][-4:]}{i}@correo.cl"
+    telefono = f"9{random.randint(40000000, 99999999)}"
 
     edad_dias = random.randint(18 * 365, 70 * 365)
     fecNac = (datetime.now() - timedelta(days=edad_dias)).date()
-    estado = random.choice([True, False])
-
-    # Crear socio
-    socio = Socio.objects.create(
-        rut=rut,
-        nombre=nombre,
-        apellido_paterno=apellido_paterno,
-        apellido_materno=apellido_materno,
-        correo=correo,
-        telefono=telefono,
-        fecNac=fecNac,
-        estado=estado,
-    )
 
-    # Asignar plan al azar (exactamente como en el formulario)
-    plan = random.choice(planes)
-    forma_pago = random.choice(formas_pago)
+    filas.append({
+        'rut': rut,
+        'nombre': nombre,
+        'apellido_paterno': apellido_paterno,
+        'apellido_materno': apellido_materno,
+        'correo': correo,
+        'telefono': telefono,
+        'fecNac': fecNac.isoformat(),
+        'plan': str(random.choice(planes).id),
+        'forma_pago': random.choice(formas_pago),
+    })
 
-    SocioPlan.objects.create(
-        socio=socio,
-        plan=plan,
-        forma_pago=forma_pago,
-        fecInicio=datetime.now().date(),
-        fecFin=(datetime.now() + timedelta(days=plan.duracion)).date() if hasattr(plan, 'duracion') else None,
-        monto_pagado=plan.precio if hasattr(plan, 'precio') else 0,
-        estado=True
-    )
+# --- Alta masiva: Socio + Usuario + SocioPlan + Pago (igual que el formulario) ---
+resultado = cargar(pd.DataFrame(filas, dtype=str))
+for error in resultado['errores']:
+    print(f"⚠️ Fila {error['fila']} ({error['rut']}): {error['error']}")
 
-print(f"✅ Se generaron {TOTAL_SOCIOS} socios con sus planes asignados correctamente.")
+print(f"✅ Se generaron {resultado['creados']} socios con sus planes asignados correctamente.")
@@ -65,6 +65,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.socios.middleware.SocioMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -99,10 +100,29 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Toma el lock de escritura al abrir la transacción: serializa a los
+        # escritores concurrentes (p. ej. dos reservas de la misma cancha).
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
     }
 }
 
 
+# Caché (versiones de los feeds del calendario, etc.)
+# En producción con varios workers usar un backend compartido (Redis/Memcached),
+# si no cada proceso tendría su propia versión de los feeds.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'gymofthrones',
+    }
+}
+
+
+# Correo (avisos de talleres: comando enviar_notificaciones).
+# En producción: django.core.mail.backends.smtp.EmailBackend + EMAIL_HOST, etc.
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'Gym of Thrones <no-reply@gymofthrones.cl>'
+
 
 AUTH_USER_MODEL = 'users.Usuario'
 LOGIN_URL = 'login'
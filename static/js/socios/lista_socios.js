@@ -3,57 +3,128 @@ document.addEventListener("DOMContentLoaded", () => {
   const success = url.searchParams.get("success");
   const error = url.searchParams.get("error");
 
-  // 🔍 BUSCADOR EN TIEMPO REAL + BOTÓN LIMPIAR
+  // 📋 DIRECTORIO: carga por páginas desde la API (búsqueda y filtros en el servidor)
+  const tabla = document.getElementById('tablaSocios');
+  const cuerpo = tabla.querySelector('tbody');
   const buscador = document.getElementById('buscador');
   const btnLimpiar = document.getElementById('btnLimpiar');
-  const filas = document.querySelectorAll('#tablaSocios tbody tr');
-
-  if (buscador) {
-    const filtrar = () => {
-      const texto = buscador.value.toLowerCase();
-      filas.forEach(fila => {
-        const coincide = fila.innerText.toLowerCase().includes(texto);
-        fila.style.display = coincide ? '' : 'none';
-      });
-    };
-
-    buscador.addEventListener('keyup', filtrar);
-
-    // 🔘 Botón para limpiar búsqueda
-    if (btnLimpiar) {
-      btnLimpiar.addEventListener('click', () => {
-        buscador.value = '';
-        filtrar();
-      });
+  const btnMas = document.getElementById('btnMasSocios');
+  const cargando = document.getElementById('cargandoSocios');
+  const sinSocios = document.getElementById('sinSocios');
+  const filtros = document.querySelectorAll('#filtrosSocios select');
+
+  let siguiente = null;   // cursor de la próxima página
+  let peticion = 0;       // descarta respuestas de búsquedas ya reemplazadas
+  let ocupado = false;
+
+  const escapar = texto => String(texto ?? '').replace(/[&<>"']/g, c => ({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+  }[c]));
+
+  const urlCon = (plantilla, id) => plantilla.replace('/0/', `/${id}/`);
+
+  const fila = s => `
+    <tr>
+      <td>${escapar(s.rut)}</td>
+      <td>${escapar(s.nombre)}</td>
+      <td>${escapar(s.correo)}</td>
+      <td>${s.telefono ? '+56' + escapar(s.telefono) : '-'}</td>
+      <td>${s.estado
+        ? '<span class="badge bg-success">Activo</span>'
+        : '<span class="badge bg-secondary">Inactivo</span>'}</td>
+      <td>${escapar(s.plan || 'Sin plan')}</td>
+      <td>${s.vigencia ? `<span class="badge bg-primary">${escapar(s.vigencia)}</span>` : '-'}</td>
+      <td>${s.profesor
+        ? `${escapar(s.profesor)}<br><small class="text-muted">${escapar(s.especialidad)}</small>`
+        : '<span class="text-muted fst-italic">No asignado</span>'}</td>
+      <td>
+        <a href="${urlCon(tabla.dataset.editarUrl, s.id)}" class="btn btn-sm btn-outline-dark" title="Editar">✏️</a>
+        <a href="${urlCon(tabla.dataset.eliminarUrl, s.id)}" class="btn btn-sm btn-outline-danger eliminar-socio" title="Eliminar">🗑️</a>
+      </td>
+    </tr>`;
+
+  const parametros = () => {
+    const params = new URLSearchParams({ tamano: tabla.dataset.tamano });
+    if (buscador.value.trim()) params.set('q', buscador.value.trim());
+    filtros.forEach(select => { if (select.value) params.set(select.name, select.value); });
+    return params;
+  };
+
+  const cargar = async (reiniciar = false) => {
+    if (ocupado && !reiniciar) return;
+    const actual = ++peticion;
+    const params = parametros();
+    if (!reiniciar && siguiente) params.set('despues', siguiente);
+
+    ocupado = true;
+    cargando.classList.remove('d-none');
+    btnMas.classList.add('d-none');
+    try {
+      const resp = await fetch(`${tabla.dataset.apiUrl}?${params}`);
+      const data = await resp.json();
+      if (actual !== peticion) return;  // llegó tarde: ya hay otra búsqueda
+
+      if (reiniciar) cuerpo.innerHTML = '';
+      cuerpo.insertAdjacentHTML('beforeend', data.socios.map(fila).join(''));
+      siguiente = data.siguiente;
+      sinSocios.classList.toggle('d-none', cuerpo.children.length > 0);
+      btnMas.classList.toggle('d-none', !siguiente);
+    } finally {
+      if (actual === peticion) {
+        ocupado = false;
+        cargando.classList.add('d-none');
+      }
     }
+  };
+
+  // Búsqueda con pausa: no pide en cada tecla
+  let pausa;
+  buscador.addEventListener('input', () => {
+    clearTimeout(pausa);
+    pausa = setTimeout(() => cargar(true), 300);
+  });
+  btnLimpiar.addEventListener('click', () => {
+    buscador.value = '';
+    cargar(true);
+  });
+  filtros.forEach(select => select.addEventListener('change', () => cargar(true)));
+  btnMas.addEventListener('click', () => cargar());
+
+  // Carga la página siguiente al llegar al final de la tabla
+  if ('IntersectionObserver' in window) {
+    new IntersectionObserver(entradas => {
+      if (entradas[0].isIntersecting && siguiente) cargar();
+    }).observe(btnMas.parentElement);
   }
 
-  // ✅ CONFIRMACIÓN DE ELIMINACIÓN
-  document.querySelectorAll(".eliminar-socio").forEach(boton => {
-    boton.addEventListener("click", e => {
-      e.preventDefault();
-      const href = boton.getAttribute("href");
-
-      Swal.fire({
-        title: "¿Eliminar socio?",
-        text: "Esta acción no se puede deshacer.",
-        icon: "warning",
-        showCancelButton: true,
-        confirmButtonColor: "#d33",
-        cancelButtonColor: "#6c757d",
-        confirmButtonText: "Sí, eliminar",
-        cancelButtonText: "Cancelar",
-        reverseButtons: true,
-        customClass: {
-          popup: "rounded-4 shadow-lg",
-          confirmButton: "fw-bold px-4 py-2",
-          cancelButton: "fw-bold px-4 py-2"
-        }
-      }).then(result => {
-        if (result.isConfirmed) {
-          window.location.href = href;
-        }
-      });
+  cargar(true);
+
+  // ✅ CONFIRMACIÓN DE ELIMINACIÓN (filas cargadas dinámicamente)
+  cuerpo.addEventListener("click", e => {
+    const boton = e.target.closest(".eliminar-socio");
+    if (!boton) return;
+    e.preventDefault();
+    const href = boton.getAttribute("href");
+
+    Swal.fire({
+      title: "¿Eliminar socio?",
+      text: "Esta acción no se puede deshacer.",
+      icon: "warning",
+      showCancelButton: true,
+      confirmButtonColor: "#d33",
+      cancelButtonColor: "#6c757d",
+      confirmButtonText: "Sí, eliminar",
+      cancelButtonText: "Cancelar",
+      reverseButtons: true,
+      customClass: {
+        popup: "rounded-4 shadow-lg",
+        confirmButton: "fw-bold px-4 py-2",
+        cancelButton: "fw-bold px-4 py-2"
+      }
+    }).then(result => {
+      if (result.isConfirmed) {
+        window.location.href = href;
+      }
     });
   });
 